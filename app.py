@@ -14,15 +14,12 @@ print(mido.backend)
 mido.set_backend('mido.backends.rtmidi')
 import push2_python
 import threading
+import queue
 import time
 from datetime import datetime
 from audio.sampler import Sampler
 
 
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QTimer
-
-
 from melodic_mode import MelodicMode
 from track_selection_mode import TrackSelectionMode
 from pyramid_track_triggering_mode import PyramidTrackTriggeringMode
@@ -40,10 +37,12 @@ from midi_manager import Synths_Midi
 
 
 from controller.sequencer_controller import SequencerController
-from ui.sequencer_window import SequencerWindow
-from ui.synth_window import SynthWindow
+from controller.sequencer_state import SequencerState
 from controller.sequencer_target import SequencerTarget
-from display_utils import show_notification
+from display_utils import show_notification, show_profiling_info
+from frame_rate_governor import FrameRateGovernor
+from async_runtime import AsyncRuntime
+from mode_profiler import ModeProfiler
 import definitions
 
 app = None
@@ -69,30 +68,76 @@ class PyshaApp(object):
     push = None
     use_push2_display = None
     target_frame_rate = None
+    idle_frame_rate = None
+    frame_rate_governor = None
+    push_midi_out_messages_per_ms = None
+    mode_profiler = None
 
     # frame rate measurements
     actual_frame_rate = 0
     current_frame_rate_measurement = 0
     current_frame_rate_measurement_second = 0
 
+    # Qt windows (optional views, None in headless mode)
+    headless = False
+    qt_bridge = None
+    sequencer_window = None
+    synth_window = None
+    current_instrument_definition = None
+
+    # optional asyncio core of the runtime loop (see AsyncRuntime)
+    async_runtime = None
+
     # other state vars
     active_modes = []
+    mode_handler_chains = {}  # Push2 action callback name -> tuple of handlers of the active modes, see update_mode_handler_chains
     previously_active_mode_for_xor_group = {}
-    pads_need_update = True
-    buttons_need_update = True
+
+    # LED invalidation (see invalidate_pads/invalidate_buttons): mode (or None for all active modes) -> set of pads/buttons
+    # that need to be redrawn (or None for all of them)
+    invalidated_pads = {}
+    invalidated_buttons = {}
+    led_invalidation_lock = None
 
     # notifications
     notification_text = None
     notification_time = 0
 
+    # display dirty tracking
+    display_version = 0
+    display_render_needed = True
+    last_display_state = None
+    last_display_frame_time = 0
+    display_surface = None
+    display_surface_lines = None
+    display_background_layers = {}  # mode -> (background version, cairo surface), see get_display_background_layer
+
     # fixing issue with 2 lumis and alternating channel pressure values
     last_cp_value_recevied = 0
     last_cp_value_recevied_time = 0
 
-    def __init__(self):
+    def __init__(self, headless=False, use_asyncio=False):
         # --- Attributs requis par les méthodes de mode ---
-        self.active_modes = []
+        self.set_active_modes([])
         self.previously_active_mode_for_xor_group = {}
+        self.display_background_layers = {}
+        self.invalidated_pads = {None: None}
+        self.invalidated_buttons = {None: None}
+        self.led_invalidation_lock = threading.Lock()
+
+        # En mode headless, PyQt n'est pas importé et aucune fenêtre n'est créée (sequencer_window/synth_window restent à None)
+        self.headless = headless
+
+        # --- Runtime thread (Push/MIDI/écran) et communication avec le thread Qt ---
+        # Le bridge doit être créé dans le thread Qt (appels postés exécutés dans ce thread)
+        if not self.headless:
+            from ui.qt_bridge import QtBridge
+            self.qt_bridge = QtBridge()
+        self.runtime_calls = queue.Queue()
+        self.runtime_thread = None
+        self.runtime_stop_event = threading.Event()
+        if use_asyncio:
+            self.async_runtime = AsyncRuntime(self)
 
         # --- Chargement des paramètres ---
         if os.path.exists('settings.json'):
@@ -103,7 +148,11 @@ class PyshaApp(object):
         self.set_midi_in_channel(settings.get('midi_in_default_channel', 0))
         self.set_midi_out_channel(settings.get('midi_out_default_channel', 0))
         self.target_frame_rate = settings.get('target_frame_rate', 60)
+        self.idle_frame_rate = settings.get('idle_frame_rate', definitions.IDLE_FRAME_RATE)
+        self.frame_rate_governor = FrameRateGovernor(self.target_frame_rate, idle_frame_rate=self.idle_frame_rate)
         self.use_push2_display = settings.get('use_push2_display', True)
+        self.push_midi_out_messages_per_ms = settings.get('push_midi_out_messages_per_ms', push2_python.constants.MIDI_OUT_DEFAULT_MESSAGES_PER_MS)
+        self.mode_profiler = ModeProfiler()
 
         # Initialisation Push2
         self.init_push()
@@ -111,19 +160,12 @@ class PyshaApp(object):
         # --- Séquenceur interne ---
         self.sequencer_target = SequencerTarget(
             app=self,
-            num_pads=16,
-            steps_per_pad=32,
-            start_note=36,
-            bpm=120,
-            step_duration=0.1
+            bpm=120
         )
 
-
-        self.sequencer_window = SequencerWindow()
-        self.sequencer_window.app = self
-        self.sequencer_window.sequencer_target = self.sequencer_target
-
-
+        # Modèle du séquenceur et transport (indépendants de Qt)
+        self.sequencer_state = SequencerState(num_pads=16, num_steps=32, start_note=36)
+        self.sequencer_state.sequencer_target = self.sequencer_target
 
         self.synths_midi = Synths_Midi()
 
@@ -139,39 +181,17 @@ class PyshaApp(object):
         samples_folder = os.path.join(os.getcwd(), "samples", "chromatic")
         self.sampler.load_folder(samples_folder)
 
-        
-        self.synth_window = SynthWindow(app=self)
-        self.synth_window.show()
         # Miroir vers la structure centralisée dans Synths_Midi
         self.instrument_midi_ports = self.synths_midi.instrument_port_names
 
-        # Afficher la fenêtre séquenceur
-        self.sequencer_window.show()
-
-        # --- PRESETS ---
-        # Bloquer les signaux pour éviter un appel prématuré de load_preset
-        self.sequencer_window.preset_combo.blockSignals(True)
-        self.sequencer_window.refresh_preset_list()
-        self.sequencer_window.preset_combo.blockSignals(False)
+        # Fenêtres Qt (vues optionnelles)
+        if not self.headless:
+            self.init_qt_windows()
 
-        # Connecter le combo après initialisation complète
-        self.sequencer_window.preset_combo.currentIndexChanged.connect(
-            self.sequencer_window.on_load_preset
-        )
-
-        # Connexion : quand l'utilisateur change via combo → on stocke la sélection et notifie
-        def _on_synth_window_selection(name):
-            self.current_instrument_definition = name
-            self.buttons_need_update = True
-            self.pads_need_update = True
-
-        self.synth_window.instrument_changed.connect(_on_synth_window_selection)
-
-        
         # 3️⃣ Créer le controller
         self.sequencer_controller = SequencerController(
             app=self,
-            sequencer_model=self.sequencer_window.steps,
+            sequencer_state=self.sequencer_state,
             sequencer_window=self.sequencer_window
         )
 
@@ -191,13 +211,58 @@ class PyshaApp(object):
         # Lier le controller de séquenceur à RhythmicMode
         self.rhyhtmic_mode.sequencer_controller = self.sequencer_controller
 
+        # Profiling des modes (désactivé par défaut, coût nul dans ce cas)
+        self.set_mode_profiling(settings.get('enable_mode_profiling', False))
 
 
 
 
+
+    def init_qt_windows(self):
+        # Import ici pour que PyQt ne soit chargé que si les fenêtres sont demandées (pas en mode headless)
+        from ui.sequencer_window import SequencerWindow
+        from ui.synth_window import SynthWindow
+
+        self.sequencer_window = SequencerWindow(sequencer_state=self.sequencer_state)
+        self.sequencer_window.app = self
+
+        self.synth_window = SynthWindow(app=self)
+        self.synth_window.show()
+
+        # Afficher la fenêtre séquenceur
+        self.sequencer_window.show()
+
+        # --- PRESETS ---
+        # Bloquer les signaux pour éviter un appel prématuré de load_preset
+        self.sequencer_window.preset_combo.blockSignals(True)
+        self.sequencer_window.refresh_preset_list()
+        self.sequencer_window.preset_combo.blockSignals(False)
+
+        # Connecter le combo après initialisation complète
+        self.sequencer_window.preset_combo.currentIndexChanged.connect(
+            self.sequencer_window.on_load_preset
+        )
+
+        # Connexion : quand l'utilisateur change via combo → on stocke la sélection et notifie
+        # (signal reçu dans le thread Qt, appliqué dans le thread runtime)
+        self.synth_window.instrument_changed.connect(
+            lambda name: self.run_in_runtime_thread(self.set_current_instrument_definition, name))
+
+    def set_current_instrument_definition(self, name):
+        self.current_instrument_definition = name
+        self.invalidate_buttons()
+        self.invalidate_pads()
+        self.invalidate_display()
+
+    def get_selected_instrument(self):
+        # Instrument sélectionné dans la SynthWindow si elle existe, sinon celui de la piste sélectionnée
+        if self.synth_window is not None:
+            return self.synth_window._selected_instrument
+        return self.current_instrument_definition
+
     def init_modes(self, settings):
         self.main_controls_mode = MainControlsMode(self, settings=settings)
-        self.active_modes.append(self.main_controls_mode)
+        self.set_active_modes(self.active_modes + [self.main_controls_mode])
 
         self.melodic_mode = MelodicMode(self, settings=settings)
         self.rhyhtmic_mode = RhythmicMode(self, settings=settings)
@@ -210,7 +275,7 @@ class PyshaApp(object):
         self.pyramid_track_triggering_mode = PyramidTrackTriggeringMode(self, settings=settings)
         self.preset_selection_mode = PresetSelectionMode(self, settings=settings)
         self.midi_cc_mode = MIDICCMode(self, settings=settings)  # Must be initialized after track selection mode so it gets info about loaded tracks
-        self.active_modes += [self.track_selection_mode, self.midi_cc_mode]
+        self.set_active_modes(self.active_modes + [self.track_selection_mode, self.midi_cc_mode])
         self.track_selection_mode.select_track(self.track_selection_mode.selected_track)
         self.ddrm_tone_selector_mode = DDRMToneSelectorMode(self, settings=settings)
 
@@ -218,11 +283,13 @@ class PyshaApp(object):
 
         self.settings_mode = SettingsMode(self, settings=settings)
 
-        # connexion simple (non-Qt) :
-        self.track_selection_mode.on_track_selected_cb = lambda short_name: self.synth_window.set_current_instrument(short_name)
-
-        # ou méthode nommée :
-        self.track_selection_mode.on_track_selected_cb = self.synth_window.set_current_instrument
+        # La sélection de piste arrive du thread runtime / des callbacks Push : mise à jour de la fenêtre dans le thread Qt
+        # (qui renvoie instrument_changed), ou directement de l'instrument courant en mode headless
+        if self.synth_window is not None:
+            self.track_selection_mode.on_track_selected_cb = lambda short_name: self.run_in_qt_thread(self.synth_window.set_current_instrument, short_name)
+        else:
+            self.track_selection_mode.on_track_selected_cb = self.set_current_instrument_definition
+            self.set_current_instrument_definition(self.track_selection_mode.get_current_track_instrument_short_name())
 
     ### preset ###
 
@@ -286,7 +353,8 @@ class PyshaApp(object):
         Save a preset to the next free file in presets/.
         Saves:
         - synth_window.instrument_midi_ports names
-        - sequencer_window.steps (full 16 x 32 boolean grid)
+        - sequencer_state.pattern (16 x 32 steps with velocity, probability, ratchets, gate and micro-timing,
+          per-pad length, rate and direction)
         - tempo_bpm, steps_per_beat
         """
         presets_dir = self._ensure_presets_dir()
@@ -328,15 +396,15 @@ class PyshaApp(object):
                 preset['tracks'].append(info)
         """
         # Sequencer state
-        seq_win = getattr(self, 'sequencer_window', None)
-        if seq_win is not None:
-            # deep copy of steps (list of lists of bool)
-            preset['sequencer'] = {
-                'steps': [list(row) for row in getattr(seq_win, 'steps', [])],
-                'selected_pad': getattr(seq_win, 'selected_pad', 0),
-                'tempo_bpm': getattr(seq_win, 'tempo_bpm', 120),
-                'steps_per_beat': getattr(seq_win, 'steps_per_beat', 4)
-            }
+        seq_state = getattr(self, 'sequencer_state', None)
+        if seq_state is not None:
+            # steps (lists of lists of bool), per-step parameters and per-pad settings
+            preset['sequencer'] = seq_state.pattern.get_settings_to_save()
+            preset['sequencer'].update({
+                'selected_pad': seq_state.selected_pad,
+                'tempo_bpm': seq_state.tempo_bpm,
+                'steps_per_beat': seq_state.steps_per_beat
+            })
         else:
             preset['sequencer'] = {}
 
@@ -481,34 +549,33 @@ class PyshaApp(object):
         """
 
         # --------------------------------------------------------
-        # ###     RESTORE SEQUENCER STATE (inchangé)           ###
+        # ###     RESTORE SEQUENCER STATE                      ###
         # --------------------------------------------------------
         sequencer_data = data.get("sequencer", {})
 
-        self.sequencer_window.steps = sequencer_data.get(
-            "steps", [[False]*32 for _ in range(16)]
-        )
-        # synchronisation modèle
-        self.sequencer_controller.model = self.sequencer_window.steps
+        # Chargé en place : le controller, le target et la fenêtre lisent le même pattern
+        self.sequencer_state.pattern.load_from_settings(sequencer_data)
 
-        self.sequencer_window.selected_pad = sequencer_data.get("selected_pad", 0)
-        self.sequencer_window.tempo_bpm = sequencer_data.get("tempo_bpm", 120)
-        self.sequencer_window.steps_per_beat = sequencer_data.get("steps_per_beat", 4)
+        self.sequencer_state.selected_pad = sequencer_data.get("selected_pad", 0)
+        self.sequencer_state.tempo_bpm = sequencer_data.get("tempo_bpm", 120)
+        self.sequencer_state.steps_per_beat = sequencer_data.get("steps_per_beat", 4)
 
         # Mise à jour UI
-        self.sequencer_window.update_pad_display()
-        self.sequencer_window.update_steps_display()
+        self.sequencer_controller.update_window("update_pad_display")
+        self.sequencer_controller.update_window("update_steps_display")
 
         print("[PRESET] Loaded successfully.")
 
 
 
     def start_clock(self):
+        self.frame_rate_governor.notify_activity()
         self.synths_midi.start_clock()
         print("[DEBUG] callback au start =", self.synths_midi.clock_tick_callback)
 
 
     def stop_clock(self):
+        self.frame_rate_governor.notify_activity()
         self.synths_midi.stop_clock()
         print("[DEBUG] callback après stop =", self.synths_midi.clock_tick_callback)
 
@@ -521,24 +588,11 @@ class PyshaApp(object):
                 pass
 
 
-    from controller.sequencer_controller import SequencerController
-    from ui.sequencer_window import SequencerWindow
-
-    def init_sequencer(self):
-        self.sequencer_window = SequencerWindow()
-        self.sequencer_controller = SequencerController(
-            app=self,
-            sequencer_model=self.sequencer_window,  # ici le modèle minimal est la fenêtre
-            sequencer_window=self.sequencer_window
-        )
-
-        self.sequencer_window.show()  # affiche la fenêtre
-
     def bind_midi_callbacks(self):
         for port_name, port in self.synths_midi.midi_in_ports.items():
             # On capture port_name dans une closure
             def make_callback(name):
-                return lambda msg: self.midi_in_router(msg, name)
+                return lambda msg: self.dispatch_midi_in(self.midi_in_router, msg, name)
             port.callback = make_callback(port_name)
 
     def midi_in_router(self, msg, port_name):
@@ -578,6 +632,13 @@ class PyshaApp(object):
                 mode.on_midi_in(msg, source=instrument_name)
             except Exception:
                 pass
+        self.notify_midi_in_activity(msg)
+
+    def notify_midi_in_activity(self, msg):
+        # Notes reçues en MIDI IN : les pads invalidés par les modes ne sont mis à jour qu'au rendu de la frame suivante,
+        # remonter le frame rate (et réveiller la boucle) pour ne pas les allumer avec le retard du frame rate de repos
+        if msg.type == 'note_on' or msg.type == 'note_off':
+            self.frame_rate_governor.notify_activity()
 
 
 
@@ -590,25 +651,51 @@ class PyshaApp(object):
 
 
 
+    def set_mode_profiling(self, enabled):
+        # When enabled, the time spent in each mode's render methods and event handlers is measured and the top entries are
+        # shown on the display and saved as JSON (see ModeProfiler)
+        if enabled:
+            self.mode_profiler.enable(self.get_all_modes())
+        else:
+            self.mode_profiler.disable()
+        self.update_mode_handler_chains()  # Chains hold bound methods, use the timed (or original) ones
+        self.invalidate_display()
+
     def get_all_modes(self):
         return [getattr(self, element) for element in vars(self) if isinstance(getattr(self, element), definitions.PyshaMode)]
 
     def is_mode_active(self, mode):
         return mode in self.active_modes
 
+    def set_active_modes(self, modes):
+        # Active modes must always be changed through this method so that the handler chains are kept in sync
+        self.active_modes = modes
+        self.update_mode_handler_chains()
+
+    def update_mode_handler_chains(self):
+        # For each Push2 action callback, build the chain of handlers of the active modes which implement it, in reverse
+        # active_modes order (modes activated later get the events first). Events are then dispatched by walking these chains
+        # without allocating nor calling the no-op callbacks of PyshaMode. The dict is replaced (not modified) so that event
+        # handlers running in other threads always see a consistent set of chains
+        chains = {}
+        for handler_name in definitions.MODE_EVENT_HANDLER_NAMES:
+            chains[handler_name] = tuple([getattr(mode, handler_name) for mode in reversed(self.active_modes)
+                                          if mode.implements_handler(handler_name)])
+        self.mode_handler_chains = chains
+
     def toggle_and_rotate_settings_mode(self):
         if self.is_mode_active(self.settings_mode):
             rotation_finished = self.settings_mode.move_to_next_page()
             if rotation_finished:
-                self.active_modes = [mode for mode in self.active_modes if mode != self.settings_mode]
+                self.set_active_modes([mode for mode in self.active_modes if mode != self.settings_mode])
                 self.settings_mode.deactivate()
         else:
-            self.active_modes.append(self.settings_mode)
+            self.set_active_modes(self.active_modes + [self.settings_mode])
             self.settings_mode.activate()
 
             # Force mise à jour immédiate
-            self.buttons_need_update = True
-            self.pads_need_update = True
+            self.invalidate_buttons()
+            self.invalidate_pads()
             self.update_push2_display()
 
     def toggle_ddrm_tone_selector_mode(self):
@@ -621,7 +708,7 @@ class PyshaApp(object):
                 else:
                     new_active_modes.append(self.track_selection_mode)
                     new_active_modes.append(self.midi_cc_mode)
-            self.active_modes = new_active_modes
+            self.set_active_modes(new_active_modes)
             self.ddrm_tone_selector_mode.deactivate()
             self.midi_cc_mode.activate()
             self.track_selection_mode.activate()
@@ -633,7 +720,7 @@ class PyshaApp(object):
                     new_active_modes.append(mode)
                 elif mode == self.midi_cc_mode:
                     new_active_modes.append(self.ddrm_tone_selector_mode)
-            self.active_modes = new_active_modes
+            self.set_active_modes(new_active_modes)
             self.midi_cc_mode.deactivate()
             self.track_selection_mode.deactivate()
             self.ddrm_tone_selector_mode.activate()
@@ -654,10 +741,10 @@ class PyshaApp(object):
                     self.previously_active_mode_for_xor_group[mode.xor_group] = mode  # Store last mode that was active for the group
                 else:
                     new_active_modes.append(mode)
-            self.active_modes = new_active_modes
 
             # Now add the mode to set to the active modes list and activate it
             new_active_modes.append(mode_to_set)
+            self.set_active_modes(new_active_modes)
             mode_to_set.activate()
 
     def unset_mode_for_xor_group(self, mode_to_unset):
@@ -667,7 +754,7 @@ class PyshaApp(object):
         if self.is_mode_active(mode_to_unset):
 
             # Deactivate the mode to unset
-            self.active_modes = [mode for mode in self.active_modes if mode != mode_to_unset]
+            self.set_active_modes([mode for mode in self.active_modes if mode != mode_to_unset])
             mode_to_unset.deactivate()
 
             # Activate the previous mode that was activated for the same xor_group. If none listed, activate a default one
@@ -738,6 +825,9 @@ class PyshaApp(object):
             #'default_notes_midi_in_device_name': self.notes_midi_in.name[:-4] if self.notes_midi_in is not None else None,
             'use_push2_display': self.use_push2_display,
             'target_frame_rate': self.target_frame_rate,
+            'idle_frame_rate': self.idle_frame_rate,
+            'push_midi_out_messages_per_ms': self.push_midi_out_messages_per_ms,
+            'enable_mode_profiling': self.mode_profiler.enabled,
         }
         for mode in self.get_all_modes():
             mode_settings = mode.get_settings_to_save()
@@ -862,6 +952,7 @@ class PyshaApp(object):
                             mode.on_midi_in(msg, source="global_in")
                         except Exception:
                             pass  # same robustness as old code
+                    self.notify_midi_in_activity(msg)
 
     def notes_midi_in_handler(self, msg):
         # Check if message is note on or off and check if the MIDI channel is the one assigned to the currently selected track
@@ -895,6 +986,8 @@ class PyshaApp(object):
                             if time.time() - mode.last_time_tried_initialize_lumi > 5:
                                 mode.init_lumi_midi_out()
 
+            self.notify_midi_in_activity(msg)
+
     def add_display_notification(self, text):
         self.notification_text = text
         self.notification_time = time.time()
@@ -909,6 +1002,21 @@ class PyshaApp(object):
             # A work around is make the reconnection time bigger, but a better solution should probably be found.
             self.push.set_push2_reconnect_call_interval(2)
 
+        # Pads colors are written to a framebuffer and sent to Push once per frame (see run_loop)
+        self.push.pads.use_framebuffer = True
+
+        # MIDI messages to Push are sent from a scheduler thread with priorities (pad/button feedback first, then
+        # sequencer playhead, then bulk refreshes and sysex). Setting 'push_midi_out_messages_per_ms' to 0 disables it.
+        if self.push_midi_out_messages_per_ms:
+            self.push.enable_midi_out_scheduler(messages_per_ms=self.push_midi_out_messages_per_ms)
+
+        # Frames are written to the display from a dedicated thread so that USB writes and display reconnections don't
+        # block the main loop (only the latest frame is written if the display can't keep up)
+        self.push.display.enable_writer_thread()
+
+        # Frames identical to the last one sent are not written to the display, except every DISPLAY_KEEP_ALIVE_TIME seconds
+        self.push.display.set_keep_alive_interval(definitions.DISPLAY_KEEP_ALIVE_TIME)
+
     def update_push2_pads(self):
         for mode in self.active_modes:
             mode.update_pads()
@@ -917,19 +1025,129 @@ class PyshaApp(object):
         for mode in self.active_modes:
             mode.update_buttons()
 
+    def add_led_invalidation(self, invalidated, mode, elements):
+        with self.led_invalidation_lock:
+            if mode in invalidated:
+                current = invalidated[mode]
+                if current is not None:
+                    if elements is None:
+                        invalidated[mode] = None
+                    else:
+                        current.update(elements)
+            else:
+                invalidated[mode] = set(elements) if elements is not None else None
+
+    def invalidate_pads(self, mode=None, pads_ij=None):
+        # Pads to redraw in the next frame. With mode=None all active modes redraw all their pads (use this for changes that
+        # affect several modes, e.g. selected track color), otherwise only 'mode' redraws the given pads (all if pads_ij is None)
+        self.add_led_invalidation(self.invalidated_pads, mode, [tuple(pad_ij) for pad_ij in pads_ij] if pads_ij is not None else None)
+
+    def invalidate_buttons(self, mode=None, button_names=None):
+        # Same as invalidate_pads, for buttons
+        self.add_led_invalidation(self.invalidated_buttons, mode, button_names)
+
+    def take_led_invalidations(self, attr_name):
+        with self.led_invalidation_lock:
+            invalidated = getattr(self, attr_name)
+            setattr(self, attr_name, {})
+        return invalidated
+
+    def update_invalidated_pads(self):
+        invalidated = self.take_led_invalidations('invalidated_pads')
+        if None in invalidated:
+            self.update_push2_pads()
+            return
+        # Modes are updated in active_modes order so that modes activated later keep drawing on top
+        for mode in self.active_modes:
+            if mode in invalidated:
+                pads_ij = invalidated[mode]
+                if pads_ij is None:
+                    mode.update_pads()
+                else:
+                    mode.update_pads_region(pads_ij)
+
+    def update_invalidated_buttons(self):
+        invalidated = self.take_led_invalidations('invalidated_buttons')
+        if None in invalidated:
+            self.update_push2_buttons()
+            return
+        for mode in self.active_modes:
+            if mode in invalidated:
+                button_names = invalidated[mode]
+                if button_names is None:
+                    mode.update_buttons()
+                else:
+                    mode.update_buttons_subset(button_names)
+
+
 
+    def invalidate_display(self):
+        self.display_version += 1
+
+    def get_display_state(self):
+        # Value that changes whenever something that is shown in the display changes (active modes, their display version
+        # or app-level changes). If it does not change, the last frame can be re-used
+        return (self.display_version, tuple([(id(mode), mode.get_display_version(), mode.get_background_version()) for mode in self.active_modes]),
+                self.mode_profiler.window_index if self.mode_profiler.enabled else None)
+
+    def get_display_background_layer(self, mode, w, h):
+        # Returns the (transparent) surface with the static elements drawn by the mode, only re-drawing it if the mode's
+        # background version changed since it was last drawn
+        background_version = mode.get_background_version()
+        layer = self.display_background_layers.get(mode, None)
+        if layer is None or layer[0] != background_version:
+            surface = layer[1] if layer is not None else cairo.ImageSurface(cairo.FORMAT_ARGB32, w, h)
+            ctx = cairo.Context(surface)
+            ctx.set_operator(cairo.OPERATOR_CLEAR)
+            ctx.paint()
+            ctx.set_operator(cairo.OPERATOR_OVER)
+            mode.update_display_background(ctx, w, h)
+            surface.flush()
+            layer = (background_version, surface)
+            self.display_background_layers[mode] = layer
+        return layer[1]
 
     def update_push2_display(self):
         if self.use_push2_display:
-            # Prepare cairo canvas
+            now = time.time()
+            if self.mode_profiler.enabled and self.mode_profiler.check_window():
+                self.save_mode_profiling_to_file()
+            display_state = self.get_display_state()
+            if not self.display_render_needed and self.notification_text is None and display_state == self.last_display_state:
+                # Nothing changed since last frame, skip rendering. Still re-send the last frame from time to time so Push
+                # does not blank the display
+                if now - self.last_display_frame_time >= definitions.DISPLAY_KEEP_ALIVE_TIME:
+                    self.push.display.display_last_frame()
+                    self.last_display_frame_time = now
+                return
+            self.display_render_needed = False
+            self.last_display_state = display_state
+            self.last_display_frame_time = now
+
+            # Prepare cairo canvas (surface and its numpy view are created once and re-used for every frame)
             w, h = push2_python.constants.DISPLAY_LINE_PIXELS, push2_python.constants.DISPLAY_N_LINES
-            surface = cairo.ImageSurface(cairo.FORMAT_RGB16_565, w, h)
+            if self.display_surface is None:
+                self.display_surface = cairo.ImageSurface(cairo.FORMAT_RGB16_565, w, h)
+                self.display_surface_lines = numpy.ndarray(shape=(h, w), dtype=numpy.uint16, buffer=self.display_surface.get_data(),
+                                                           strides=(self.display_surface.get_stride(), 2))
+            surface = self.display_surface
+            surface.flush()
+            self.display_surface_lines.fill(0)  # Clear to black
+            surface.mark_dirty()
             ctx = cairo.Context(surface)
 
-            # Call all active modes to write to context
+            # Call all active modes to write to context (modes with a background layer get it composited first)
             for mode in self.active_modes:
+                if mode.has_display_background:
+                    ctx.set_source_surface(self.get_display_background_layer(mode, w, h), 0, 0)
+                    ctx.paint()
                 mode.update_display(ctx, w, h)
 
+            # Show profiling info on top of the modes
+            if self.mode_profiler.enabled:
+                show_profiling_info(ctx, ["{0:<42} {1:6.2f} ms/s {2:5d}x max {3:5.2f} ms".format(
+                    entry['name'], entry['ms_per_second'], entry['calls'], entry['max_ms']) for entry in self.mode_profiler.get_top()])
+
             # Show any notifications that should be shown
             if self.notification_text is not None:
                 time_since_notification_started = time.time() - self.notification_time
@@ -937,11 +1155,20 @@ class PyshaApp(object):
                     show_notification(ctx, self.notification_text, opacity=1 - time_since_notification_started/definitions.NOTIFICATION_TIME)
                 else:
                     self.notification_text = None
+                    self.display_render_needed = True  # Render once more without the notification
 
-            # Convert cairo data to numpy array and send to push
-            buf = surface.get_data()
-            frame = numpy.ndarray(shape=(h, w), dtype=numpy.uint16, buffer=buf).transpose()
-            self.push.display.display_frame(frame, input_format=push2_python.constants.FRAME_FORMAT_RGB565)
+            # Send cairo data to push (the numpy view is already in the line layout expected by the display, no copies needed)
+            surface.flush()
+            self.push.display.display_frame_lines(self.display_surface_lines, input_format=push2_python.constants.FRAME_FORMAT_RGB565)
+            if self.push.simulator_controller is not None:
+                self.push.simulator_controller.prepare_and_display_in_simulator(self.display_surface_lines.transpose().copy(), input_format=push2_python.constants.FRAME_FORMAT_RGB565)
+
+    def save_mode_profiling_to_file(self):
+        try:
+            with open(definitions.MODE_PROFILING_JSON_PATH, 'w') as f:
+                f.write(self.mode_profiler.get_json())
+        except Exception as e:
+            print('[PROFILING] Could not save profiling results:', e)
 
     def check_for_delayed_actions(self):
         # If MIDI not configured, make sure we try sending messages so it gets configured
@@ -952,51 +1179,141 @@ class PyshaApp(object):
         for mode in self.active_modes:
             mode.check_for_delayed_actions()
 
-        if self.pads_need_update:
-            # DEBUG : voir quels modes mettent à jour les pads
-            print("[DEBUG] update_pads for modes:",
-                [type(m).__name__ for m in self.active_modes])
-            self.update_push2_pads()
-            self.pads_need_update = False
+        # Redraw only the pads/buttons invalidated since the last frame (see invalidate_pads/invalidate_buttons)
+        if self.invalidated_pads:
+            self.update_invalidated_pads()
+
+        if self.invalidated_buttons:
+            self.update_invalidated_buttons()
+
+    def run_in_qt_thread(self, func, *args, **kwargs):
+        # Exécute func dans le thread Qt (à utiliser pour toute modification des fenêtres depuis le runtime ou les callbacks MIDI)
+        # En mode headless il n'y a ni thread Qt ni fenêtres à mettre à jour
+        if self.qt_bridge is not None:
+            self.qt_bridge.post(func, *args, **kwargs)
+
+    def run_in_runtime_thread(self, func, *args, **kwargs):
+        # Exécute func dans le thread runtime, au début de la prochaine itération de run_loop (réveillée immédiatement)
+        # ou dès que possible dans la boucle asyncio si elle est utilisée
+        if self.async_runtime is None or not self.async_runtime.call_soon_threadsafe(func, *args, **kwargs):
+            self.runtime_calls.put((func, args, kwargs))
+        self.frame_rate_governor.notify_activity()
+
+    def dispatch_midi_in(self, handler, *args):
+        # Appelé depuis les threads des ports MIDI : avec le cœur asyncio les messages sont traités dans la boucle,
+        # sinon directement dans le thread du port
+        if self.async_runtime is not None:
+            self.async_runtime.dispatch_midi_in(handler, *args)
+        else:
+            handler(*args)
 
+    def call_later(self, delay, func, *args):
+        # Appel retardé (ex. note offs du séquenceur), thread-safe. Timer si la boucle asyncio n'est pas (ou plus) active
+        if self.async_runtime is None or not self.async_runtime.call_later(delay, func, *args):
+            threading.Timer(delay, func, args).start()
 
-        if self.buttons_need_update:
-            self.update_push2_buttons()
-            self.buttons_need_update = False
+    def process_runtime_calls(self):
+        while True:
+            try:
+                func, args, kwargs = self.runtime_calls.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"[RUNTIME] Error running {func}: {e}")
+                traceback.print_exc()
+
+    def start_runtime_thread(self):
+        # La boucle Push/MIDI/écran tourne dans son propre thread pour ne pas bloquer la boucle d'événements Qt (et inversement)
+        if self.runtime_thread is None:
+            self.runtime_stop_event.clear()
+            self.runtime_thread = threading.Thread(target=self.run_runtime, daemon=True)
+            self.runtime_thread.start()
+
+    def stop_runtime_thread(self):
+        if self.runtime_thread is not None:
+            self.runtime_stop_event.set()
+            self.frame_rate_governor.notify_activity()  # Wake up the loop so it exits right away
+            self.runtime_thread.join(timeout=2.0)
+            self.runtime_thread = None
+
+    def run_runtime(self):
+        if self.async_runtime is not None:
+            self.async_runtime.run()
+        else:
+            self.runtime_loop()
+
+    def runtime_loop(self):
+        print('[RUNTIME] runtime thread started')
+        while not self.runtime_stop_event.is_set():
+            try:
+                self.run_loop()
+            except Exception as e:
+                # Ne pas laisser une erreur dans un mode arrêter le thread runtime
+                print('[RUNTIME] Error in run loop:', e)
+                traceback.print_exc()
+                self.frame_rate_governor.wait_for_next_frame(1.0 / self.target_frame_rate)
+        print('[RUNTIME] runtime thread stopped')
 
     def run_loop(self):
         """
-        Boucle principale de Pysha.
-        Appelée directement ou via QTimer pour Qt.
+        Une itération de la boucle principale de Pysha.
+        Appelée en boucle par le thread runtime (voir start_runtime_thread). Avec le cœur asyncio,
+        AsyncRuntime appelle directement render_frame et get_frame_wait_time.
         """
         try:
             before_draw_time = time.time()
-
-            # Vérifier les actions retardées des modes actifs
-            # Cela inclut la mise à jour des pads, boutons et autres éléments nécessaires
-            self.check_for_delayed_actions()
-
-            # Redessiner l'affichage Push2 (y compris SettingsMode si actif)
-            self.update_push2_display()
-
-            # Frame rate (optionnel)
-            now = time.time()
-            self.current_frame_rate_measurement += 1
-            if now - self.current_frame_rate_measurement_second > 1.0:
-                self.actual_frame_rate = self.current_frame_rate_measurement
-                self.current_frame_rate_measurement = 0
-                self.current_frame_rate_measurement_second = now
-                print(f'{self.actual_frame_rate} fps')
-
-            # Calcul du temps de sleep pour approximer la target_frame_rate
-            after_draw_time = time.time()
-            sleep_time = max(0, (1.0 / self.target_frame_rate) - (after_draw_time - before_draw_time))
-            time.sleep(sleep_time)
+            self.render_frame()
+            self.frame_rate_governor.wait_for_next_frame(self.get_frame_wait_time(before_draw_time))
 
         except KeyboardInterrupt:
             print('Exiting Pysha...')
             self.push.f_stop.set()
 
+    def render_frame(self):
+        # Appels postés par le thread Qt
+        self.process_runtime_calls()
+
+        # Vérifier les actions retardées des modes actifs
+        # Cela inclut la mise à jour des pads, boutons et autres éléments nécessaires
+        self.check_for_delayed_actions()
+
+        # Envoyer au Push uniquement les pads qui ont changé depuis la dernière frame
+        # (priorité "transport" : ce sont surtout les mises à jour du playhead du séquenceur)
+        self.push.pads.flush_framebuffer(priority=push2_python.constants.MIDI_OUT_PRIORITY_TRANSPORT)
+
+        # Redessiner l'affichage Push2 (y compris SettingsMode si actif)
+        self.update_push2_display()
+
+        # Frame rate (optionnel)
+        now = time.time()
+        self.current_frame_rate_measurement += 1
+        if now - self.current_frame_rate_measurement_second > 1.0:
+            self.actual_frame_rate = self.current_frame_rate_measurement
+            self.current_frame_rate_measurement = 0
+            self.current_frame_rate_measurement_second = now
+            display_metrics = self.push.display.get_metrics()
+            governor_metrics = self.frame_rate_governor.get_metrics()
+            frame_rate_info = f"{self.actual_frame_rate} fps (target {governor_metrics['frame_rate']}: {governor_metrics['reason']}, " \
+                              f"clock jitter {governor_metrics['clock_jitter'] * 1000:.1f} ms)"
+            if 'frames_sent' in display_metrics:
+                print(f"{frame_rate_info} (display: {display_metrics['frames_sent']} sent, "
+                      f"{display_metrics['frames_skipped']} skipped, {display_metrics['frames_dropped']} dropped, "
+                      f"{display_metrics['avg_write_time'] * 1000:.1f} ms avg write)")
+            else:
+                print(f"{frame_rate_info} (display: {display_metrics['frames_skipped']} skipped)")
+
+    def get_frame_wait_time(self, before_draw_time):
+        # Calcul du temps de sleep pour approximer le frame rate choisi par le governor (bas si rien ne se passe,
+        # target_frame_rate en cas d'activité ou de lecture). L'attente est interrompue dès qu'il y a de l'activité
+        synths_midi = getattr(self, 'synths_midi', None)
+        frame_rate = self.frame_rate_governor.update(
+            is_playing=synths_midi is not None and synths_midi.is_clock_running(),
+            clock_jitter=synths_midi.clock_jitter if synths_midi is not None else 0.0)
+        after_draw_time = time.time()
+        return max(0, (1.0 / frame_rate) - (after_draw_time - before_draw_time))
+
 
 
 
@@ -1008,8 +1325,13 @@ class PyshaApp(object):
         # Force configure MIDI out (in case it wasn't...)
         app.push.configure_midi_out()
 
+        # Forget stored buttons/pads/config state as it might not correspond to what Push is actually showing
+        # (Push was reconnected or the initial config is forced from the settings mode). Done before sending the palette
+        # so that the palette state stored while sending it is kept
+        app.push.reset_current_state()
+
         # Configure custom color palette
-        app.push.color_palette = {}
+        app.push.clear_color_palette()
         for count, color_name in enumerate(definitions.COLORS_NAMES):
             app.push.set_color_palette_entry(count, [color_name, color_name], rgb=definitions.get_color_rgb_float(color_name), allow_overwrite=True)
         app.push.reapply_color_palette()
@@ -1025,6 +1347,7 @@ class PyshaApp(object):
         # Update buttons and pads (just in case something was missing!)
         app.update_push2_buttons()
         app.update_push2_pads()
+        app.push.pads.flush_framebuffer(priority=push2_python.constants.MIDI_OUT_PRIORITY_BULK)
 
 
 
@@ -1035,19 +1358,20 @@ class PyshaApp(object):
 @push2_python.on_encoder_rotated()
 def on_encoder_rotated(_, encoder_name, increment):
     try:
+        app.frame_rate_governor.notify_activity()  # Go back to full frame rate right away
         # Gestion spécifique du Tempo Encoder
-        if encoder_name == "Tempo Encoder" and app and hasattr(app, 'sequencer_window'):
-            sw = app.sequencer_window
-            old_tempo = sw.tempo_bpm
+        if encoder_name == "Tempo Encoder" and app and hasattr(app, 'sequencer_controller'):
+            old_tempo = app.sequencer_state.tempo_bpm
             new_tempo = max(40, min(240, old_tempo + increment))  # clamp 40-240 BPM
-            sw.tempo_dial.setValue(new_tempo)  # met à jour le dial + label et déclenche set_tempo
+            app.sequencer_controller.set_tempo(new_tempo)
+            app.sequencer_controller.update_window("update_tempo_display")  # dial + label (thread Qt)
             return  # stop propagation, tempo déjà géré
 
         # Propagation aux autres modes
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_encoder_rotated(encoder_name, increment)
-            if action_performed:
+        for handler in app.mode_handler_chains['on_encoder_rotated']:
+            if handler(encoder_name, increment):
                 break  # Stop event propagation si un mode a pris en charge
+        app.invalidate_display()  # Display will be re-rendered in next frame as the event might have changed what is shown
     except NameError as e:
        print('Error:  {}'.format(str(e)))
        traceback.print_exc()
@@ -1056,10 +1380,13 @@ def on_encoder_rotated(_, encoder_name, increment):
 @push2_python.on_pad_pressed()
 def on_pad_pressed(_, pad_n, pad_ij, velocity):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_pad_pressed(pad_n, pad_ij, velocity)
-            if action_performed:
+        app.frame_rate_governor.notify_activity()  # Go back to full frame rate right away
+        for handler in app.mode_handler_chains['on_pad_pressed']:
+            if handler(pad_n, pad_ij, velocity):
                 break  # If mode took action, stop event propagation
+        # Pad feedback is sent right away instead of waiting for the next frame
+        app.push.pads.flush_framebuffer()
+        app.invalidate_display()  # Display will be re-rendered in next frame as the event might have changed what is shown
     except NameError as e:
        print('Error:  {}'.format(str(e)))
        traceback.print_exc()
@@ -1068,10 +1395,13 @@ def on_pad_pressed(_, pad_n, pad_ij, velocity):
 @push2_python.on_pad_released()
 def on_pad_released(_, pad_n, pad_ij, velocity):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_pad_released(pad_n, pad_ij, velocity)
-            if action_performed:
+        app.frame_rate_governor.notify_activity()  # Go back to full frame rate right away
+        for handler in app.mode_handler_chains['on_pad_released']:
+            if handler(pad_n, pad_ij, velocity):
                 break  # If mode took action, stop event propagation
+        # Pad feedback is sent right away instead of waiting for the next frame
+        app.push.pads.flush_framebuffer()
+        app.invalidate_display()  # Display will be re-rendered in next frame as the event might have changed what is shown
     except NameError as e:
        print('Error:  {}'.format(str(e)))
        traceback.print_exc()
@@ -1080,9 +1410,9 @@ def on_pad_released(_, pad_n, pad_ij, velocity):
 @push2_python.on_pad_aftertouch()
 def on_pad_aftertouch(_, pad_n, pad_ij, velocity):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_pad_aftertouch(pad_n, pad_ij, velocity)
-            if action_performed:
+        app.frame_rate_governor.notify_activity()  # Go back to full frame rate right away
+        for handler in app.mode_handler_chains['on_pad_aftertouch']:
+            if handler(pad_n, pad_ij, velocity):
                 break  # If mode took action, stop event propagation
     except NameError as e:
        print('Error:  {}'.format(str(e)))
@@ -1092,20 +1422,20 @@ def on_pad_aftertouch(_, pad_n, pad_ij, velocity):
 @push2_python.on_button_pressed()
 def on_button_pressed(_, name):
     try:
+        app.frame_rate_governor.notify_activity()  # Go back to full frame rate right away
         # --- GESTION GLOBALE PLAY ---
         if name == "Play":
-            if hasattr(app, "sequencer_window"):
-                btn = app.sequencer_window.play_button
-                btn.setChecked(not btn.isChecked())
-                app.sequencer_window.toggle_play()
+            if hasattr(app, "sequencer_controller"):
+                # Transport géré par le controller (la fenêtre séquenceur, si elle existe, est mise à jour dans le thread Qt)
+                app.sequencer_controller._toggle_play()
             return
 
         # --- GESTION NORMALE PAR LES MODES ---
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_button_pressed(name)
-            if action_performed:
+        for handler in app.mode_handler_chains['on_button_pressed']:
+            if handler(name):
                 break
 
+        app.invalidate_display()  # Display will be re-rendered in next frame as the event might have changed what is shown
     except NameError as e:
         print('Error:  {}'.format(str(e)))
         traceback.print_exc()
@@ -1115,10 +1445,11 @@ def on_button_pressed(_, name):
 @push2_python.on_button_released()
 def on_button_released(_, name):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_button_released(name)
-            if action_performed:
+        app.frame_rate_governor.notify_activity()  # Go back to full frame rate right away
+        for handler in app.mode_handler_chains['on_button_released']:
+            if handler(name):
                 break  # If mode took action, stop event propagation
+        app.invalidate_display()  # Display will be re-rendered in next frame as the event might have changed what is shown
     except NameError as e:
        print('Error:  {}'.format(str(e)))
        traceback.print_exc()
@@ -1127,10 +1458,11 @@ def on_button_released(_, name):
 @push2_python.on_touchstrip()
 def on_touchstrip(_, value):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_touchstrip(value)
-            if action_performed:
+        app.frame_rate_governor.notify_activity()  # Go back to full frame rate right away
+        for handler in app.mode_handler_chains['on_touchstrip']:
+            if handler(value):
                 break  # If mode took action, stop event propagation
+        app.invalidate_display()  # Display will be re-rendered in next frame as the event might have changed what is shown
     except NameError as e:
        print('Error:  {}'.format(str(e)))
        traceback.print_exc()
@@ -1139,15 +1471,23 @@ def on_touchstrip(_, value):
 @push2_python.on_sustain_pedal()
 def on_sustain_pedal(_, sustain_on):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_sustain_pedal(sustain_on)
-            if action_performed:
+        app.frame_rate_governor.notify_activity()  # Go back to full frame rate right away
+        for handler in app.mode_handler_chains['on_sustain_pedal']:
+            if handler(sustain_on):
                 break  # If mode took action, stop event propagation
+        app.invalidate_display()  # Display will be re-rendered in next frame as the event might have changed what is shown
     except NameError as e:
        print('Error:  {}'.format(str(e)))
        traceback.print_exc()
 
 
+@push2_python.on_display_connected()
+def on_display_connected(_):
+    if app:
+        # Last sent frame was replaced by a black frame when connecting, make sure display is rendered again
+        app.invalidate_display()
+
+
 midi_connected_received_before_app = False
 
 
@@ -1159,13 +1499,26 @@ def on_midi_connected(_):
 
 
 if __name__ == "__main__":
-    qt_app = QApplication(sys.argv)
+    # --headless : pas de PyQt ni de fenêtres (ex. Raspberry Pi sans serveur graphique), tout se contrôle depuis Push
+    headless = definitions.HEADLESS_ARG in sys.argv
+    # --asyncio : boucle runtime basée sur asyncio (voir AsyncRuntime)
+    use_asyncio = definitions.ASYNCIO_ARG in sys.argv
+
+    if headless:
+        app = PyshaApp(headless=True, use_asyncio=use_asyncio)
+        # Pas de boucle Qt : la boucle Pysha (Push/MIDI/écran) tourne dans le thread principal
+        try:
+            app.run_runtime()
+        except KeyboardInterrupt:
+            print('[RUNTIME] Stopped')
+    else:
+        from PyQt6.QtWidgets import QApplication
+        qt_app = QApplication(sys.argv)
 
-    app = PyshaApp()  # ← toujours app, jamais pysha_app
+        app = PyshaApp(use_asyncio=use_asyncio)  # ← toujours app, jamais pysha_app
 
-    # Timer pour la boucle Pysha
-    timer = QTimer()
-    timer.timeout.connect(app.run_loop)
-    timer.start(int(1000 / app.target_frame_rate))
+        # Boucle Pysha (Push/MIDI/écran) dans son propre thread, Qt garde le thread principal
+        app.start_runtime_thread()
+        qt_app.aboutToQuit.connect(app.stop_runtime_thread)
 
-    qt_app.exec()
+        qt_app.exec()
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+import traceback
+
+import push2_python
+
+
+class AsyncRuntime(object):
+    """
+    Cœur asyncio (optionnel, voir definitions.ASYNCIO_ARG) de la boucle runtime de Pysha. Une seule boucle d'événements,
+    dans le thread runtime, exécute dans un ordre bien défini :
+      - le rendu des frames (écran, pads, boutons, actions retardées des modes), cadencé par le FrameRateGovernor et
+        réveillé immédiatement par 'notify_activity'
+      - le traitement des messages MIDI entrants (Push et ports IN des instruments) : les threads des ports MIDI
+        ne font que les mettre dans une file, traitée par lots dans la boucle (voir 'dispatch_midi_in')
+      - la surveillance de la connexion MIDI avec Push (active sensing), sous forme de coroutine
+      - les appels retardés (note offs du séquenceur, voir 'call_later') et les appels postés depuis d'autres threads
+    Le thread de clock MIDI (précision sub-milliseconde) et le callback audio du sampler restent dans leurs threads.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.loop = None
+        self.wake_up_event = None
+        self.midi_in_lock = threading.Lock()
+        self.midi_in_queue = []
+        self.midi_in_processing_scheduled = False
+        self.midi_in_messages_processed = 0
+
+    def is_running(self):
+        return self.loop is not None
+
+    def run(self):
+        # Bloquant : exécute la boucle asyncio jusqu'à ce que app.runtime_stop_event soit mis
+        asyncio.run(self.main())
+
+    async def main(self):
+        print('[ASYNC RUNTIME] event loop started')
+        self.wake_up_event = asyncio.Event()
+        self.loop = asyncio.get_running_loop()
+
+        # Réveiller la boucle de rendu quand il y a de l'activité (depuis n'importe quel thread)
+        self.app.frame_rate_governor.wake_up_callback = self.wake_up
+        # Messages MIDI de Push traités dans la boucle plutôt que dans le thread du port MIDI
+        self.app.push.set_midi_in_dispatcher(self.dispatch_midi_in)
+        # La surveillance de l'active sensing de Push passe du Timer de push2_python à une coroutine
+        self.app.push.stop_active_sensing_thread()
+
+        watch_task = asyncio.ensure_future(self.push_connection_watch_loop())
+        try:
+            await self.frame_loop()
+        finally:
+            watch_task.cancel()
+            self.app.push.set_midi_in_dispatcher(None)
+            self.app.frame_rate_governor.wake_up_callback = None
+            self.loop = None
+            # Messages reçus pendant l'arrêt
+            self.process_midi_in()
+            print('[ASYNC RUNTIME] event loop stopped')
+
+    # -------------------------------------------------------------
+    # Appels depuis d'autres threads
+    # -------------------------------------------------------------
+    # La boucle peut s'arrêter (self.loop remis à None, boucle fermée) à tout moment pendant ces appels : elle est lue une
+    # seule fois, et les méthodes renvoient False si l'appel n'a pas pu être posté (l'appelant doit alors l'exécuter autrement)
+    def wake_up(self):
+        loop = self.loop
+        if loop is not None and not self.wake_up_event.is_set():
+            self.post_to_loop(loop, self.wake_up_event.set)
+
+    def post_to_loop(self, loop, callback, *args):
+        if loop is None or loop.is_closed():
+            return False
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # Boucle fermée entre le test et l'appel
+            return False
+        return True
+
+    def call_soon_threadsafe(self, func, *args, **kwargs):
+        loop = self.loop
+        return self.post_to_loop(loop, self.run_call, func, args, kwargs)
+
+    def call_later(self, delay, func, *args, **kwargs):
+        # Thread-safe : peut être appelé depuis le thread de clock (ex. note offs programmés par SequencerTarget)
+        loop = self.loop
+        if loop is None:
+            return False
+        return self.post_to_loop(loop, loop.call_later, delay, self.run_call, func, args, kwargs)
+
+    def run_call(self, func, args, kwargs):
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            print(f"[ASYNC RUNTIME] Error running {func}: {e}")
+            traceback.print_exc()
+
+    # -------------------------------------------------------------
+    # MIDI IN
+    # -------------------------------------------------------------
+    def dispatch_midi_in(self, handler, *args):
+        """
+        Appelé depuis les threads des ports MIDI : le message est mis dans une file et 'handler(*args)' sera appelé dans
+        la boucle. La boucle n'est réveillée qu'une fois par lot de messages (ex. rafales d'aftertouch).
+        """
+        loop = self.loop
+        if loop is None:
+            handler(*args)
+            return
+        with self.midi_in_lock:
+            self.midi_in_queue.append((handler, args))
+            if self.midi_in_processing_scheduled:
+                return
+            self.midi_in_processing_scheduled = True
+        loop.call_soon_threadsafe(self.process_midi_in)
+
+    def process_midi_in(self):
+        with self.midi_in_lock:
+            messages = self.midi_in_queue
+            self.midi_in_queue = []
+            self.midi_in_processing_scheduled = False
+        for handler, args in messages:
+            try:
+                handler(*args)
+            except Exception as e:
+                print(f"[ASYNC RUNTIME] Error handling MIDI in message {args}: {e}")
+                traceback.print_exc()
+        self.midi_in_messages_processed += len(messages)
+
+    # -------------------------------------------------------------
+    # Coroutines
+    # -------------------------------------------------------------
+    async def frame_loop(self):
+        app = self.app
+        while not app.runtime_stop_event.is_set():
+            before_draw_time = time.time()
+            try:
+                app.render_frame()
+            except Exception as e:
+                # Ne pas laisser une erreur dans un mode arrêter la boucle
+                print('[ASYNC RUNTIME] Error rendering frame:', e)
+                traceback.print_exc()
+            wait_time = app.get_frame_wait_time(before_draw_time)
+            if wait_time > 0:
+                try:
+                    await asyncio.wait_for(self.wake_up_event.wait(), wait_time)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Laisser passer les messages MIDI et appels en attente avant la frame suivante
+                await asyncio.sleep(0)
+            self.wake_up_event.clear()
+            app.frame_rate_governor.wake_up_event.clear()
+
+    async def push_connection_watch_loop(self):
+        while True:
+            try:
+                self.app.push.check_active_sensing()
+            except Exception as e:
+                print('[ASYNC RUNTIME] Error checking Push active sensing:', e)
+            await asyncio.sleep(push2_python.constants.PUSH2_MIDI_ACTIVE_SENSING_CHECK_INTERVAL)
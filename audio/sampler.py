@@ -8,6 +8,10 @@ import sounddevice as sd
 import soundfile as sf
 
 
+# Nombre minimum de blocs de la pyramide de pics par partie dans Sample.get_peaks
+PEAK_BLOCKS_PER_BIN = 8
+
+
 # ============================================================
 # SAMPLE OBJECT
 # ============================================================
@@ -36,6 +40,45 @@ class Sample:
         self.trim_start = 0.0
         self.trim_end = 1.0
 
+        # Pyramide min/max pour l'affichage de la forme d'onde
+        self.build_peak_pyramid()
+
+    def build_peak_pyramid(self):
+        """
+        Construit une pyramide multi-résolution de pics (min/max) du premier canal.
+        Le niveau k contient le min et le max de chaque bloc de 2**k frames ;
+        le niveau 0 est le signal lui-même (sans copie).
+        """
+        mins = self.data[:, 0]
+        maxs = mins
+        self.peak_mins = [mins]
+        self.peak_maxs = [maxs]
+        while mins.shape[0] > 1:
+            if mins.shape[0] % 2:
+                # Nombre impair : on répète le dernier élément pour pouvoir grouper par paires
+                mins = np.append(mins, mins[-1])
+                maxs = np.append(maxs, maxs[-1])
+            mins = mins.reshape(-1, 2).min(axis=1)
+            maxs = maxs.reshape(-1, 2).max(axis=1)
+            self.peak_mins.append(mins)
+            self.peak_maxs.append(maxs)
+
+    def get_peaks(self, n_bins):
+        """
+        Renvoie (mins, maxs) : min et max du premier canal pour n_bins parties égales du sample.
+        Utilise le niveau le plus grossier de la pyramide qui a au moins PEAK_BLOCKS_PER_BIN blocs par
+        partie (les bords des parties sont arrondis au bloc près).
+        """
+        n_bins = max(1, int(n_bins))
+        frames_per_bin = self.num_frames / float(n_bins)
+        level = 0
+        while level + 1 < len(self.peak_mins) and (1 << (level + 1)) * PEAK_BLOCKS_PER_BIN <= frames_per_bin:
+            level += 1
+        bin_starts = (np.arange(n_bins, dtype=np.int64) * self.num_frames) // n_bins
+        block_starts = bin_starts >> level
+        return (np.minimum.reduceat(self.peak_mins[level], block_starts),
+                np.maximum.reduceat(self.peak_maxs[level], block_starts))
+
 
 # ============================================================
 # VOICE OBJECT
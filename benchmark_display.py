@@ -0,0 +1,111 @@
+# benchmark_display.py
+#
+# Mesure le temps et les allocations mémoire par frame du pipeline d'affichage Push2 :
+#  - "legacy" : nouvelle surface cairo + transpose + copy + zeros + transpose/flatten + conversion + byteswap x2 + XOR + tobytes
+#  - "zero-copy" : surface persistante + buffers préalloués (Push2Display.display_frame_lines)
+# Aucun Push n'est nécessaire : l'envoi USB est désactivé.
+#
+# Usage : python benchmark_display.py [n_frames]
+
+import sys
+import time
+import tracemalloc
+
+import numpy
+import push2_python.display
+from push2_python.constants import DISPLAY_LINE_PIXELS, DISPLAY_N_LINES, DISPLAY_LINE_FILLER_BYTES, FRAME_FORMAT_RGB565
+
+try:
+    import cairo
+except ImportError:
+    cairo = None
+
+# Sans cairo, on utilise une frame aléatoire fixe comme contenu de la surface
+RANDOM_LINES = numpy.random.randint(0, 2**16, size=(DISPLAY_N_LINES, DISPLAY_LINE_PIXELS)).astype(numpy.uint16)
+
+
+class FakePush(object):
+    simulator_controller = None
+
+
+class BenchmarkDisplay(push2_python.display.Push2Display):
+
+    def send_to_display(self, prepared_frame):
+        pass  # Pas d'USB pendant le benchmark
+
+
+def legacy_prepare_frame(frame):
+    # Copie de l'ancien Push2Display.prepare_frame (format rgb565)
+    width = DISPLAY_LINE_PIXELS + DISPLAY_LINE_FILLER_BYTES // 2
+    prepared_frame = numpy.zeros(shape=(width, DISPLAY_N_LINES), dtype=numpy.uint16)
+    prepared_frame[0:frame.shape[0], 0:frame.shape[1]] = frame
+    prepared_frame = prepared_frame.transpose().flatten()
+    prepared_frame = push2_python.display.rgb565_to_bgr565(prepared_frame)
+    prepared_frame = prepared_frame.byteswap()
+    prepared_frame = numpy.bitwise_xor(prepared_frame, push2_python.display.NP_DISPLAY_FRAME_XOR_PATTERN)
+    return prepared_frame.byteswap().tobytes()
+
+
+def draw(ctx, w, h, i):
+    ctx.set_source_rgb(0.2, 0.4, 0.8)
+    ctx.rectangle(i % w, 20, 100, 60)
+    ctx.fill()
+
+
+def legacy_frame(i):
+    w, h = DISPLAY_LINE_PIXELS, DISPLAY_N_LINES
+    if cairo is not None:
+        surface = cairo.ImageSurface(cairo.FORMAT_RGB16_565, w, h)
+        draw(cairo.Context(surface), w, h, i)
+        buf = surface.get_data()
+    else:
+        buf = RANDOM_LINES.data
+    frame = numpy.ndarray(shape=(h, w), dtype=numpy.uint16, buffer=buf).transpose()
+    return legacy_prepare_frame(frame.copy())
+
+
+class ZeroCopyRenderer(object):
+
+    def __init__(self):
+        w, h = DISPLAY_LINE_PIXELS, DISPLAY_N_LINES
+        self.display = BenchmarkDisplay(FakePush())
+        if cairo is not None:
+            self.surface = cairo.ImageSurface(cairo.FORMAT_RGB16_565, w, h)
+            self.lines = numpy.ndarray(shape=(h, w), dtype=numpy.uint16, buffer=self.surface.get_data(),
+                                       strides=(self.surface.get_stride(), 2))
+        else:
+            self.surface = None
+            self.lines = RANDOM_LINES
+
+    def frame(self, i):
+        w, h = DISPLAY_LINE_PIXELS, DISPLAY_N_LINES
+        if self.surface is not None:
+            self.surface.flush()
+            self.lines.fill(0)
+            self.surface.mark_dirty()
+            draw(cairo.Context(self.surface), w, h, i)
+            self.surface.flush()
+        self.display.display_frame_lines(self.lines, input_format=FRAME_FORMAT_RGB565)
+
+
+def run(name, func, n_frames):
+    func(0)  # warm up
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(n_frames):
+        func(i)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    n_allocated = sum([stat.count for stat in snapshot.statistics('filename')])
+    print('{0:10s} {1:8.3f} ms/frame   peak traced memory {2:8.1f} KB   live blocks after run {3}'.format(
+        name, 1000 * elapsed / n_frames, peak / 1024, n_allocated))
+
+
+if __name__ == '__main__':
+    n_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print('Display pipeline benchmark ({0} frames, cairo {1})'.format(n_frames, 'available' if cairo is not None else 'not available, using random frames'))
+    run('legacy', legacy_frame, n_frames)
+    renderer = ZeroCopyRenderer()
+    run('zero-copy', renderer.frame, n_frames)
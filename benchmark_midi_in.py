@@ -0,0 +1,173 @@
+# benchmark_midi_in.py
+#
+# Mesure le nombre de messages MIDI Push traités par seconde par Push2.on_midi_message (pads, boutons, encodeurs),
+# jusqu'aux handlers enregistrés avec les décorateurs push2_python :
+#  - "legacy" : copie du dispatch d'origine : on_midi_message des pads, boutons et encodeurs qui construisent le nom
+#    de l'action individuelle avec format() à chaque événement, et ancien Push2.trigger_action (parcours de tout
+#    action_handler_registry et comparaison des noms)
+#  - "indexed" : dispatch actuel (accès direct au dict, noms d'actions individuelles précalculés)
+# Aucun Push n'est nécessaire : les messages sont construits avec mido et passés directement à on_midi_message.
+#
+# Usage : python benchmark_midi_in.py [n_messages]
+
+import sys
+import time
+import types
+
+import mido
+import push2_python
+from push2_python.constants import MIDO_NOTEON, MIDO_NOTEOFF, MIDO_POLYAT, MIDO_AFTERTOUCH, MIDO_CONTROLCHANGE, \
+    ACTION_PAD_PRESSED, ACTION_PAD_RELEASED, ACTION_PAD_AFTERTOUCH, ACTION_BUTTON_PRESSED, ACTION_BUTTON_RELEASED, \
+    ACTION_ENCODER_ROTATED, ACTION_ENCODER_TOUCHED, ACTION_ENCODER_RELEASED
+from push2_python.pads import get_individual_pad_action_name
+from push2_python.buttons import get_individual_button_action_name
+from push2_python.encoders import get_individual_encoder_action_name
+
+n_handler_calls = 0
+
+
+def count_call(*args):
+    global n_handler_calls
+    n_handler_calls += 1
+
+
+def register_handlers(push):
+    # Mêmes handlers génériques que app.py, plus des handlers individuels pour avoir un registre de taille réaliste
+    for decorator in [push2_python.on_pad_pressed, push2_python.on_pad_released, push2_python.on_pad_aftertouch,
+                      push2_python.on_button_pressed, push2_python.on_button_released, push2_python.on_encoder_rotated,
+                      push2_python.on_encoder_touched, push2_python.on_encoder_released]:
+        decorator()(count_call)
+    for button_name in push.buttons.available_names:
+        push2_python.on_button_pressed(button_name)(count_call)
+    for encoder_name in push.encoders.available_names:
+        push2_python.on_encoder_rotated(encoder_name)(count_call)
+    for pad_n in range(36, 100):
+        push2_python.on_pad_pressed(pad_n=pad_n)(count_call)
+
+
+def legacy_trigger_action(self, *args, **kwargs):
+    # Copie de l'ancien Push2.trigger_action
+    action_name = args[0]
+    new_args = [self]
+    if len(args) > 1:
+        new_args += list(args[1:])
+    for action, func in push2_python.action_handler_registry.items():
+        if action == action_name:
+            func[0](*new_args, **kwargs)
+
+
+def legacy_pads_on_midi_message(self, message):
+    # Copie de l'ancien Push2Pads.on_midi_message
+    if message.type in [MIDO_NOTEON, MIDO_NOTEOFF, MIDO_POLYAT, MIDO_AFTERTOUCH]:
+        if message.type != MIDO_AFTERTOUCH:
+            if 36 <= message.note <= 99:  # Min and max pad MIDI values according to Push Spec
+                pad_n = message.note
+                pad_ij = self.pad_n_to_pad_ij(pad_n)
+                if message.type == MIDO_POLYAT:
+                    velocity = message.value
+                else:
+                    velocity = message.velocity
+                if message.type == MIDO_NOTEON:
+                    self.push.trigger_action(ACTION_PAD_PRESSED, pad_n, pad_ij, velocity)
+                    self.push.trigger_action(get_individual_pad_action_name(ACTION_PAD_PRESSED, pad_n=pad_n), velocity)
+                    return True
+                elif message.type == MIDO_NOTEOFF:
+                    self.push.trigger_action(ACTION_PAD_RELEASED, pad_n, pad_ij, velocity)
+                    self.push.trigger_action(get_individual_pad_action_name(ACTION_PAD_RELEASED, pad_n=pad_n), velocity)
+                    return True
+                elif message.type == MIDO_POLYAT:
+                    self.push.trigger_action(ACTION_PAD_AFTERTOUCH, pad_n, pad_ij, velocity)
+                    self.push.trigger_action(get_individual_pad_action_name(ACTION_PAD_AFTERTOUCH, pad_n=pad_n), velocity)
+                    return True
+        elif message.type == MIDO_AFTERTOUCH:
+            self.push.trigger_action(ACTION_PAD_AFTERTOUCH, None, None, message.value)
+            return True
+
+
+def legacy_buttons_on_midi_message(self, message):
+    # Copie de l'ancien Push2Buttons.on_midi_message
+    if message.type == MIDO_CONTROLCHANGE:
+        if message.control in self.button_map:
+            button = self.button_map[message.control]
+            action = ACTION_BUTTON_PRESSED if message.value == 127 else ACTION_BUTTON_RELEASED
+            self.push.trigger_action(action, button['Name'])
+            self.push.trigger_action(get_individual_button_action_name(action, button['Name']))
+            return True
+
+
+def legacy_encoders_on_midi_message(self, message):
+    # Copie de l'ancien Push2Encoders.on_midi_message
+    if message.type == MIDO_CONTROLCHANGE:
+        if message.control in self.encoder_map:
+            encoder = self.encoder_map[message.control]
+            action = ACTION_ENCODER_ROTATED
+            value = message.value
+            if message.value > 63:
+                value = -1 * (128 - message.value)
+            self.push.trigger_action(action, encoder['Name'], value)
+            self.push.trigger_action(get_individual_encoder_action_name(action, encoder['Name']), value)
+            return True
+    elif message.type in [MIDO_NOTEON, MIDO_NOTEOFF]:
+        if message.note in self.encoder_touch_map:
+            encoder = self.encoder_touch_map[message.note]
+            action = ACTION_ENCODER_TOUCHED if message.velocity == 127 else ACTION_ENCODER_RELEASED
+            self.push.trigger_action(action, encoder['Name'])
+            self.push.trigger_action(get_individual_encoder_action_name(action, encoder['Name']))
+            return True
+
+
+def use_legacy_dispatch(push):
+    # Remplace le dispatch des sections et trigger_action par leurs versions d'origine. Push2.on_midi_message
+    # appelle les méthodes liées des sections à chaque message, les attributs d'instance sont donc bien utilisés
+    push.trigger_action = types.MethodType(legacy_trigger_action, push)
+    push.pads.on_midi_message = types.MethodType(legacy_pads_on_midi_message, push.pads)
+    push.buttons.on_midi_message = types.MethodType(legacy_buttons_on_midi_message, push.buttons)
+    push.encoders.on_midi_message = types.MethodType(legacy_encoders_on_midi_message, push.encoders)
+
+
+def make_messages(push, n_messages):
+    # Mélange typique pendant le jeu : notes et aftertouch sur les pads, rotation d'encodeurs, appuis de boutons
+    button_numbers = [push.buttons.button_name_to_button_n(name) for name in push.buttons.available_names]
+    encoder_numbers = [push.encoders.encoder_name_to_encoder_n(name) for name in push.encoders.available_names]
+    messages = []
+    for i in range(n_messages):
+        kind = i % 8
+        pad_n = 36 + i % 64
+        if kind == 0:
+            messages.append(mido.Message(MIDO_NOTEON, note=pad_n, velocity=100))
+        elif kind == 1:
+            messages.append(mido.Message(MIDO_NOTEOFF, note=pad_n, velocity=0))
+        elif kind in [2, 3, 4]:
+            messages.append(mido.Message(MIDO_POLYAT, note=pad_n, value=i % 128))
+        elif kind in [5, 6]:
+            messages.append(mido.Message(MIDO_CONTROLCHANGE, control=encoder_numbers[i % len(encoder_numbers)], value=1))
+        else:
+            messages.append(mido.Message(MIDO_CONTROLCHANGE, control=button_numbers[i % len(button_numbers)], value=127 * (i % 2)))
+    return messages
+
+
+def run(name, push, messages):
+    global n_handler_calls
+    n_handler_calls = 0
+    start = time.perf_counter()
+    for message in messages:
+        push.on_midi_message(message)
+    elapsed = time.perf_counter() - start
+    print('{0:10s} {1:10.0f} events/s   {2:6.2f} us/event   {3} handler calls'.format(
+        name, len(messages) / elapsed, 1000000 * elapsed / len(messages), n_handler_calls))
+
+
+if __name__ == '__main__':
+    n_messages = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    push = push2_python.Push2()
+    push.stop_active_sensing_thread()
+    # Faire comme si Push était connecté depuis plus d'une seconde (sinon on_midi_message ignore les messages)
+    push.last_active_sensing_received = time.time()
+    push.last_action_midi_connection_action_triggered = 0
+    register_handlers(push)
+    messages = make_messages(push, n_messages)
+    print('Push MIDI in dispatch benchmark ({0} messages, {1} registered actions)'.format(
+        n_messages, len(push2_python.action_handler_registry)))
+    run('indexed', push, messages)
+    use_legacy_dispatch(push)
+    run('legacy', push, messages)
@@ -1,9 +1,11 @@
 # controller/sequencer_controller.py
 from session_mode import Clip
+from controller.sequencer_pattern import PAD_RATE_TICKS, PAD_DIRECTIONS, STEP_PARAMETER_RANGES
+from controller.sequencer_scheduler import SequencerScheduler
 
 import definitions
 import mido
-from PyQt6.QtCore import QMetaObject, Qt, Q_ARG
+import push2_python.constants
 
 
 class SequencerController:
@@ -11,14 +13,15 @@ class SequencerController:
     Contrôle le séquenceur interne et envoie le feedback sur Push 2.
     Pads et steps parfaitement alignés avec l’emplacement physique.
     Play et résolution gérés via push2_python par le nom du bouton.
+    L'état (steps, pad sélectionné, transport...) est dans un SequencerState indépendant de Qt ;
+    la SequencerWindow est optionnelle (None en mode headless) et n'est mise à jour que dans le thread Qt.
     """
 
-    def __init__(self, app, sequencer_model, sequencer_window):
+    def __init__(self, app, sequencer_state, sequencer_window=None):
         self.app = app
-        # sequencer_model est typiquement une matrice 16 x 32 de bool (référence sur SequencerWindow.steps)
-        self.model = sequencer_model
-        self.window = sequencer_window           # ancien nom utilisé partout
-        self.sequencer_window = sequencer_window # nouveau nom utilisé dans tick_from_clock_thread
+        self.state = sequencer_state
+        self.window = sequencer_window           # vue Qt optionnelle
+        self.sequencer_window = sequencer_window
 
 
         self._ignore_next_play = False
@@ -35,10 +38,28 @@ class SequencerController:
         self.transport_buttons = {"Play": "play"}
         self.resolution_buttons = {"1/4": 1, "1/8": 2, "1/16": 4, "1/32": 8}
 
+        # Pad de séquenceur tenu (index), pour éditer ses réglages (longueur, diviseur, sens) avec les boutons et encodeurs
+        self.held_pad = None
+
+        # Step tenu (index), pour éditer ses paramètres avec les encodeurs. Un step déjà actif n'est désactivé qu'au
+        # relâchement, et seulement si ses paramètres n'ont pas été modifiés pendant qu'il était tenu
+        self.held_step = None
+        self.held_step_edited = False
+        self.held_step_was_on = False
+        self.step_parameter_encoders = {
+            push2_python.constants.ENCODER_TRACK1_ENCODER: 'velocity',
+            push2_python.constants.ENCODER_TRACK2_ENCODER: 'probability',
+            push2_python.constants.ENCODER_TRACK3_ENCODER: 'ratchets',
+            push2_python.constants.ENCODER_TRACK4_ENCODER: 'gate',
+            push2_python.constants.ENCODER_TRACK5_ENCODER: 'micro_timing',
+        }
+
+        # Tête de lecture des pads polymétriques et planification des notes au tick près (thread de clock)
+        self.scheduler = SequencerScheduler(self.state.pattern)
 
         # État de timing pour la clock maître MIDI
-        # steps_per_beat vient de la fenêtre (1, 2, 4, 8)
-        self.steps_per_beat = getattr(self.window, "steps_per_beat", 4)
+        # steps_per_beat vient de l'état du séquenceur (1, 2, 4, 8)
+        self.steps_per_beat = self.state.steps_per_beat
         # 24 pulses MIDI par noire -> nombre de pulses nécessaires par step
         # (1, 2, 4, 8 divisent 24 donc c'est cohérent)
         self.ticks_per_step = max(1, int(24 / self.steps_per_beat))
@@ -72,7 +93,7 @@ class SequencerController:
         """
         try:
             self.current_step = 0
-            instrument = getattr(self.app.sequencer_window, "sequencer_output_instrument", None)
+            instrument = self.state.sequencer_output_instrument
             self.play_step(instrument, 0)
         except Exception as e:
             print("[SEQ] Error in on_first_clock_tick:", e)
@@ -173,16 +194,32 @@ class SequencerController:
     # -------------------------------------------------------------------------
     def handle_rhythmic_input(self, pitch, is_note_on=True):
         if not is_note_on:
+            if pitch in self.pad_map and self.held_pad == list(self.pad_map.keys()).index(pitch):
+                self.held_pad = None
+            elif pitch in self.step_pitch_to_index and self.held_step == self.step_pitch_to_index[pitch]:
+                if self.held_step_was_on and not self.held_step_edited:
+                    self._toggle_step(self.held_step)
+                self.held_step = None
             return
 
         # 1. Sélection pad
         if pitch in self.pad_map:
-            return self._select_pad(self.pad_map[pitch])
+            self._select_pad(self.pad_map[pitch])
+            self.held_pad = self.state.selected_pad
+            return
 
-        # 2. Toggle step
+        # 2. Toggle step (activé à l'appui, désactivé au relâchement, voir held_step)
         if pitch in self.step_pitch_to_index:
             step_index = self.step_pitch_to_index[pitch]
-            return self._toggle_step(step_index)
+            pattern = self.state.pattern
+            if not pattern.is_valid_step(self.state.selected_pad, step_index):
+                return
+            self.held_step = step_index
+            self.held_step_edited = False
+            self.held_step_was_on = pattern.is_on(self.state.selected_pad, step_index)
+            if not self.held_step_was_on:
+                self._toggle_step(step_index)
+            return
 
         # 3. Actions globales
         return self._global_action(pitch)
@@ -209,6 +246,62 @@ class SequencerController:
             return
 
 
+    # -------------------------------------------------------------------------
+    # RÉGLAGES DU PAD TENU (POLYMÉTRIE)
+    # -------------------------------------------------------------------------
+    def handle_pad_rate_button(self, button_name):
+        """
+        Pad de séquenceur tenu + bouton de résolution (1/4 ... 1/32t) : diviseur d'horloge propre au pad.
+        Appuyer sur le diviseur déjà réglé remet le pad sur la résolution globale. Renvoie True si le bouton est utilisé.
+        """
+        if self.held_pad is None or button_name not in PAD_RATE_TICKS:
+            return False
+        pattern = self.state.pattern
+        rate_name = None if pattern.pad_rates[self.held_pad] == button_name else button_name
+        pattern.set_pad_rate(self.held_pad, rate_name)
+        self.app.add_display_notification("Pad {0} rate: {1}".format(self.held_pad + 1, rate_name or 'global'))
+        self.update_push_feedback()
+        return True
+
+    def handle_pad_settings_encoder(self, encoder_name, increment):
+        """
+        Pad de séquenceur tenu + encodeurs : Track1 = longueur (steps), Track2 = sens de lecture.
+        Renvoie True si l'encodeur est utilisé.
+        """
+        if self.held_pad is None:
+            return False
+        pattern = self.state.pattern
+        pad_index = self.held_pad
+        if encoder_name == push2_python.constants.ENCODER_TRACK1_ENCODER:
+            pattern.set_pad_length(pad_index, pattern.pad_lengths[pad_index] + increment)
+            self.app.add_display_notification("Pad {0} length: {1}".format(pad_index + 1, pattern.pad_lengths[pad_index]))
+        elif encoder_name == push2_python.constants.ENCODER_TRACK2_ENCODER:
+            direction_index = PAD_DIRECTIONS.index(pattern.pad_directions[pad_index]) + (1 if increment > 0 else -1)
+            pattern.set_pad_direction(pad_index, PAD_DIRECTIONS[direction_index % len(PAD_DIRECTIONS)])
+            self.app.add_display_notification("Pad {0} direction: {1}".format(pad_index + 1, pattern.pad_directions[pad_index]))
+        else:
+            return False
+        self.update_push_feedback()
+        return True
+
+    def handle_step_parameter_encoder(self, encoder_name, increment):
+        """
+        Step tenu + encodeurs : Track1 = vélocité, Track2 = probabilité, Track3 = ratchets, Track4 = gate (ticks),
+        Track5 = micro-timing (ticks). Renvoie True si l'encodeur est utilisé.
+        """
+        if self.held_step is None or encoder_name not in self.step_parameter_encoders:
+            return False
+        pattern = self.state.pattern
+        pad_index = self.state.selected_pad
+        name = self.step_parameter_encoders[encoder_name]
+        value = pattern.set_step_parameter(pad_index, self.held_step, name,
+                                           pattern.get_step_parameter(pad_index, self.held_step, name) + increment)
+        self.held_step_edited = True
+        min_value, max_value = STEP_PARAMETER_RANGES[name]
+        self.app.add_display_notification("Step {0} {1}: {2} ({3} to {4})".format(
+            self.held_step + 1, name.replace('_', ' '), value, min_value, max_value))
+        return True
+
     # -------------------------------------------------------------------------
     # SÉLECTION PAD
     # -------------------------------------------------------------------------
@@ -216,13 +309,11 @@ class SequencerController:
         # Trouver le pitch correspondant au pad_name
         pitch = [p for p, name in self.pad_map.items() if name == pad_name][0]
         # Index du pad dans l'ordre des clés pad_map
-        self.window.selected_pad = list(self.pad_map.keys()).index(pitch)
+        self.state.selected_pad = list(self.pad_map.keys()).index(pitch)
 
         # Mise à jour UI
-        if hasattr(self.window, "update_pad_display"):
-            self.window.update_pad_display()
-        if hasattr(self.window, "update_steps_display"):
-            self.window.update_steps_display()
+        self.update_window("update_pad_display")
+        self.update_window("update_steps_display")
 
         self.update_push_feedback()
 
@@ -230,49 +321,58 @@ class SequencerController:
     # TOGGLE D’UN STEP
     # -------------------------------------------------------------------------
     def _toggle_step(self, step_index):
-        pad = self.window.selected_pad
-        if pad < 0 or pad >= len(self.model):
-            return
-
-        # Toggle dans le modèle (matrice de booléens)
-        pad_steps = self.model[pad]
-        if 0 <= step_index < len(pad_steps):
-            pad_steps[step_index] = not pad_steps[step_index]
+        pad = self.state.selected_pad
 
-            # Si un SequencerTarget est branché sur la fenêtre, informer
-            target = getattr(self.window, "sequencer_target", None)
-            if target is not None and hasattr(target, "set_step_state"):
-                try:
-                    target.set_step_state(pad, step_index, pad_steps[step_index])
-                except Exception:
-                    pass
+        # Toggle dans le pattern (modèle unique, lu aussi par le SequencerTarget via advance_step)
+        pattern = self.state.pattern
+        if pattern.is_valid_step(pad, step_index):
+            pattern.toggle_step(pad, step_index)
 
             # Mise à jour UI
-            if hasattr(self.window, "update_steps_display"):
-                self.window.update_steps_display()
+            self.update_window("update_steps_display")
 
             self.update_push_feedback()
 
     # -------------------------------------------------------------------------
-    # PLAY / STOP (thread-safe)
+    # MISE À JOUR DE LA FENÊTRE (optionnelle, thread Qt)
+    # -------------------------------------------------------------------------
+    def update_window(self, method_name, *args):
+        # Les méthodes du controller sont appelées depuis le thread runtime ou le thread de clock :
+        # la fenêtre (si elle existe) est mise à jour dans le thread Qt
+        if self.window is None:
+            return
+        method = getattr(self.window, method_name, None)
+        if method is not None:
+            self.app.run_in_qt_thread(method, *args)
+
+    # -------------------------------------------------------------------------
+    # PLAY / STOP
     # -------------------------------------------------------------------------
     def _toggle_play(self):
-        print("[SEQ CTRL] _toggle_play -> invoking toggle_play_slot in UI thread")
+        self.set_playing(not self.state.is_playing)
+
+    def set_playing(self, playing):
+        """
+        Démarre ou arrête le transport (clock maître Synths_Midi), indépendamment de la fenêtre.
+        """
+        print(f"[SEQ CTRL] set_playing -> {playing}")
 
         # --- RESET LOGIQUE DU SEQUENCER ---
         # (toujours remettre le sequencer au step 0 avant un nouveau démarrage)
-        try:
-            self.window.current_step = 0
-        except Exception:
-            pass
+        if playing and not self.state.is_playing:
+            self.state.current_step = 0
 
-        # --- appel thread-safe de l'UI ---
-        QMetaObject.invokeMethod(
-            self.window,
-            "toggle_play_slot",
-            Qt.ConnectionType.QueuedConnection
-        )
+        self.state.is_playing = playing
+        self.app.frame_rate_governor.notify_activity()
+        if playing:
+            self.app.synths_midi.start_clock()
+        else:
+            # Note offs déjà planifiés par le scheduler (gate, ratchets, micro-timing) : envoyés par le thread de clock après
+            # son dernier tick (un tick peut être en cours ici)
+            self.scheduler.request_stop()
+            self.app.synths_midi.stop_clock()
 
+        self.update_window("update_transport_display")
         self.update_push2_play_led()
         self.update_push_feedback()
 
@@ -280,14 +380,12 @@ class SequencerController:
         """Remet le séquenceur dans un état propre après un STOP clock."""
         print("[SEQ] reset_after_stop()")
 
-        # 1) Réinitialiser l'étape courante
-        self.window.current_step = 0
+        # 1) Réinitialiser l'étape courante (les note offs déjà planifiés sont envoyés par le thread de clock)
+        self.state.current_step = 0
+        self.scheduler.request_stop()
 
         # 2) Reset visuel
-        try:
-            self.window.reset_step_highlight()
-        except Exception:
-            pass
+        self.update_window("reset_step_highlight")
 
         # 3) Mettre à jour Push2
         try:
@@ -301,9 +399,7 @@ class SequencerController:
         # ---------------------------------------------------------
         try:
             # Où envoyer ? → L’instrument choisi pour le séquenceur
-            instr = getattr(self.app.sequencer_window,
-                            "sequencer_output_instrument",
-                            None)
+            instr = self.state.sequencer_output_instrument
 
             if instr:
                 for n in range(0, 128):
@@ -319,13 +415,9 @@ class SequencerController:
     # CHANGEMENT DE RÉSOLUTION (thread-safe depuis Push2)
     # -------------------------------------------------------------------------
     def _set_resolution(self, steps_per_beat):
-        # 1) Propager vers la fenêtre (UI + état steps_per_beat)
-        QMetaObject.invokeMethod(
-            self.window,
-            "set_resolution_slot",
-            Qt.QueuedConnection,
-            Q_ARG(int, int(steps_per_beat))
-        )
+        # 1) État du séquenceur + propagation vers la fenêtre (UI)
+        self.state.steps_per_beat = int(steps_per_beat)
+        self.update_window("set_resolution", int(steps_per_beat))
 
         # 2) Mettre à jour la résolution interne pour la clock maître
         self.steps_per_beat = steps_per_beat
@@ -345,6 +437,7 @@ class SequencerController:
         Optionnel : permet de synchroniser un changement de tempo UI
         avec la clock interne (Synths_Midi).
         """
+        self.state.tempo_bpm = bpm
         try:
             # Mettre à jour le BPM dans Synths_Midi si présent
             if hasattr(self.app, "synths_midi") and self.app.synths_midi is not None:
@@ -358,7 +451,7 @@ class SequencerController:
     def update_push2_play_led(self):
         if not getattr(self.app, "push", None):
             return
-        play_color = definitions.GREEN if self.window.play_button.isChecked() else definitions.WHITE
+        play_color = definitions.GREEN if self.state.is_playing else definitions.WHITE
         try:
             self.app.push.buttons.set_button_color("Play", play_color)
         except Exception:
@@ -374,7 +467,7 @@ class SequencerController:
                 "1/16": 4,
                 "1/32": 8
             }.items():
-                color = definitions.GREEN if steps == self.window.steps_per_beat else definitions.YELLOW
+                color = definitions.GREEN if steps == self.state.steps_per_beat else definitions.YELLOW
                 self.app.push.buttons.set_button_color(btn_name, color)
         except Exception:
             pass
@@ -388,37 +481,53 @@ class SequencerController:
             # Si Rhythmic n'est pas actif, laisser les autres modes gérer leurs pads
             return
 
-        pad_matrix = [[definitions.BLACK for _ in range(8)] for _ in range(8)]
+        # Couleurs résolues une seule fois en index de palette (évite les recherches par nom pour 64 pads)
+        get_rgb_color = self.app.push.get_rgb_color
+        black = get_rgb_color(definitions.BLACK)
+        note_on_color = get_rgb_color(definitions.NOTE_ON_COLOR)
+        white = get_rgb_color(definitions.WHITE)
+
+        pad_matrix = [[black for _ in range(8)] for _ in range(8)]
+
+        pattern = self.state.pattern
+        pad_pitches = list(self.pad_map.keys())
 
         # --- Pad sélectionné ---
-        selected_pad_idx = self.window.selected_pad
-        selected_pitch = list(self.pad_map.keys())[selected_pad_idx]
+        selected_pad_idx = self.state.selected_pad
+        selected_pitch = pad_pitches[selected_pad_idx]
         row, col = self.pad_to_push2[selected_pitch]
-        pad_matrix[row][col] = definitions.NOTE_ON_COLOR
+        pad_matrix[row][col] = note_on_color
 
-        # --- Steps actifs ---
-        steps = self.model[selected_pad_idx]
-        for step_index, step_on in enumerate(steps):
-            if step_index in self.step_to_push2 and step_on:
+        # --- Steps actifs (et steps hors de la longueur du pad éteints) ---
+        selected_pad_length = pattern.pad_lengths[selected_pad_idx]
+        for step_index in pattern.get_active_steps(selected_pad_idx):
+            if step_index in self.step_to_push2 and step_index < selected_pad_length:
                 step_row, step_col = self.step_to_push2[step_index]
-                pad_matrix[step_row][step_col] = definitions.NOTE_ON_COLOR
+                pad_matrix[step_row][step_col] = note_on_color
 
         # --- Highlight du step courant (BLANC) ---
-        current_step = self.window.current_step
-        if current_step in self.step_to_push2:
-            row, col = self.step_to_push2[current_step]
-            pad_matrix[row][col] = definitions.WHITE
+        # Un pad polymétrique a sa propre tête de lecture
+        current_step = self.state.current_step
+        selected_pad_step = current_step
+        if pattern.is_polymetric(selected_pad_idx):
+            selected_pad_step = self.scheduler.get_pad_current_step(selected_pad_idx)
+        if selected_pad_step in self.step_to_push2:
+            row, col = self.step_to_push2[selected_pad_step]
+            pad_matrix[row][col] = white
         
-        # --- Highlight du PAD qui joue au step courant (BLANC) ---
-        try:
-            for pad_index, pad_steps in enumerate(self.model):
-                if 0 <= current_step < len(pad_steps) and pad_steps[current_step]:
-                    # Pad ayant un step actif au step courant → BLANC
-                    pitch = list(self.pad_map.keys())[pad_index]
-                    prow, pcol = self.pad_to_push2[pitch]
-                    pad_matrix[prow][pcol] = definitions.WHITE
-        except Exception:
-            pass
+        # --- Highlight des PADS qui jouent (BLANC) ---
+        playing_pads = []
+        if 0 <= current_step < pattern.num_steps:
+            playing_pads = [pad_index for pad_index in pattern.get_pads_at_step(current_step) if not pattern.is_polymetric(pad_index)]
+        for pad_index in pattern.polymetric_pads:
+            pad_step = self.scheduler.get_pad_current_step(pad_index)
+            if pad_step is not None and pattern.is_on(pad_index, pad_step):
+                playing_pads.append(pad_index)
+        for pad_index in playing_pads:
+            # Pad ayant un step actif à sa position courante → BLANC
+            if pad_index < len(pad_pitches):
+                prow, pcol = self.pad_to_push2[pad_pitches[pad_index]]
+                pad_matrix[prow][pcol] = white
 
 
         # --- ENVOI DES COULEURS ---
@@ -441,47 +550,45 @@ class SequencerController:
         Avance le step courant, joue les notes actives du SEQUENCER
         et notifie les modes (SessionMode, etc.).
         """
-        # Sécurité
-        if not self.model:
+        pattern = self.state.pattern
+        num_steps = pattern.num_steps
+        if pattern.num_pads == 0 or num_steps == 0:
             return
 
-        num_pads = len(self.model)
-        if num_pads == 0:
-            return
-
-        # Nombre de steps par pad (on assume identique sur tous les pads)
-        pad0 = self.model[0]
-        if not pad0:
-            return
-        num_steps = len(pad0)
-
         # Step courant
-        current_step = getattr(self.window, "current_step", -1)
+        current_step = self.state.current_step
 
-        # Gestion du premier tick après START
+        # Gestion du premier tick après START (les pads polymétriques démarrent avec le step 0)
         if current_step == -1:
             next_step = 0
+            self.scheduler.start(self.global_tick)
         else:
             next_step = (current_step + 1) % num_steps
 
         # Mémoriser le step
-        self.window.current_step = next_step
+        self.state.current_step = next_step
         self.current_step = next_step
 
         # Appliquer le nouveau highlight UI
-        if hasattr(self.window, "highlight_step"):
-            try:
-                self.window.highlight_step(next_step, True)
-            except Exception:
-                pass
-
-        # --- LECTURE DU SÉQUENCEUR (comme avant) ---
-        target = getattr(self.window, "sequencer_target", None)
-        if target is not None and hasattr(target, "play_step"):
-            for pad_index, pad_steps in enumerate(self.model):
-                if 0 <= next_step < len(pad_steps) and pad_steps[next_step]:
+        self.update_window("highlight_step", next_step, True)
+
+        # --- LECTURE DU SÉQUENCEUR ---
+        # Pads non polymétriques : triggers précalculés du step (mis à jour à chaque modification du pattern) : coût proportionnel au nombre de notes
+        if self.scheduler.is_running():
+            # Notes planifiées au tick près (probabilité, ratchets, gate, micro-timing), envoyées par tick_from_clock_thread.
+            # Les notes du step suivant avec un micro-timing négatif sont planifiées dès maintenant
+            ticks_per_step = max(1, int(24 / self.steps_per_beat))
+            self.scheduler.schedule_step_triggers(pattern.get_step_triggers(next_step), self.global_tick, ticks_per_step,
+                                                  early=None if current_step == -1 else False)
+            self.scheduler.schedule_step_triggers(pattern.get_step_triggers((next_step + 1) % num_steps),
+                                                  self.global_tick + ticks_per_step, ticks_per_step, early=True)
+        else:
+            # Avance manuelle (transport arrêté) : notes jouées immédiatement
+            target = self.state.sequencer_target
+            if target is not None and hasattr(target, "play_trigger"):
+                for trigger in pattern.get_step_triggers(next_step):
                     try:
-                        target.play_step(pad_index, next_step)
+                        target.play_trigger(trigger)
                     except Exception:
                         pass
 
@@ -524,6 +631,22 @@ class SequencerController:
 
     def tick_from_clock_thread(self, event=None):
 
+        if event == "stop":
+            # Dernier appel du thread de clock, après son dernier tick
+            self._tick_count = 0
+            self.current_step = 0
+            self.send_note_offs(self.scheduler.stop())
+
+            # --- SESSION MODE V2 : ALL NOTES OFF ---
+            session_v2 = getattr(self.app, "session_mode_v2", None)
+            if session_v2:
+                session_v2._all_notes_off()
+
+            return
+
+        # Arrêt demandé depuis un autre thread pendant le tick précédent (transport redémarré avant la fin du thread)
+        self.send_note_offs(self.scheduler.handle_stop_request())
+
         # -------------------------------------------------------------
         # TEMPS MAÎTRE — incrément clock globale (SessionModeV2)
         # -------------------------------------------------------------
@@ -555,39 +678,61 @@ class SequencerController:
             if global_tick % self.ticks_per_step == 0:
                 session_v2.on_step(global_step, step_in_bar)
 
-
-        if event == "stop":
-            self._tick_count = 0
-            self.current_step = 0
-
-            # --- SESSION MODE V2 : ALL NOTES OFF ---
-            session_v2 = getattr(self.app, "session_mode_v2", None)
-            if session_v2:
-                session_v2._all_notes_off()
-
-            return
-
         # 24ppqn → ticks MIDI
         ticks_per_step = 24 / float(self.steps_per_beat)
 
         self._tick_count += 1
 
         # Assez de ticks → avancer d’un step
+        step_advanced = False
         if self._tick_count >= ticks_per_step:
             self._tick_count = 0
             self.advance_step()
+            step_advanced = True
 
             # --- SESSION MODE: lancer clips QUEUED au début de la mesure ---
             if hasattr(self.app, "session_mode"):
                 # début de mesure = current_step == 0
                 if self.current_step == 0:
                     sm = self.app.session_mode
+                    changed_pads = []
                     for r in range(8):
                         for c in range(8):
                             clip = sm.clips.get_clip(r, c)
                             if clip.state == Clip.STATE_QUEUED:
                                 clip.state = Clip.STATE_PLAYING
-                    self.app.pads_need_update = True
+                                changed_pads.append((r, c))
+                    if changed_pads:
+                        sm.invalidate_pads(changed_pads)
+
+        # --- PADS POLYMÉTRIQUES ET NOTES PLANIFIÉES ---
+        # Seuls les pads et les notes qui tombent à ce tick sont traités (voir SequencerScheduler)
+        note_events = self.scheduler.process_tick(self.global_tick, int(ticks_per_step))
+        if note_events is not None:
+            target = self.state.sequencer_target
+            if target is not None and hasattr(target, "note_on"):
+                for is_note_on, trigger in note_events:
+                    try:
+                        if is_note_on:
+                            target.note_on(trigger)
+                        else:
+                            target.note_off(trigger)
+                    except Exception:
+                        pass
+        if self.scheduler.pad_steps_changed:
+            self.scheduler.pad_steps_changed = False
+            if not step_advanced:
+                self.update_push_feedback()
+
+    def send_note_offs(self, triggers):
+        target = self.state.sequencer_target
+        if target is None or not hasattr(target, "note_off"):
+            return
+        for trigger in triggers:
+            try:
+                target.note_off(trigger)
+            except Exception:
+                pass
 
 
 
@@ -0,0 +1,261 @@
+# controller/sequencer_pattern.py
+import collections
+
+import numpy
+
+
+# Note à jouer à un step, envoyée sur l'instrument de sortie du séquenceur (SequencerState.sequencer_output_instrument).
+# 'gate' et 'micro_timing' sont en ticks MIDI (24 par noire), 'probability' en pourcents
+StepTrigger = collections.namedtuple('StepTrigger', ['pad_index', 'note', 'velocity', 'gate', 'probability', 'ratchets', 'micro_timing'])
+
+# Paramètres de step éditables (voir 'set_step_parameter') : nom de la matrice numpy -> (valeur min, valeur max)
+STEP_PARAMETER_RANGES = collections.OrderedDict([
+    ('velocity', (0, 127)),
+    ('probability', (0, 100)),
+    ('ratchets', (1, 8)),
+    ('gate', (1, 96)),
+    ('micro_timing', (-11, 11)),
+])
+
+# Diviseurs d'horloge d'un pad : nom (mêmes noms que les boutons de résolution de Push, push2_python.constants.BUTTON_1_*)
+# -> ticks MIDI (24 par noire) par step. Les triolets durent 2/3 de la valeur binaire correspondante
+PAD_RATE_TICKS = collections.OrderedDict([
+    ('1/4', 24), ('1/4t', 16), ('1/8', 12), ('1/8t', 8), ('1/16', 6), ('1/16t', 4), ('1/32', 3), ('1/32t', 2),
+])
+
+# Sens de lecture d'un pad
+DIRECTION_FORWARD = 'forward'
+DIRECTION_BACKWARD = 'backward'
+DIRECTION_PINGPONG = 'pingpong'
+DIRECTION_RANDOM = 'random'
+PAD_DIRECTIONS = [DIRECTION_FORWARD, DIRECTION_BACKWARD, DIRECTION_PINGPONG, DIRECTION_RANDOM]
+
+
+class SequencerPattern(object):
+    """
+    Pattern du séquenceur interne : une matrice num_pads x num_steps par attribut de step
+      - on : step actif ou non
+      - velocity : vélocité de la note jouée (0-127)
+      - probability : probabilité (en %) que le step soit joué, tirée à chaque passage
+      - ratchets : nombre de notes jouées dans la durée du step (répartition égale)
+      - gate : durée de la note, en ticks MIDI (24 par noire)
+      - micro_timing : décalage de la note par rapport au step, en ticks (négatif = en avance)
+    Les matrices utilisent des types numpy compacts (uint8/int8 : 5 octets par step en plus du booléen 'on').
+    C'est l'unique modèle du pattern : le SequencerController, le SequencerTarget, la SequencerWindow et les
+    presets le lisent tous ici. Le pattern est toujours modifié en place (jamais remplacé) pour que les références restent valides.
+
+    Chaque pad a aussi sa longueur (en steps), son diviseur d'horloge (None = résolution globale du séquenceur) et son
+    sens de lecture. Un pad dont l'un de ces réglages diffère des valeurs par défaut est 'polymétrique' : il n'avance
+    plus avec le step global mais avec sa propre tête de lecture (voir controller/sequencer_scheduler.py).
+
+    Pour chaque step, la liste des StepTrigger des pads non polymétriques est précalculée (voir 'get_step_triggers') :
+    la lecture ne coûte que le nombre de notes du step. Ces listes sont mises à jour à chaque modification d'un step ou
+    d'un réglage de pad, il ne faut donc modifier le pattern qu'avec ses méthodes (pas directement les matrices numpy).
+    """
+
+    default_velocity = 100
+    default_probability = 100
+    default_ratchets = 1
+    default_gate = 6  # Une double croche
+    default_micro_timing = 0
+
+    def __init__(self, num_pads=16, num_steps=32, start_note=36):
+        self.on = numpy.zeros((num_pads, num_steps), dtype=bool)
+        self.velocity = numpy.full((num_pads, num_steps), self.default_velocity, dtype=numpy.uint8)
+        self.probability = numpy.full((num_pads, num_steps), self.default_probability, dtype=numpy.uint8)
+        self.ratchets = numpy.full((num_pads, num_steps), self.default_ratchets, dtype=numpy.uint8)
+        self.gate = numpy.full((num_pads, num_steps), self.default_gate, dtype=numpy.uint8)
+        self.micro_timing = numpy.full((num_pads, num_steps), self.default_micro_timing, dtype=numpy.int8)
+        # Note de chaque pad
+        self.pad_notes = [start_note + pad_index for pad_index in range(num_pads)]
+        # Longueur, diviseur d'horloge (clé de PAD_RATE_TICKS, None = résolution globale) et sens de lecture de chaque pad
+        self.pad_lengths = [num_steps] * num_pads
+        self.pad_rates = [None] * num_pads
+        self.pad_directions = [DIRECTION_FORWARD] * num_pads
+        # Pads polymétriques (tuple remplacé, jamais modifié, lu depuis le thread de clock) et masque des autres pads
+        self.polymetric_pads = ()
+        self.lockstep_mask = numpy.ones(num_pads, dtype=bool)
+        # step_index -> tuple de StepTrigger (remplacé, jamais modifié, donc lisible depuis le thread de clock)
+        self.step_triggers = [() for _ in range(num_steps)]
+
+    @property
+    def num_pads(self):
+        return self.on.shape[0]
+
+    @property
+    def num_steps(self):
+        return self.on.shape[1]
+
+    def is_valid_step(self, pad_index, step_index):
+        return 0 <= pad_index < self.num_pads and 0 <= step_index < self.num_steps
+
+    def is_on(self, pad_index, step_index):
+        return bool(self.on[pad_index, step_index])
+
+    def toggle_step(self, pad_index, step_index):
+        # Renvoie le nouvel état du step
+        self.on[pad_index, step_index] = not self.on[pad_index, step_index]
+        self.update_step_triggers(step_index)
+        return bool(self.on[pad_index, step_index])
+
+    def set_step(self, pad_index, step_index, on=True, **parameters):
+        # parameters : valeurs des paramètres de STEP_PARAMETER_RANGES (velocity, gate...), bornées
+        self.on[pad_index, step_index] = on
+        for name, value in parameters.items():
+            if value is not None:
+                self._set_step_parameter_value(pad_index, step_index, name, value)
+        self.update_step_triggers(step_index)
+
+    def get_step_parameter(self, pad_index, step_index, name):
+        return int(getattr(self, name)[pad_index, step_index])
+
+    def set_step_parameter(self, pad_index, step_index, name, value):
+        # Renvoie la valeur effectivement enregistrée (bornée à STEP_PARAMETER_RANGES)
+        value = self._set_step_parameter_value(pad_index, step_index, name, value)
+        self.update_step_triggers(step_index)
+        return value
+
+    def _set_step_parameter_value(self, pad_index, step_index, name, value):
+        min_value, max_value = STEP_PARAMETER_RANGES[name]
+        value = max(min_value, min(max_value, int(value)))
+        getattr(self, name)[pad_index, step_index] = value
+        return value
+
+    # -------------------------------------------------------------
+    # Réglages par pad (polymétrie)
+    # -------------------------------------------------------------
+    def is_polymetric(self, pad_index):
+        return (self.pad_lengths[pad_index] != self.num_steps
+                or self.pad_rates[pad_index] is not None
+                or self.pad_directions[pad_index] != DIRECTION_FORWARD)
+
+    def set_pad_length(self, pad_index, length):
+        self.pad_lengths[pad_index] = max(1, min(self.num_steps, int(length)))
+        self.update_polymetric_pads()
+
+    def set_pad_rate(self, pad_index, rate_name):
+        # rate_name : clé de PAD_RATE_TICKS, ou None pour suivre la résolution globale
+        if rate_name is not None and rate_name not in PAD_RATE_TICKS:
+            return
+        self.pad_rates[pad_index] = rate_name
+        self.update_polymetric_pads()
+
+    def set_pad_direction(self, pad_index, direction):
+        if direction not in PAD_DIRECTIONS:
+            return
+        self.pad_directions[pad_index] = direction
+        self.update_polymetric_pads()
+
+    def get_pad_ticks_per_step(self, pad_index, default_ticks_per_step):
+        rate_name = self.pad_rates[pad_index]
+        if rate_name is None:
+            return default_ticks_per_step
+        return PAD_RATE_TICKS[rate_name]
+
+    def update_polymetric_pads(self):
+        polymetric_pads = tuple([pad_index for pad_index in range(self.num_pads) if self.is_polymetric(pad_index)])
+        lockstep_mask = numpy.ones(self.num_pads, dtype=bool)
+        lockstep_mask[list(polymetric_pads)] = False
+        self.lockstep_mask = lockstep_mask
+        self.polymetric_pads = polymetric_pads
+        self.update_all_step_triggers()
+
+    def get_active_steps(self, pad_index):
+        # Indices des steps actifs d'un pad
+        return numpy.flatnonzero(self.on[pad_index]).tolist()
+
+    def get_pads_at_step(self, step_index):
+        # Indices des pads actifs à un step
+        return numpy.flatnonzero(self.on[:, step_index]).tolist()
+
+    def get_step_triggers(self, step_index):
+        # StepTriggers précalculés du step pour les pads non polymétriques (valeurs en types Python, utilisables directement
+        # dans des messages mido)
+        return self.step_triggers[step_index]
+
+    def get_pad_trigger(self, pad_index, step_index):
+        # StepTrigger d'un seul pad (pads polymétriques), None si le step n'est pas actif
+        if not self.on[pad_index, step_index]:
+            return None
+        return StepTrigger(pad_index, self.pad_notes[pad_index], int(self.velocity[pad_index, step_index]),
+                           int(self.gate[pad_index, step_index]), int(self.probability[pad_index, step_index]),
+                           int(self.ratchets[pad_index, step_index]), int(self.micro_timing[pad_index, step_index]))
+
+    def update_step_triggers(self, step_index):
+        # Recalcule les triggers d'un step à partir d'une seule colonne du pattern
+        pads = numpy.flatnonzero(self.on[:, step_index] & self.lockstep_mask)
+        if pads.size == 0:
+            self.step_triggers[step_index] = ()
+            return
+        pad_notes = self.pad_notes
+        self.step_triggers[step_index] = tuple([
+            StepTrigger(pad_index, pad_notes[pad_index], velocity, gate, probability, ratchets, micro_timing)
+            for pad_index, velocity, gate, probability, ratchets, micro_timing in zip(
+                pads.tolist(), self.velocity[pads, step_index].tolist(), self.gate[pads, step_index].tolist(),
+                self.probability[pads, step_index].tolist(), self.ratchets[pads, step_index].tolist(),
+                self.micro_timing[pads, step_index].tolist())
+        ])
+
+    def update_all_step_triggers(self):
+        for step_index in range(self.num_steps):
+            self.update_step_triggers(step_index)
+
+    def clear(self):
+        self.on[:] = False
+        self.velocity[:] = self.default_velocity
+        self.probability[:] = self.default_probability
+        self.ratchets[:] = self.default_ratchets
+        self.gate[:] = self.default_gate
+        self.micro_timing[:] = self.default_micro_timing
+        self.pad_lengths = [self.num_steps] * self.num_pads
+        self.pad_rates = [None] * self.num_pads
+        self.pad_directions = [DIRECTION_FORWARD] * self.num_pads
+        self.update_polymetric_pads()
+
+    # -------------------------------------------------------------
+    # Presets
+    # -------------------------------------------------------------
+    def get_settings_to_save(self):
+        return {
+            'steps': self.on.tolist(),
+            'velocities': self.velocity.tolist(),
+            'probabilities': self.probability.tolist(),
+            'ratchets': self.ratchets.tolist(),
+            'gate_ticks': self.gate.tolist(),
+            'micro_timings': self.micro_timing.tolist(),
+            'pad_lengths': list(self.pad_lengths),
+            'pad_rates': list(self.pad_rates),
+            'pad_directions': list(self.pad_directions),
+        }
+
+    def load_from_settings(self, data):
+        """
+        Charge le pattern depuis un dict de preset ('steps' et, optionnellement, les paramètres de step 'velocities',
+        'probabilities', 'ratchets', 'gate_ticks', 'micro_timings' et les réglages par pad 'pad_lengths', 'pad_rates' et
+        'pad_directions'). Les presets plus anciens ne contiennent que 'steps' (liste de listes de booléens), ou des
+        'gates' en multiples de step, convertis en ticks sur la base d'une double croche. Les données plus petites que le
+        pattern sont complétées avec les valeurs par défaut, les plus grandes sont tronquées.
+        """
+        self.clear()
+        data = dict(data)
+        if 'gate_ticks' not in data and data.get('gates', None):
+            data['gate_ticks'] = [[round(gate * self.default_gate) for gate in row] for row in data['gates']]
+        for attr_name, key in [('on', 'steps'), ('velocity', 'velocities'), ('probability', 'probabilities'),
+                               ('ratchets', 'ratchets'), ('gate', 'gate_ticks'), ('micro_timing', 'micro_timings')]:
+            rows = data.get(key, None)
+            if not rows:
+                continue
+            target = getattr(self, attr_name)
+            if attr_name in STEP_PARAMETER_RANGES:
+                min_value, max_value = STEP_PARAMETER_RANGES[attr_name]
+                rows = [[max(min_value, min(max_value, int(value))) for value in row] for row in rows]
+            for pad_index, row in enumerate(rows[0:self.num_pads]):
+                row = row[0:self.num_steps]
+                target[pad_index, 0:len(row)] = row
+        for pad_index, length in enumerate(data.get('pad_lengths', [])[0:self.num_pads]):
+            self.pad_lengths[pad_index] = max(1, min(self.num_steps, int(length)))
+        for pad_index, rate_name in enumerate(data.get('pad_rates', [])[0:self.num_pads]):
+            self.pad_rates[pad_index] = rate_name if rate_name in PAD_RATE_TICKS else None
+        for pad_index, direction in enumerate(data.get('pad_directions', [])[0:self.num_pads]):
+            self.pad_directions[pad_index] = direction if direction in PAD_DIRECTIONS else DIRECTION_FORWARD
+        self.update_polymetric_pads()
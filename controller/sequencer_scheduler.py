@@ -0,0 +1,233 @@
+# controller/sequencer_scheduler.py
+import heapq
+import random
+
+from controller.sequencer_pattern import DIRECTION_BACKWARD, DIRECTION_PINGPONG, DIRECTION_RANDOM
+
+
+def get_step_position(direction, length, count):
+    """
+    Step joué par un pad de longueur 'length' après 'count' steps depuis le démarrage, selon son sens de lecture.
+    En pingpong, les extrémités ne sont pas répétées (0 1 2 3 2 1 0 1 ...).
+    """
+    if length <= 1:
+        return 0
+    if direction == DIRECTION_BACKWARD:
+        return length - 1 - count % length
+    if direction == DIRECTION_PINGPONG:
+        period = 2 * (length - 1)
+        position = count % period
+        return position if position < length else period - position
+    if direction == DIRECTION_RANDOM:
+        return random.randrange(length)
+    return count % length
+
+
+class SequencerScheduler(object):
+    """
+    Planification des notes du séquenceur à la résolution du tick MIDI (24 par noire), appelée à chaque tick depuis le
+    thread de clock.
+
+    Notes : chaque StepTrigger joué est converti en note ons / note offs datés en ticks ('schedule_trigger') : tirage de
+    la probabilité, micro-timing, ratchets répartis dans la durée du step et gate en ticks. Ces événements sont gardés
+    dans un tas trié par tick (note offs avant note ons au même tick) et renvoyés par 'process_tick' quand leur tick
+    arrive. Un step avec un micro-timing négatif est planifié un step en avance (au step précédent).
+    Les notes en cours sont suivies par note : si une note est rejouée alors qu'elle est encore tenue (gate
+    plus long que l'intervalle entre deux notes), son note off est envoyé juste avant le nouveau note on et le note off
+    planifié de l'ancienne note est ignoré (il couperait la nouvelle).
+
+    Pads polymétriques (longueur, diviseur d'horloge ou sens de lecture propres, voir SequencerPattern.is_polymetric) :
+    pour chaque pad, le tick de son prochain step est calculé à l'avance et les pads sont gardés dans un tas trié par ce
+    tick : à chaque tick de clock, seul le haut du tas est comparé au tick courant, et seuls les pads dont le step tombe
+    à ce tick sont traités (pas d'évaluation de tous les pads à chaque tick). Les pads non polymétriques restent joués
+    par SequencerController.advance_step avec les triggers précalculés du step global.
+
+    Toutes les têtes de lecture sont alignées sur le tick de démarrage du transport ('start'), donc les pads restent
+    en phase avec le step global. L'état n'est modifié que dans le thread de clock : un changement des réglages de pad
+    (runtime thread) est détecté par le remplacement de SequencerPattern.polymetric_pads et appliqué au tick suivant, et
+    un arrêt demandé par un autre thread ('request_stop') est fait au début du tick suivant ('handle_stop_request') ou
+    quand le thread de clock se termine ('stop'), jamais pendant un tick.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.start_tick = None
+        self.heap = []                  # (tick du prochain step, pad_index)
+        self.scheduled_pads = None      # SequencerPattern.polymetric_pads au moment du dernier calcul du tas
+        self.pad_step_counts = {}       # pad_index -> nombre de steps joués depuis le démarrage
+        self.pad_current_steps = {}     # pad_index -> dernier step joué (feedback Push)
+        self.pad_next_steps = {}        # pad_index -> prochain step (déjà tiré pour le sens aléatoire)
+        self.pad_steps_changed = False  # Mis à True quand un pad polymétrique avance (feedback Push)
+        self.note_events = []           # (tick, 0 = note off / 1 = note on, n° d'ordre, StepTrigger)
+        self.note_event_count = 0
+        self.active_notes = {}          # note -> (n° d'ordre, StepTrigger) des notes jouées pas encore coupées
+        self.stop_requested = False     # Mis à True par 'request_stop' (autre thread), traité dans le thread de clock
+
+    def is_running(self):
+        return self.start_tick is not None
+
+    def start(self, tick):
+        # Premier step de tous les pads polymétriques au tick 'tick' (celui du step global 0)
+        self.start_tick = tick
+        self.heap = []
+        self.scheduled_pads = None
+        self.pad_step_counts = {}
+        self.pad_current_steps = {}
+        self.pad_next_steps = {}
+        # Notes planifiées avant un arrêt qui n'aurait pas appelé 'stop'
+        self.note_events = []
+
+    def request_stop(self):
+        # Arrêt depuis un autre thread que celui de clock (transport arrêté) : le tick en cours se termine normalement
+        self.stop_requested = True
+
+    def handle_stop_request(self):
+        """
+        Thread de clock, au début d'un tick : fait l'arrêt demandé par 'request_stop' s'il y en a un et renvoie les
+        StepTriggers des notes à couper (voir 'stop'), sinon une liste vide.
+        """
+        if not self.stop_requested:
+            return []
+        return self.stop()
+
+    def stop(self):
+        """
+        Arrête la lecture et renvoie les StepTriggers des notes jouées dont le note off n'a pas encore été envoyé (à
+        envoyer par l'appelant pour éviter des notes bloquées). Les notes pas encore jouées sont abandonnées.
+        À appeler dans le thread de clock (ou quand il est arrêté), sinon utiliser 'request_stop'.
+        """
+        self.stop_requested = False
+        pending_note_offs = [trigger for _, trigger in self.active_notes.values()]
+        self.start_tick = None
+        self.heap = []
+        self.scheduled_pads = None
+        self.pad_current_steps = {}
+        self.pad_next_steps = {}
+        self.note_events = []
+        self.active_notes = {}
+        return pending_note_offs
+
+    def get_pad_current_step(self, pad_index):
+        # Dernier step joué par un pad polymétrique, None si le pad n'est pas (encore) lu par le scheduler
+        return self.pad_current_steps.get(pad_index, None)
+
+    def reschedule(self, tick, default_ticks_per_step):
+        # Garde les pads encore polymétriques tels quels, et ajoute les nouveaux sur leur grille à partir du démarrage
+        pattern = self.pattern
+        polymetric_pads = pattern.polymetric_pads
+        heap = [(due_tick, pad_index) for due_tick, pad_index in self.heap if pad_index in polymetric_pads]
+        scheduled = set([pad_index for _, pad_index in heap])
+        elapsed = tick - self.start_tick
+        for pad_index in polymetric_pads:
+            if pad_index in scheduled:
+                continue
+            ticks_per_step = pattern.get_pad_ticks_per_step(pad_index, default_ticks_per_step)
+            count = -(-elapsed // ticks_per_step)
+            self.pad_step_counts[pad_index] = count
+            heap.append((self.start_tick + count * ticks_per_step, pad_index))
+        for pad_index in list(self.pad_current_steps.keys()):
+            if pad_index not in polymetric_pads:
+                del self.pad_current_steps[pad_index]
+                self.pad_next_steps.pop(pad_index, None)
+        heapq.heapify(heap)
+        self.heap = heap
+        self.scheduled_pads = polymetric_pads
+
+    # -------------------------------------------------------------
+    # Notes
+    # -------------------------------------------------------------
+    def schedule_trigger(self, trigger, step_tick, ticks_per_step, early=None):
+        """
+        Planifie les notes d'un StepTrigger pour un step qui commence au tick 'step_tick' et dure 'ticks_per_step'.
+        'early' filtre selon le micro-timing : True = seulement si négatif (planification un step en avance), False =
+        seulement si positif ou nul, None = dans tous les cas.
+        """
+        micro_timing = trigger.micro_timing
+        if early is not None and (micro_timing < 0) != early:
+            return
+        if trigger.probability < 100 and random.random() * 100 >= trigger.probability:
+            return
+
+        # Micro-timing et ratchets limités à la durée du step
+        max_offset = ticks_per_step - 1
+        micro_timing = max(-max_offset, min(max_offset, micro_timing))
+        ratchets = max(1, min(trigger.ratchets, ticks_per_step))
+        gate = max(1, trigger.gate)
+        if ratchets > 1:
+            gate = min(gate, ticks_per_step // ratchets)
+
+        note_events = self.note_events
+        for ratchet_index in range(ratchets):
+            note_on_tick = step_tick + micro_timing + (ratchet_index * ticks_per_step) // ratchets
+            self.note_event_count += 1
+            heapq.heappush(note_events, (note_on_tick, 1, self.note_event_count, trigger))
+            heapq.heappush(note_events, (note_on_tick + gate, 0, self.note_event_count, trigger))
+
+    def schedule_step_triggers(self, triggers, step_tick, ticks_per_step, early=None):
+        for trigger in triggers:
+            self.schedule_trigger(trigger, step_tick, ticks_per_step, early)
+
+    def process_tick(self, tick, default_ticks_per_step):
+        """
+        Fait avancer les pads polymétriques dont le prochain step tombe à 'tick' (leurs notes sont planifiées), puis
+        renvoie la liste des notes à envoyer à ce tick, en tuples (is_note_on, StepTrigger), ou None s'il n'y en a pas.
+        Quand rien ne tombe à ce tick, le coût est de deux comparaisons.
+        'default_ticks_per_step' est la résolution globale, utilisée par les pads sans diviseur propre.
+        """
+        if self.start_tick is not None:
+            if self.scheduled_pads is not self.pattern.polymetric_pads:
+                self.reschedule(tick, default_ticks_per_step)
+            heap = self.heap
+            if heap and heap[0][0] <= tick:
+                self.advance_pads(tick, default_ticks_per_step)
+
+        note_events = self.note_events
+        if not note_events or note_events[0][0] > tick:
+            return None
+        events = []
+        active_notes = self.active_notes
+        while note_events and note_events[0][0] <= tick:
+            _, is_note_on, order, trigger = heapq.heappop(note_events)
+            key = trigger.note
+            active_note = active_notes.get(key, None)
+            if is_note_on:
+                if active_note is not None:
+                    # Note encore tenue : la couper avant de la rejouer
+                    events.append((False, active_note[1]))
+                active_notes[key] = (order, trigger)
+                events.append((True, trigger))
+            elif active_note is not None and active_note[0] == order:
+                # Seul le note off de la dernière note jouée est envoyé
+                del active_notes[key]
+                events.append((False, trigger))
+        return events or None
+
+    def advance_pads(self, tick, default_ticks_per_step):
+        pattern = self.pattern
+        heap = self.heap
+        while heap and heap[0][0] <= tick:
+            due_tick, pad_index = heapq.heappop(heap)
+            count = self.pad_step_counts.get(pad_index, 0)
+            length = pattern.pad_lengths[pad_index]
+            direction = pattern.pad_directions[pad_index]
+            # Prochain step déjà tiré au step précédent (ses notes en avance ont pu être planifiées), sauf au premier step
+            is_first_step = pad_index not in self.pad_next_steps
+            if is_first_step:
+                step_index = get_step_position(direction, length, count)
+            else:
+                step_index = self.pad_next_steps[pad_index] % length
+            next_step_index = get_step_position(direction, length, count + 1)
+            self.pad_step_counts[pad_index] = count + 1
+            self.pad_current_steps[pad_index] = step_index
+            self.pad_next_steps[pad_index] = next_step_index
+            self.pad_steps_changed = True
+
+            ticks_per_step = pattern.get_pad_ticks_per_step(pad_index, default_ticks_per_step)
+            trigger = pattern.get_pad_trigger(pad_index, step_index)
+            if trigger is not None:
+                self.schedule_trigger(trigger, due_tick, ticks_per_step, early=None if is_first_step else False)
+            next_trigger = pattern.get_pad_trigger(pad_index, next_step_index)
+            if next_trigger is not None:
+                self.schedule_trigger(next_trigger, due_tick + ticks_per_step, ticks_per_step, early=True)
+
+            heapq.heappush(heap, (due_tick + ticks_per_step, pad_index))
@@ -0,0 +1,27 @@
+# controller/sequencer_state.py
+from controller.sequencer_pattern import SequencerPattern
+
+
+class SequencerState(object):
+    """
+    Modèle du séquenceur interne et état du transport, indépendants de Qt.
+    Partagé par le SequencerController, la clock (Synths_Midi), le SequencerTarget et les presets.
+    La SequencerWindow (optionnelle, absente en mode headless) n'en est qu'une vue.
+    """
+
+    def __init__(self, num_pads=16, num_steps=32, start_note=36):
+        # Pattern (steps actifs, vélocité, gate), modèle unique partagé par toutes les vues
+        self.pattern = SequencerPattern(num_pads=num_pads, num_steps=num_steps, start_note=start_note)
+        self.selected_pad = 0
+        self.current_step = 0
+
+        # Instrument fixe du séquenceur (indépendant de l'instrument sélectionné)
+        self.sequencer_output_instrument = "DDRM"
+
+        # Transport
+        self.is_playing = False
+        self.tempo_bpm = 120
+        # Résolution (steps par beat), 1/16 par défaut = 4 steps par beat
+        self.steps_per_beat = 4
+
+        self.sequencer_target = None  # assigné depuis app.py
@@ -1,54 +1,46 @@
 import mido
-import threading
 
 class SequencerTarget:
     """
-    Cible du séquenceur : reçoit les steps activés et envoie les notes
-    sur le port MIDI sélectionné dans SettingsMode.
+    Cible du séquenceur : reçoit les notes à jouer (StepTriggers précalculés dans SequencerState.pattern, planifiés au
+    tick près par le SequencerScheduler du SequencerController) et les envoie sur le port MIDI de l'instrument.
     """
 
-    def __init__(self, app, num_pads=16, steps_per_pad=32, start_note=36, bpm=120, step_duration=0.1):
+    def __init__(self, app, bpm=120):
         self.app = app
-        self.num_pads = num_pads
-        self.steps_per_pad = steps_per_pad
-        self.start_note = start_note  # note du pad 0
         self.bpm = bpm
-        self.step_duration = step_duration
-        # step_states[pad_index][step_index] = True/False
-        self.step_states = [[False]*steps_per_pad for _ in range(num_pads)]
 
-    def set_step_state(self, pad_index, step_index, active=True):
-        if 0 <= pad_index < self.num_pads and 0 <= step_index < self.steps_per_pad:
-            self.step_states[pad_index][step_index] = active
+    def get_instrument_name(self, trigger):
+        # Le nom court de l’instrument sélectionné pour le seqencer
+        return self.app.sequencer_state.sequencer_output_instrument
 
     # --------------------
-    # PLAY STEP
+    # NOTES PLANIFIÉES (thread de clock)
     # --------------------
-    def play_step(self, pad_index, step_index, velocity=100):
-
-        instrument_name = self.app.sequencer_window.sequencer_output_instrument  # le nom court de l’instrument sélectionné pour le seqencer
+    def note_on(self, trigger):
+        instrument_name = self.get_instrument_name(trigger)
         if not instrument_name:
             return
 
-        # Vérifier indices
-        if 0 <= pad_index < self.num_pads and 0 <= step_index < self.steps_per_pad:
-
-            note = self.start_note + pad_index
-
-
-            # --- Cas spécial : instrument SAMPLER -> lecture WAV, pas de MIDI ---
-            if instrument_name == "SAMPLER":
-                if hasattr(self.app, "sampler") and self.app.sampler is not None:
-                    self.app.sampler.play(note, velocity)
-                return
-
-
-            # --- Envoi Note On ---
-            self.app.synths_midi.send_note_on(instrument_name, note, velocity)
+        # --- Cas spécial : instrument SAMPLER -> lecture WAV, pas de MIDI ---
+        if instrument_name == "SAMPLER":
+            if hasattr(self.app, "sampler") and self.app.sampler is not None:
+                self.app.sampler.play(trigger.note, trigger.velocity)
+            return
 
-            # --- Note Off programmé ---
-            def send_note_off():
-                self.app.synths_midi.send_note_off(instrument_name, note)
+        self.app.synths_midi.send_note_on(instrument_name, trigger.note, trigger.velocity)
 
-            threading.Timer(self.step_duration, send_note_off).start()
+    def note_off(self, trigger):
+        instrument_name = self.get_instrument_name(trigger)
+        if not instrument_name or instrument_name == "SAMPLER":
+            return
+        self.app.synths_midi.send_note_off(instrument_name, trigger.note)
 
+    # --------------------
+    # PLAY TRIGGER (hors transport, ex. avance manuelle d'un step)
+    # --------------------
+    def play_trigger(self, trigger):
+        # Note jouée immédiatement, note off programmé d'après le gate (en ticks) et le tempo courant
+        self.note_on(trigger)
+        tempo_bpm = float(getattr(self.app.sequencer_state, "tempo_bpm", self.bpm) or self.bpm)
+        self.app.call_later(trigger.gate * 60.0 / (tempo_bpm * 24), self.note_off, trigger)
@@ -670,6 +670,7 @@ class DDRMToneSelectorMode(PyshaMode):
     page_n = 0
     upper_row_selected = ''
     lower_row_selected = ''
+    has_display_background = True
     inter_message_message_min_time_ms = 4  # ms wait time after each message to DDRM
     send_messages_double = False  # This is a workaround for a DDRM bug that will ignore single CC messages. We'll send 2 messages in a row for the same control with slightly different values
 
@@ -740,7 +741,12 @@ class DDRMToneSelectorMode(PyshaMode):
         else:
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_PAGE_RIGHT, definitions.BLACK)
 
-    def update_display(self, ctx, w, h):
+    def get_background_version(self):
+        return (self.background_version, self.page_n, self.upper_row_selected, self.lower_row_selected,
+                self.app.is_mode_active(self.app.settings_mode))
+
+    def update_display_background(self, ctx, w, h):
+        # The whole tone grid only changes when the page or selected tones change, so it is all drawn in the background layer
 
         if not self.app.is_mode_active(self.app.settings_mode):
             # If settings mode is active, don't draw the upper parts of the screen because settings page will
@@ -802,5 +808,5 @@ class DDRMToneSelectorMode(PyshaMode):
                 self.page_n = 0
             elif button_name == push2_python.constants.BUTTON_PAGE_RIGHT and show_next:
                 self.page_n = 1
-            self.app.buttons_need_update = True
+            self.invalidate_buttons()
             return True
@@ -11,6 +11,18 @@ LAYOUT_SLICES = 'lslices'
 
 NOTIFICATION_TIME = 3
 
+DISPLAY_KEEP_ALIVE_TIME = 1.0  # Re-send last frame to Push display after this time even if nothing changed (Push blanks the display if no frames are received)
+IDLE_FRAME_RATE = 10  # Frame rate of the main loop when there is no input and no playback (see FrameRateGovernor)
+FRAME_RATE_IDLE_TIMEOUT = 2.0  # Seconds without input after which the main loop goes to IDLE_FRAME_RATE (if not playing)
+CLOCK_JITTER_BUDGET = 0.002  # Max lateness (in seconds) of MIDI clock ticks before the main loop frame rate is capped
+CLOCK_JITTER_CAPPED_FRAME_RATE = 20  # Frame rate of the main loop while clock ticks are later than CLOCK_JITTER_BUDGET
+MODE_PROFILING_WINDOW = 1.0  # Seconds over which mode methods timings are accumulated when profiling is enabled
+MODE_PROFILING_TOP_N = 8  # Number of entries shown in the display when profiling is enabled
+MODE_PROFILING_JSON_PATH = 'mode_profiling.json'  # File where the latest profiling results are saved (when enabled)
+TEXT_TILE_CACHE_SIZE = 256  # Max number of pre-rendered text tiles kept by display_utils (least recently used ones are evicted)
+HEADLESS_ARG = '--headless'  # Command line argument to run without PyQt windows (sequencer and synth windows are not created)
+ASYNCIO_ARG = '--asyncio'  # Command line argument to run the Push/MIDI/display loop on an asyncio event loop (see AsyncRuntime)
+
 BLACK_RGB = [0, 0, 0]
 GRAY_DARK_RGB = [30, 30, 30]
 GRAY_LIGHT_RGB = [180, 180, 180]
@@ -88,12 +100,19 @@ DEFAULT_ANIMATION = push2_python.constants.ANIMATION_PULSING_QUARTER
 INSTRUMENT_DEFINITION_FOLDER = 'instrument_definitions'
 TRACK_LISTING_PATH = 'track_listing.json'
 
+# Push2 action callbacks of the modes which are dispatched through per-event handler chains (see PyshaApp.update_mode_handler_chains)
+MODE_EVENT_HANDLER_NAMES = ['on_encoder_rotated', 'on_button_pressed', 'on_button_released', 'on_pad_pressed', 'on_pad_released',
+                            'on_pad_aftertouch', 'on_touchstrip', 'on_sustain_pedal']
+
 class PyshaMode(object):
     """
     """
 
     name = ''
     xor_group = None
+    display_version = 0
+    background_version = 0
+    has_display_background = False
 
     def __init__(self, app, settings=None):
         self.app = app
@@ -135,9 +154,52 @@ class PyshaMode(object):
     def update_buttons(self):
         pass
 
+    # Methods used to know which pads/buttons need to be redrawn. Modes should call invalidate_pads/invalidate_buttons whenever
+    # some of the pads/buttons they control change (passing the list of (i, j) pads or button names, or nothing if all changed).
+    # Once per frame, the app calls update_pads_region/update_buttons_subset only for the modes that invalidated something.
+    # Modes can override these to only recompute the given elements, default implementations redraw everything
+    def invalidate_pads(self, pads_ij=None):
+        self.app.invalidate_pads(mode=self, pads_ij=pads_ij)
+
+    def invalidate_buttons(self, button_names=None):
+        self.app.invalidate_buttons(mode=self, button_names=button_names)
+
+    def update_pads_region(self, pads_ij):
+        self.update_pads()
+
+    def update_buttons_subset(self, button_names):
+        self.update_buttons()
+
     def update_display(self, ctx, w, h):
         pass
 
+    # Methods used to know if the display needs to be re-rendered. Modes should call invalidate_display whenever something they
+    # draw in the display changes. Modes which draw things that depend on external state (e.g. sequencer position) can instead
+    # override get_display_version to return a value that changes whenever that state changes
+    def invalidate_display(self):
+        self.display_version += 1
+
+    def get_display_version(self):
+        return self.display_version
+
+    # Modes with has_display_background = True draw their static elements in update_display_background. These are drawn in a
+    # background layer which is cached by the app and only redrawn when get_background_version changes. The layer is composited
+    # right before calling update_display, which should only draw the elements that change more often (values, playhead...)
+    def update_display_background(self, ctx, w, h):
+        pass
+
+    def invalidate_background(self):
+        self.background_version += 1
+        self.invalidate_display()
+
+    def get_background_version(self):
+        return self.background_version
+
+    # Returns True if the mode class overrides the given Push2 action callback (e.g. 'on_pad_pressed'). Modes which don't are
+    # not included in the app's handler chains, so events are not dispatched to the no-op callbacks below
+    def implements_handler(self, handler_name):
+        return getattr(type(self), handler_name) is not getattr(PyshaMode, handler_name)
+
     # Push2 action callbacks (these methods should return True if some action was carried out, otherwise return None)
     def on_encoder_rotated(self, encoder_name, increment):
         pass
@@ -1,35 +1,97 @@
 import cairo
+import collections
+import math
 import definitions
 import push2_python
 
 
+TEXT_FONT_FACE = "Arial"
+TEXT_TILE_PADDING = 2  # Extra transparent pixels around the text in tiles so antialiased glyph edges are not clipped
+
+TextTile = collections.namedtuple('TextTile', ['surface', 'origin_x', 'origin_y', 'width'])
+
+
+class TextTileCache(object):
+    """Cache of pre-rendered text tiles. Each tile is a small transparent ARGB32 surface with a line of text rendered on it,
+    and is keyed by (text, font size, color). Drawing cached text only requires compositing the tile onto the frame instead of
+    selecting the font face, setting the font size and laying out the glyphs again (and measuring them for centering). Least
+    recently used tiles are evicted when there are more than 'max_size' tiles.
+    """
+
+    def __init__(self, max_size=definitions.TEXT_TILE_CACHE_SIZE):
+        self.max_size = max_size
+        self.tiles = collections.OrderedDict()
+        self.num_hits = 0
+        self.num_misses = 0
+        # Context used to measure text before rendering a tile
+        self.measure_ctx = cairo.Context(cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1))
+        self.measure_ctx.select_font_face(TEXT_FONT_FACE, cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
+
+    def get_tile(self, text, font_size, color):
+        key = (text, font_size, tuple(color))
+        tile = self.tiles.get(key, None)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            self.num_hits += 1
+            return tile
+
+        self.num_misses += 1
+        tile = self.render_tile(text, font_size, color)
+        self.tiles[key] = tile
+        if len(self.tiles) > self.max_size:
+            self.tiles.popitem(last=False)
+        return tile
+
+    def render_tile(self, text, font_size, color):
+        self.measure_ctx.set_font_size(font_size)
+        ascent, descent, _, _, _ = self.measure_ctx.font_extents()
+        x_bearing, y_bearing, width, height, x_advance, _ = self.measure_ctx.text_extents(text)
+
+        # Tile must contain both the glyphs ink and the font ascent/descent around the baseline
+        origin_x = TEXT_TILE_PADDING + int(math.ceil(max(0, -x_bearing)))
+        origin_y = TEXT_TILE_PADDING + int(math.ceil(max(ascent, -y_bearing)))
+        tile_w = origin_x + int(math.ceil(max(x_advance, x_bearing + width))) + TEXT_TILE_PADDING
+        tile_h = origin_y + int(math.ceil(max(descent, y_bearing + height))) + TEXT_TILE_PADDING
+
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, tile_w, tile_h)
+        ctx = cairo.Context(surface)
+        ctx.set_source_rgb(*color)
+        ctx.select_font_face(TEXT_FONT_FACE, cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
+        ctx.set_font_size(font_size)
+        ctx.move_to(origin_x, origin_y)
+        ctx.show_text(text)
+        surface.flush()
+        return TextTile(surface, origin_x, origin_y, width)
+
+    def clear(self):
+        self.tiles.clear()
+
+
+text_tile_cache = TextTileCache()
+
+
+def draw_text_tile(ctx, tile, x, y, color):
+    # (x, y) is the position of the text baseline start (as with ctx.move_to + ctx.show_text). Position is rounded so that
+    # tiles are composited at pixel boundaries (otherwise they'd be resampled and look blurry)
+    ctx.set_source_surface(tile.surface, round(x) - tile.origin_x, round(y) - tile.origin_y)
+    ctx.paint()
+    ctx.set_source_rgb(*color)  # Leave the text color as source like ctx.show_text would
+
+
+def draw_cached_text(ctx, x, y, text, font_size, color):
+    draw_text_tile(ctx, text_tile_cache.get_tile(str(text), font_size, color), x, y, color)
+
+
 def show_title(ctx, x, h, text, color=[1, 1, 1]):
-    text = str(text)
-    ctx.set_source_rgb(*color)
-    ctx.select_font_face("Arial", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
-    font_size = h//12
-    ctx.set_font_size(font_size)
-    ctx.move_to(x + 3, 20)
-    ctx.show_text(text)
+    draw_cached_text(ctx, x + 3, 20, text, h//12, color)
 
 
 def show_value(ctx, x, h, text, color=[1, 1, 1]):
-    text = str(text)
-    ctx.set_source_rgb(*color)
-    ctx.select_font_face("Arial", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
-    font_size = h//8
-    ctx.set_font_size(font_size)
-    ctx.move_to(x + 3, 45)
-    ctx.show_text(text)
+    draw_cached_text(ctx, x + 3, 45, text, h//8, color)
 
 
 def draw_text_at(ctx, x, y, text, font_size = 12, color=[1, 1, 1]):
-    text = str(text)
-    ctx.set_source_rgb(*color)
-    ctx.select_font_face("Arial", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
-    ctx.set_font_size(font_size)
-    ctx.move_to(x, y)
-    ctx.show_text(text)
+    draw_cached_text(ctx, x, y, text, font_size, color)
 
 
 def show_text(ctx, x_part, pixels_from_top, text, height=20, font_color=definitions.WHITE, background_color=None, margin_left=4, margin_top=4, font_size_percentage=0.8, center_vertically=True, center_horizontally=False, rectangle_padding=0):
@@ -48,24 +110,38 @@ def show_text(ctx, x_part, pixels_from_top, text, height=20, font_color=definiti
         ctx.set_source_rgb(*definitions.get_color_rgb_float(background_color))
         ctx.rectangle(x1 + rectangle_padding, y1 + rectangle_padding, part_w - rectangle_padding * 2, height - rectangle_padding * 2)
         ctx.fill()
-    ctx.set_source_rgb(*definitions.get_color_rgb_float(font_color))
-    ctx.select_font_face("Arial", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
+    font_color_rgb = definitions.get_color_rgb_float(font_color)
     font_size = round(int(height * font_size_percentage))
     text_lines = text.split('\n')
     n_lines = len(text_lines)
     if center_vertically:
         margin_top = (height - font_size * n_lines) // 2
-    ctx.set_font_size(font_size)
     for i, line in enumerate(text_lines):
+        tile = text_tile_cache.get_tile(line, font_size, font_color_rgb)
         if center_horizontally:
-            (_, _, l_width, _, _, _) = ctx.text_extents(line)
-            ctx.move_to(x1 + part_w/2 - l_width/2, y1 + font_size * (i + 1) + margin_top - 2)
+            draw_text_tile(ctx, tile, x1 + part_w/2 - tile.width/2, y1 + font_size * (i + 1) + margin_top - 2, font_color_rgb)
         else:
-            ctx.move_to(x1 + margin_left, y1 + font_size * (i + 1) + margin_top - 2)
-        ctx.show_text(line)
+            draw_text_tile(ctx, tile, x1 + margin_left, y1 + font_size * (i + 1) + margin_top - 2, font_color_rgb)
 
     ctx.restore()
 
+def show_profiling_info(ctx, lines, font_size=11):
+    # Lines are drawn over a dark translucent background, from the top of the display (not cached as they change often)
+    ctx.save()
+    display_w = push2_python.constants.DISPLAY_LINE_PIXELS
+    line_h = font_size + 2
+    ctx.set_source_rgba(0.0, 0.0, 0.0, 0.75)
+    ctx.rectangle(0, 0, display_w, line_h * len(lines) + 4)
+    ctx.fill()
+    ctx.set_source_rgb(*definitions.get_color_rgb_float(definitions.YELLOW))
+    ctx.select_font_face("Monospace", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
+    ctx.set_font_size(font_size)
+    for i, line in enumerate(lines):
+        ctx.move_to(4, line_h * (i + 1))
+        ctx.show_text(line)
+    ctx.restore()
+
+
 def show_notification(ctx, text, opacity=1.0):
     ctx.save()
 
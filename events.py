@@ -0,0 +1,107 @@
+# events.py
+
+class Event(object):
+    """
+    Base des événements internes de Pysha (notes, pads et encodeurs Push, notes de clips).
+    Les événements utilisent __slots__ (pas de __dict__ par instance, accès aux attributs plus rapide) et
+    peuvent être réutilisés avec 'set' par le thread qui les possède. 'type' reprend les noms de types mido
+    quand il y en a un, donc le code qui teste 'msg.type' fonctionne aussi bien avec un événement qu'avec un
+    mido.Message.
+    """
+    __slots__ = ()
+    type = None
+
+    def __repr__(self):
+        slots = [name for cls in reversed(type(self).__mro__) for name in getattr(cls, '__slots__', ())]
+        return '{0}({1})'.format(self.__class__.__name__, ', '.join(
+            ['{0}={1!r}'.format(name, getattr(self, name)) for name in slots]))
+
+
+class NoteOn(Event):
+    __slots__ = ('note', 'velocity', 'channel', 'source', 'tick')
+    type = 'note_on'
+
+    def __init__(self, note=0, velocity=127, channel=0, source=None, tick=None):
+        self.set(note, velocity, channel, source, tick)
+
+    def set(self, note=0, velocity=127, channel=0, source=None, tick=None):
+        self.note = note
+        self.velocity = velocity
+        self.channel = channel
+        self.source = source
+        self.tick = tick
+        return self
+
+
+class NoteOff(NoteOn):
+    __slots__ = ()
+    type = 'note_off'
+
+    def __init__(self, note=0, velocity=0, channel=0, source=None, tick=None):
+        self.set(note, velocity, channel, source, tick)
+
+    def set(self, note=0, velocity=0, channel=0, source=None, tick=None):
+        return NoteOn.set(self, note, velocity, channel, source, tick)
+
+
+class PadPress(Event):
+    __slots__ = ('pad_n', 'pad_ij', 'velocity', 'time')
+    type = 'pad_press'
+
+    def __init__(self, pad_n=None, pad_ij=None, velocity=0, time=0):
+        self.set(pad_n, pad_ij, velocity, time)
+
+    def set(self, pad_n=None, pad_ij=None, velocity=0, time=0):
+        self.pad_n = pad_n
+        self.pad_ij = pad_ij
+        self.velocity = velocity
+        self.time = time
+        return self
+
+
+class EncoderTurn(Event):
+    __slots__ = ('encoder_name', 'increment', 'time')
+    type = 'encoder_turn'
+
+    def __init__(self, encoder_name=None, increment=0, time=0):
+        self.set(encoder_name, increment, time)
+
+    def set(self, encoder_name=None, increment=0, time=0):
+        self.encoder_name = encoder_name
+        self.increment = increment
+        self.time = time
+        return self
+
+
+class ClipNote(Event):
+    # Note enregistrée dans un clip, 'start' et 'end' en steps du clip ('end' est None tant que la note est tenue)
+    __slots__ = ('note', 'velocity', 'start', 'end')
+    type = 'clip_note'
+
+    def __init__(self, note=0, velocity=100, start=0, end=None):
+        self.set(note, velocity, start, end)
+
+    def set(self, note=0, velocity=100, start=0, end=None):
+        self.note = note
+        self.velocity = velocity
+        self.start = start
+        self.end = end
+        return self
+
+    def copy(self):
+        return ClipNote(self.note, self.velocity, self.start, self.end)
+
+
+def from_mido(msg, source=None, tick=None):
+    """
+    Convertit un mido.Message en événement (NoteOn ou NoteOff). Un note_on de vélocité 0 donne un NoteOff.
+    Renvoie None pour les autres types de messages.
+    """
+    msg_type = msg.type
+    if msg_type == 'note_on':
+        if msg.velocity == 0:
+            return NoteOff(msg.note, 0, msg.channel, source, tick)
+        return NoteOn(msg.note, msg.velocity, msg.channel, source, tick)
+    elif msg_type == 'note_off':
+        return NoteOff(msg.note, msg.velocity, msg.channel, source, tick)
+    return None
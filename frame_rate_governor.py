@@ -0,0 +1,76 @@
+import threading
+import time
+
+import definitions
+
+
+FRAME_RATE_REASON_INPUT = 'input'
+FRAME_RATE_REASON_PLAYBACK = 'playback'
+FRAME_RATE_REASON_IDLE = 'idle'
+FRAME_RATE_REASON_CLOCK_JITTER = 'clock jitter'
+
+
+class FrameRateGovernor(object):
+    """
+    Choisit la fréquence de la boucle principale (rendu de l'écran et envoi des LEDs au Push) :
+      - 'max_frame_rate' quand il y a eu de l'activité (encodeurs, pads, boutons, transport) il y a moins de
+        definitions.FRAME_RATE_IDLE_TIMEOUT secondes, ou pendant la lecture (clock en marche)
+      - 'idle_frame_rate' sinon
+      - limitée à definitions.CLOCK_JITTER_CAPPED_FRAME_RATE si le retard des ticks du thread de clock dépasse
+        definitions.CLOCK_JITTER_BUDGET (le rendu prend trop de CPU/GIL au thread de clock)
+    'notify_activity' remonte la fréquence immédiatement et réveille la boucle si elle est en train d'attendre.
+    """
+
+    def __init__(self, max_frame_rate, idle_frame_rate=definitions.IDLE_FRAME_RATE):
+        self.max_frame_rate = max_frame_rate
+        self.idle_frame_rate = min(idle_frame_rate, max_frame_rate)
+        self.last_activity_time = time.time()
+        self.current_frame_rate = max_frame_rate
+        self.current_reason = FRAME_RATE_REASON_INPUT
+        self.clock_jitter = 0.0
+        self.wake_up_event = threading.Event()
+        self.wake_up_callback = None  # Appelé par 'notify_activity' (ex. pour réveiller la boucle asyncio, voir AsyncRuntime)
+
+    def notify_activity(self):
+        self.last_activity_time = time.time()
+        if self.current_frame_rate < self.max_frame_rate and self.current_reason != FRAME_RATE_REASON_CLOCK_JITTER:
+            self.current_frame_rate = self.max_frame_rate
+            self.current_reason = FRAME_RATE_REASON_INPUT
+        self.wake_up_event.set()
+        if self.wake_up_callback is not None:
+            self.wake_up_callback()
+
+    def update(self, is_playing=False, clock_jitter=0.0):
+        """
+        Recalcule la fréquence en fonction de l'activité récente, de l'état de lecture et du retard mesuré
+        par le thread de clock (en secondes). Renvoie la fréquence à utiliser pour la prochaine frame.
+        """
+        self.clock_jitter = clock_jitter
+        if time.time() - self.last_activity_time < definitions.FRAME_RATE_IDLE_TIMEOUT:
+            frame_rate, reason = self.max_frame_rate, FRAME_RATE_REASON_INPUT
+        elif is_playing:
+            frame_rate, reason = self.max_frame_rate, FRAME_RATE_REASON_PLAYBACK
+        else:
+            frame_rate, reason = self.idle_frame_rate, FRAME_RATE_REASON_IDLE
+
+        if is_playing and clock_jitter > definitions.CLOCK_JITTER_BUDGET and frame_rate > definitions.CLOCK_JITTER_CAPPED_FRAME_RATE:
+            frame_rate, reason = definitions.CLOCK_JITTER_CAPPED_FRAME_RATE, FRAME_RATE_REASON_CLOCK_JITTER
+
+        self.current_frame_rate = frame_rate
+        self.current_reason = reason
+        return frame_rate
+
+    def wait_for_next_frame(self, timeout):
+        """
+        Attend jusqu'à 'timeout' secondes, ou moins si de l'activité est signalée entre-temps.
+        """
+        if timeout > 0:
+            self.wake_up_event.wait(timeout)
+        self.wake_up_event.clear()
+
+    def get_metrics(self):
+        return {
+            'frame_rate': self.current_frame_rate,
+            'reason': self.current_reason,
+            'clock_jitter': self.clock_jitter,
+        }
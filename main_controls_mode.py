@@ -39,21 +39,18 @@ class MainControlsMode(definitions.PyshaMode):
 
         # Settings button, to toggle settings mode
         if self.app.is_mode_active(self.app.settings_mode):
-            self.push.buttons.set_button_color(SETTINGS_BUTTON, definitions.BLACK)
             self.push.buttons.set_button_color(SETTINGS_BUTTON, definitions.WHITE, animation=definitions.DEFAULT_ANIMATION)
         else:
             self.push.buttons.set_button_color(SETTINGS_BUTTON, definitions.OFF_BTN_COLOR)
 
         # Pyramid track triggering mode
         if self.app.is_mode_active(self.app.pyramid_track_triggering_mode):
-            self.push.buttons.set_button_color(PYRAMID_TRACK_TRIGGERING_BUTTON, definitions.BLACK)
             self.push.buttons.set_button_color(PYRAMID_TRACK_TRIGGERING_BUTTON, definitions.WHITE, animation=definitions.DEFAULT_ANIMATION)
         else:
             self.push.buttons.set_button_color(PYRAMID_TRACK_TRIGGERING_BUTTON, definitions.OFF_BTN_COLOR)
 
         # Preset selection mode
         if self.app.is_mode_active(self.app.preset_selection_mode):
-            self.push.buttons.set_button_color(PRESET_SELECTION_MODE_BUTTON, definitions.BLACK)
             self.push.buttons.set_button_color(PRESET_SELECTION_MODE_BUTTON, definitions.WHITE, animation=definitions.DEFAULT_ANIMATION)
         else:
             self.push.buttons.set_button_color(PRESET_SELECTION_MODE_BUTTON, definitions.OFF_BTN_COLOR)
@@ -61,7 +58,6 @@ class MainControlsMode(definitions.PyshaMode):
         # DDRM tone selector mode
         if self.app.ddrm_tone_selector_mode.should_be_enabled():
             if self.app.is_mode_active(self.app.ddrm_tone_selector_mode):
-                self.push.buttons.set_button_color(DDRM_TONE_SELECTION_MODE_BUTTON, definitions.BLACK)
                 self.push.buttons.set_button_color(DDRM_TONE_SELECTION_MODE_BUTTON, definitions.WHITE, animation=definitions.DEFAULT_ANIMATION)
             else:
                 self.push.buttons.set_button_color(DDRM_TONE_SELECTION_MODE_BUTTON, definitions.OFF_BTN_COLOR)
@@ -71,19 +67,19 @@ class MainControlsMode(definitions.PyshaMode):
     def on_button_pressed(self, button_name):
         if button_name == MELODIC_RHYTHMIC_TOGGLE_BUTTON:
             self.app.toggle_melodic_rhythmic_slice_modes()
-            self.app.pads_need_update = True
-            self.app.buttons_need_update = True
+            self.app.invalidate_pads()
+            self.app.invalidate_buttons()
             return True
         elif button_name == SETTINGS_BUTTON:
             print("DEBUG: Setup button pressed")
             self.app.toggle_and_rotate_settings_mode()
-            self.app.buttons_need_update = True
+            self.app.invalidate_buttons()
             return True
         elif button_name == TOGGLE_DISPLAY_BUTTON:
             self.app.use_push2_display = not self.app.use_push2_display
             if not self.app.use_push2_display:
                 self.push.display.send_to_display(self.push.display.prepare_frame(self.push.display.make_black_frame()))
-            self.app.buttons_need_update = True
+            self.app.invalidate_buttons()
             return True
         elif button_name == PYRAMID_TRACK_TRIGGERING_BUTTON:
             if self.app.is_mode_active(self.app.pyramid_track_triggering_mode):
@@ -94,7 +90,7 @@ class MainControlsMode(definitions.PyshaMode):
                 # Activate track triggering mode and store time button pressed
                 self.app.set_pyramid_track_triggering_mode()
                 self.pyramid_track_triggering_button_pressing_time = time.time()
-            self.app.buttons_need_update = True
+            self.app.invalidate_buttons()
             return True
         elif button_name == PRESET_SELECTION_MODE_BUTTON:
             if self.app.is_mode_active(self.app.preset_selection_mode):
@@ -105,12 +101,12 @@ class MainControlsMode(definitions.PyshaMode):
                 # Activate preset selection mode and store time button pressed
                 self.app.set_preset_selection_mode()
                 self.preset_selection_button_pressing_time = time.time()
-            self.app.buttons_need_update = True
+            self.app.invalidate_buttons()
             return True
         elif button_name == DDRM_TONE_SELECTION_MODE_BUTTON:
             if self.app.ddrm_tone_selector_mode.should_be_enabled():
                 self.app.toggle_ddrm_tone_selector_mode()
-                self.app.buttons_need_update = True
+                self.app.invalidate_buttons()
             return True
 
     def on_button_released(self, button_name):
@@ -130,7 +126,7 @@ class MainControlsMode(definitions.PyshaMode):
             if is_long_press:
                 # If long press, deactivate track triggering mode, else do nothing
                 self.app.unset_pyramid_track_triggering_mode()
-                self.app.buttons_need_update = True
+                self.app.invalidate_buttons()
 
             return True
 
@@ -150,6 +146,6 @@ class MainControlsMode(definitions.PyshaMode):
             if is_long_press:
                 # If long press, deactivate preset selection mode, else do nothing
                 self.app.unset_preset_selection_mode()
-                self.app.buttons_need_update = True
+                self.app.invalidate_buttons()
 
             return True
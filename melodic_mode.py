@@ -1,4 +1,5 @@
 import definitions
+import events
 import mido
 import push2_python.constants
 import time
@@ -8,7 +9,7 @@ class MelodicMode(definitions.PyshaMode):
 
     xor_group = 'pads'
 
-    notes_being_played = []
+    notes_being_played = []  # events.NoteOn, see add_note_being_played
     root_midi_note = 0  # default redefined in initialize
     scale_pattern = [True, False, True, False, True, True, False, True, False, True, False, True]
     fixed_velocity_mode = False
@@ -19,7 +20,7 @@ class MelodicMode(definitions.PyshaMode):
     poly_at_curve_bending = 50  # default redefined in initialize
     latest_channel_at_value = (0, 0)
     latest_poly_at_value = (0, 0)
-    latest_velocity_value = (0, 0)
+    latest_pad_press = None
     last_time_at_params_edited = None
     modulation_wheel_mode = False
 
@@ -53,6 +54,7 @@ class MelodicMode(definitions.PyshaMode):
             self.lumi_midi_out.send(msg)
    
     def initialize(self, settings=None):
+        self.latest_pad_press = events.PadPress()
         if settings is not None:
             self.use_poly_at = settings.get('use_poly_at', True)
             self.set_root_midi_note(settings.get('root_midi_note', 64))
@@ -112,11 +114,14 @@ class MelodicMode(definitions.PyshaMode):
         pow_curve = [pow(e, 3*self.poly_at_curve_bending/100) for e in [i/self.poly_at_max_range for i in range(0, self.poly_at_max_range)]]
         return [int(127 * pow_curve[i]) if i < self.poly_at_max_range else 127 for i in range(0, 128)]
 
-    def add_note_being_played(self, midi_note, source):
-        self.notes_being_played.append({'note': midi_note, 'source': source})
+    def add_note_being_played(self, midi_note, source, velocity=127):
+        # Appelé depuis plusieurs threads (MIDI IN de Push et des instruments) pendant que le thread runtime lit la liste :
+        # les événements ne sont pas recyclés et la liste est remplacée plutôt que modifiée
+        self.notes_being_played = self.notes_being_played + [events.NoteOn(midi_note, velocity, 0, source)]
 
     def remove_note_being_played(self, midi_note, source):
-        self.notes_being_played = [note for note in self.notes_being_played if note['note'] != midi_note or note['source'] != source]
+        self.notes_being_played = [note for note in self.notes_being_played
+                                   if not (note.note == midi_note and note.source == source)]
 
     def remove_all_notes_being_played(self):
         self.notes_being_played = []
@@ -134,7 +139,7 @@ class MelodicMode(definitions.PyshaMode):
 
     def is_midi_note_being_played(self, midi_note):
         for note in self.notes_being_played:
-            if note['note'] == midi_note:
+            if note.note == midi_note:
                 return True
         return False
 
@@ -191,10 +196,12 @@ class MelodicMode(definitions.PyshaMode):
             if msg.velocity == 0:
                 self.remove_note_being_played(msg.note, source)
             else:
-                self.add_note_being_played(msg.note, source)
+                self.add_note_being_played(msg.note, source, msg.velocity)
         elif msg.type == "note_off":
             self.remove_note_being_played(msg.note, source)
-        self.app.pads_need_update = True
+        else:
+            return
+        self.invalidate_pads(self.get_pads_ij_for_midi_note(msg.note))
 
     def update_octave_buttons(self):
         self.push.buttons.set_button_color(push2_python.constants.BUTTON_OCTAVE_DOWN, definitions.WHITE)
@@ -202,14 +209,12 @@ class MelodicMode(definitions.PyshaMode):
 
     def update_accent_button(self):
         if self.fixed_velocity_mode:
-            self.push.buttons.set_button_color(push2_python.constants.BUTTON_ACCENT, definitions.BLACK)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_ACCENT, definitions.WHITE, animation=definitions.DEFAULT_ANIMATION)
         else:
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_ACCENT, definitions.OFF_BTN_COLOR)
 
     def update_modulation_wheel_mode_button(self):
         if self.modulation_wheel_mode:
-            self.push.buttons.set_button_color(push2_python.constants.BUTTON_SHIFT, definitions.BLACK)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_SHIFT, definitions.WHITE, animation=definitions.DEFAULT_ANIMATION)
         else:
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_SHIFT, definitions.OFF_BTN_COLOR)
@@ -219,28 +224,46 @@ class MelodicMode(definitions.PyshaMode):
         self.update_modulation_wheel_mode_button()
         self.update_accent_button()
 
+    def update_buttons_subset(self, button_names):
+        if push2_python.constants.BUTTON_OCTAVE_UP in button_names or push2_python.constants.BUTTON_OCTAVE_DOWN in button_names:
+            self.update_octave_buttons()
+        if push2_python.constants.BUTTON_SHIFT in button_names:
+            self.update_modulation_wheel_mode_button()
+        if push2_python.constants.BUTTON_ACCENT in button_names:
+            self.update_accent_button()
+
+    def get_pad_color(self, pad_ij):
+        corresponding_midi_note = self.pad_ij_to_midi_note(pad_ij)
+        cell_color = definitions.WHITE
+        if self.is_black_key_midi_note(corresponding_midi_note):
+            cell_color = definitions.BLACK
+        if self.is_midi_note_root_octave(corresponding_midi_note):
+            try:
+                cell_color = self.app.track_selection_mode.get_current_track_color()
+            except AttributeError:
+                cell_color = definitions.YELLOW
+        if self.is_midi_note_being_played(corresponding_midi_note):
+            cell_color = definitions.NOTE_ON_COLOR
+        return cell_color
+
+    def get_pads_ij_for_midi_note(self, midi_note):
+        # A same note can be in several pads (e.g. in the melodic layout rows overlap)
+        return [(i, j) for i in range(0, 8) for j in range(0, 8) if self.pad_ij_to_midi_note((i, j)) == midi_note]
+
     def update_pads(self):
         color_matrix = []
         for i in range(0, 8):
             row_colors = []
             for j in range(0, 8):
-                corresponding_midi_note = self.pad_ij_to_midi_note([i, j])
-                cell_color = definitions.WHITE
-                if self.is_black_key_midi_note(corresponding_midi_note):
-                    cell_color = definitions.BLACK
-                if self.is_midi_note_root_octave(corresponding_midi_note):
-                    try:
-                        cell_color = self.app.track_selection_mode.get_current_track_color()
-                    except AttributeError:
-                        cell_color = definitions.YELLOW
-                if self.is_midi_note_being_played(corresponding_midi_note):
-                    cell_color = definitions.NOTE_ON_COLOR
-
-                row_colors.append(cell_color)
+                row_colors.append(self.get_pad_color((i, j)))
             color_matrix.append(row_colors)
 
         self.push.pads.set_pads_color(color_matrix)
 
+    def update_pads_region(self, pads_ij):
+        for pad_ij in pads_ij:
+            self.push.pads.set_pad_color(pad_ij, self.get_pad_color(pad_ij))
+
     # -----------------------------------------------------------
     # ### BLOCK-ROUTING ###
     # -----------------------------------------------------------
@@ -278,16 +301,16 @@ class MelodicMode(definitions.PyshaMode):
     def on_pad_pressed(self, pad_n, pad_ij, velocity):
         midi_note = self.pad_ij_to_midi_note(pad_ij)
         if midi_note is not None:
-            self.latest_velocity_value = (time.time(), velocity)
+            self.latest_pad_press.set(pad_n, pad_ij, velocity, time.time())
             if self.app.track_selection_mode.get_current_track_info().get('illuminate_local_notes', True) or self.app.notes_midi_in is None:
                 # illuminate_local_notes is used to decide wether a pad/key should be lighted when pressing it. This will probably be the default behaviour,
                 # but in synth definitions this can be disabled because we will be receiving back note events at the "notes_midi_in" device and in this
                 # case we don't want to light the pad "twice" (or if the note pressed gets processed and another note is actually played we don't want to
                 # light the currently presed pad). However, if "notes_midi_in" input is not configured, we do want to liht the pad as we won't have
                 # notes info comming from any other source
-                self.add_note_being_played(midi_note, 'push')
+                self.add_note_being_played(midi_note, 'push', velocity)
             msg = mido.Message('note_on', note=midi_note, velocity=velocity if not self.fixed_velocity_mode else 127)
-            selected_instrument = self.app.synth_window._selected_instrument
+            selected_instrument = self.app.get_selected_instrument()
 
             # On regarde si un nom de port OUT a été défini pour cet instrument
             out_name = None
@@ -302,7 +325,7 @@ class MelodicMode(definitions.PyshaMode):
                 self.app.send_midi(msg)
 
 
-            self.update_pads()  # Directly calling update pads method because we want user to feel feedback as quick as possible
+            self.update_pads_region(self.get_pads_ij_for_midi_note(midi_note))  # Directly updating the pads because we want user to feel feedback as quick as possible
             return True
 
     def on_pad_released(self, pad_n, pad_ij, velocity):
@@ -312,7 +335,7 @@ class MelodicMode(definitions.PyshaMode):
                 # see comment in "on_pad_pressed" above
                 self.remove_note_being_played(midi_note, 'push')
             msg = mido.Message('note_off', note=midi_note, velocity=velocity)
-            selected_instrument = self.app.synth_window._selected_instrument
+            selected_instrument = self.app.get_selected_instrument()
 
             # On regarde si un nom de port OUT a été défini pour cet instrument
             out_name = None
@@ -327,7 +350,7 @@ class MelodicMode(definitions.PyshaMode):
                 self.app.send_midi(msg)
 
 
-            self.update_pads()  # Directly calling update pads method because we want user to feel feedback as quick as possible
+            self.update_pads_region(self.get_pads_ij_for_midi_note(midi_note))  # Directly updating the pads because we want user to feel feedback as quick as possible
             return True
 
     def on_pad_aftertouch(self, pad_n, pad_ij, velocity):
@@ -341,7 +364,7 @@ class MelodicMode(definitions.PyshaMode):
             # channel AT mode
             self.latest_channel_at_value = (time.time(), velocity)
             msg = mido.Message('aftertouch', value=velocity)
-        selected_instrument = self.app.synth_window._selected_instrument
+        selected_instrument = self.app.get_selected_instrument()
 
         # On regarde si un nom de port OUT a été défini pour cet instrument
         out_name = None
@@ -363,7 +386,7 @@ class MelodicMode(definitions.PyshaMode):
             msg = mido.Message('control_change', control=1, value=value)
         else:
             msg = mido.Message('pitchwheel', pitch=value)
-        selected_instrument = self.app.synth_window._selected_instrument
+        selected_instrument = self.app.get_selected_instrument()
 
         # On regarde si un nom de port OUT a été défini pour cet instrument
         out_name = None
@@ -382,7 +405,7 @@ class MelodicMode(definitions.PyshaMode):
 
     def on_sustain_pedal(self, sustain_on):
         msg = mido.Message('control_change', control=64, value=127 if sustain_on else 0)
-        selected_instrument = self.app.synth_window._selected_instrument
+        selected_instrument = self.app.get_selected_instrument()
 
         # On regarde si un nom de port OUT a été défini pour cet instrument
         out_name = None
@@ -402,7 +425,7 @@ class MelodicMode(definitions.PyshaMode):
     def on_button_pressed(self, button_name):
         if button_name == push2_python.constants.BUTTON_OCTAVE_UP:
             self.set_root_midi_note(self.root_midi_note + 12)
-            self.app.pads_need_update = True
+            self.invalidate_pads()
             self.app.add_display_notification("Octave up: from {0} to {1}".format(
                 self.note_number_to_name(self.pad_ij_to_midi_note((7, 0))),
                 self.note_number_to_name(self.pad_ij_to_midi_note((0, 7))),
@@ -411,7 +434,7 @@ class MelodicMode(definitions.PyshaMode):
 
         elif button_name == push2_python.constants.BUTTON_OCTAVE_DOWN:
             self.set_root_midi_note(self.root_midi_note - 12)
-            self.app.pads_need_update = True
+            self.invalidate_pads()
             self.app.add_display_notification("Octave down: from {0} to {1}".format(
                 self.note_number_to_name(self.pad_ij_to_midi_note((7, 0))),
                 self.note_number_to_name(self.pad_ij_to_midi_note((0, 7))),
@@ -420,8 +443,7 @@ class MelodicMode(definitions.PyshaMode):
 
         elif button_name == push2_python.constants.BUTTON_ACCENT:
             self.fixed_velocity_mode = not self.fixed_velocity_mode
-            self.app.buttons_need_update = True
-            self.app.pads_need_update = True
+            self.invalidate_buttons([push2_python.constants.BUTTON_ACCENT])
             self.app.add_display_notification("Fixed velocity: {0}".format('On' if self.fixed_velocity_mode else 'Off'))
             return True
 
@@ -431,7 +453,7 @@ class MelodicMode(definitions.PyshaMode):
                 self.push.touchstrip.set_modulation_wheel_mode()
             else:
                 self.push.touchstrip.set_pitch_bend_mode()
-            self.app.buttons_need_update = True
+            self.invalidate_buttons([push2_python.constants.BUTTON_SHIFT])
             self.app.add_display_notification("Touchstrip mode: {0}".format('Modulation wheel' if self.modulation_wheel_mode else 'Pitch bend'))
             return True
 
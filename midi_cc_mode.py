@@ -2,6 +2,7 @@ import definitions
 import mido
 import push2_python
 import math
+import numpy
 import json
 import os
 import time
@@ -30,17 +31,10 @@ class MIDICCControl(object):
         self.get_color_func = get_color_func
         self.send_midi_func = send_midi_func
 
-    def draw(self, ctx, x_part):
+    def get_arc_geometry(self, x_part):
         margin_top = 25
         name_height = 20
-        show_text(ctx, x_part, margin_top, self.name, height=name_height, font_color=definitions.WHITE)
-
         val_height = 30
-        color = self.get_color_func()
-        show_text(ctx, x_part, margin_top + name_height,
-                  self.value_labels_map.get(str(self.value), str(self.value)), height=val_height, font_color=color)
-
-        ctx.save()
         circle_break_degrees = 80
         height = 55
         radius = height / 2
@@ -51,11 +45,16 @@ class MIDICCControl(object):
         end_rad = (90 - circle_break_degrees // 2) * (math.pi / 180)
         xc = x + radius + 3
         yc = y
+        return xc, yc, radius, start_rad, end_rad, circle_break_degrees
 
-        def get_rad_for_value(value):
-            total_degrees = 360 - circle_break_degrees
-            return start_rad + total_degrees * ((value - self.vmin) / (self.vmax - self.vmin)) * (math.pi / 180)
+    def draw_background(self, ctx, x_part):
+        # Static parts of the control (name and value arc background), see MIDICCMode.update_display_background
+        margin_top = 25
+        name_height = 20
+        show_text(ctx, x_part, margin_top, self.name, height=name_height, font_color=definitions.WHITE)
 
+        ctx.save()
+        xc, yc, radius, start_rad, end_rad, _ = self.get_arc_geometry(x_part)
         ctx.set_source_rgb(0, 0, 0)
         ctx.move_to(xc, yc)
         ctx.stroke()
@@ -63,6 +62,23 @@ class MIDICCControl(object):
         ctx.set_source_rgb(*definitions.get_color_rgb_float(definitions.GRAY_LIGHT))
         ctx.set_line_width(1)
         ctx.stroke()
+        ctx.restore()
+
+    def draw(self, ctx, x_part):
+        margin_top = 25
+        name_height = 20
+        val_height = 30
+        color = self.get_color_func()
+        show_text(ctx, x_part, margin_top + name_height,
+                  self.value_labels_map.get(str(self.value), str(self.value)), height=val_height, font_color=color)
+
+        ctx.save()
+        xc, yc, radius, start_rad, end_rad, circle_break_degrees = self.get_arc_geometry(x_part)
+
+        def get_rad_for_value(value):
+            total_degrees = 360 - circle_break_degrees
+            return start_rad + total_degrees * ((value - self.vmin) / (self.vmax - self.vmin)) * (math.pi / 180)
+
         ctx.arc(xc, yc, radius, start_rad, get_rad_for_value(self.value))
         ctx.set_source_rgb(*definitions.get_color_rgb_float(color))
         ctx.set_line_width(3)
@@ -95,6 +111,8 @@ class MIDICCMode(PyshaMode):
     instrument_midi_control_ccs = {}
     active_midi_control_ccs = []
     current_selected_section_and_page = {}
+    sampler_waveform_cache = None  # (cache_key, wave_path, bars_path), see _draw_sampler_waveform
+    has_display_background = True
 
     def initialize(self, settings=None):
         for instrument_short_name in self.get_all_distinct_instrument_short_names_helper():
@@ -208,7 +226,7 @@ class MIDICCMode(PyshaMode):
             result[1] = new_page
         self.current_selected_section_and_page[self.get_current_track_instrument_short_name_helper()] = result
         self.active_midi_control_ccs = self.get_midi_cc_controls_for_current_track_section_and_page()
-        self.app.buttons_need_update = True
+        self.invalidate_buttons()
 
     def get_should_show_midi_cc_next_prev_pages_for_section(self):
         all_section_controls = self.get_midi_cc_controls_for_current_track_and_section()
@@ -307,6 +325,8 @@ class MIDICCMode(PyshaMode):
           - trim_start / trim_end sous forme de barres verticales
           - ce qui est avant START et après END aplati (ligne au centre)
           - attack / release qui déforment le dessin à partir de START/END
+        Les pics par pixel viennent de la pyramide min/max du Sample ; les chemins
+        cairo sont gardés en cache tant qu'aucun paramètre du sample ne change.
         """
         sampler = getattr(self.app, "sampler", None)
         if sampler is None:
@@ -321,12 +341,6 @@ class MIDICCMode(PyshaMode):
         if data is None or data.shape[0] < 2:
             return
 
-        # Mono : on prend le premier canal
-        mono = data[:, 0]
-        n_frames = mono.shape[0]
-        if n_frames < 2:
-            return
-
         # Dimensions de l'écran Push 2
         display_w = push2_python.constants.DISPLAY_LINE_PIXELS
         display_h = push2_python.constants.DISPLAY_N_LINES
@@ -343,152 +357,153 @@ class MIDICCMode(PyshaMode):
         if height <= 0:
             return
 
-        center_y = top + height / 2.0
-        half_h = height / 2.0
-
         # Nettoyer la zone : fond noir
         ctx.save()
         ctx.set_source_rgb(0.0, 0.0, 0.0)
         ctx.rectangle(x0, top, region_width, height)
         ctx.fill()
 
+        cache_key = (id(sample), sample.trim_start, sample.trim_end, sample.attack_seconds, sample.release_seconds,
+                     sampler.sample_rate, x0, region_width, top, bottom)
+        if self.sampler_waveform_cache is None or self.sampler_waveform_cache[0] != cache_key:
+            self.sampler_waveform_cache = (cache_key, ) + self._build_sampler_waveform_paths(
+                ctx, sample, sampler.sample_rate, x0, region_width, top, bottom)
+        _, wave_path, bars_path = self.sampler_waveform_cache
+
+        ctx.set_source_rgb(*definitions.get_color_rgb_float(definitions.YELLOW))
+        ctx.new_path()
+        ctx.set_line_width(1.0)
+        ctx.append_path(wave_path)
+        ctx.stroke()
+        if bars_path is not None:
+            ctx.set_line_width(1.5)
+            ctx.append_path(bars_path)
+            ctx.stroke()
+
+        ctx.restore()
+
+    def _build_sampler_waveform_paths(self, ctx, sample, sample_rate, x0, region_width, top, bottom):
+        """
+        Calcule (avec numpy) l'onde avec trim + attack + release et renvoie les chemins cairo
+        (onde, barres START/END). Les barres valent None si le trim est incohérent.
+        """
+        n_frames = sample.num_frames
+        center_y = top + (bottom - top) / 2.0
+        half_h = (bottom - top) / 2.0
+
+        ctx.new_path()
+
         # Paramètres de trim et d'enveloppe
         trim_start = max(0.0, min(1.0, float(sample.trim_start)))
         trim_end = max(0.0, min(1.0, float(sample.trim_end)))
         if trim_end <= trim_start:
             # Trim incohérent => ligne plate
-            ctx.set_source_rgb(*definitions.get_color_rgb_float(definitions.YELLOW))
-            ctx.set_line_width(1.0)
             ctx.move_to(x0 + 0.5, center_y)
             ctx.line_to(x0 + region_width - 0.5, center_y)
-            ctx.stroke()
-            ctx.restore()
-            return
+            return ctx.copy_path(), None
 
         start_idx = int(trim_start * (n_frames - 1))
         end_idx = int(trim_end * (n_frames - 1))
         end_idx = max(end_idx, start_idx + 1)
 
-        attack_samples = max(1, int(sample.attack_seconds * sampler.sample_rate))
-        release_samples = max(1, int(sample.release_seconds * sampler.sample_rate))
-
-        # 1er passage : calcul des amplitudes + max pour normalisation
-        amplitudes = [0.0] * region_width
-        max_amp = 0.0
-
-        for x in range(region_width):
-            # t = position horizontale 0..1
-            if region_width > 1:
-                t = x / float(region_width - 1)
-            else:
-                t = 0.0
-
-            idx = int(t * (n_frames - 1))
-            idx = max(0, min(n_frames - 1, idx))
-
-            s = float(mono[idx])
+        attack_samples = max(1, int(sample.attack_seconds * sample_rate))
+        release_samples = max(1, int(sample.release_seconds * sample_rate))
 
-            # Envelope basée sur trim + attack + release
-            if idx < start_idx or idx > end_idx:
-                env = 0.0
-            else:
-                rel_from_start = idx - start_idx
-                rel_to_end = end_idx - idx
-
-                if attack_samples <= 1:
-                    attack_env = 1.0
-                else:
-                    attack_env = max(0.0, min(1.0, rel_from_start / float(attack_samples)))
-
-                if release_samples <= 1:
-                    release_env = 1.0
-                else:
-                    release_env = max(0.0, min(1.0, rel_to_end / float(release_samples)))
+        # Pic (valeur absolue) par pixel
+        peaks_min, peaks_max = sample.get_peaks(region_width)
+        peaks = numpy.maximum(numpy.abs(peaks_min), numpy.abs(peaks_max))
 
-                env = min(attack_env, release_env)
-
-            amp = abs(s * env)
-            amplitudes[x] = amp
-            if amp > max_amp:
-                max_amp = amp
+        # Envelope basée sur trim + attack + release, évaluée à l'index du sample correspondant à chaque pixel
+        idx = (numpy.arange(region_width) * (n_frames - 1)) // (region_width - 1)
+        if attack_samples <= 1:
+            attack_env = numpy.ones(region_width)
+        else:
+            attack_env = numpy.clip((idx - start_idx) / float(attack_samples), 0.0, 1.0)
+        if release_samples <= 1:
+            release_env = numpy.ones(region_width)
+        else:
+            release_env = numpy.clip((end_idx - idx) / float(release_samples), 0.0, 1.0)
+        env = numpy.minimum(attack_env, release_env)
+        env[(idx < start_idx) | (idx > end_idx)] = 0.0
 
-        # Si rien à afficher => simple ligne
-        ctx.set_source_rgb(*definitions.get_color_rgb_float(definitions.YELLOW))
-        ctx.set_line_width(1.0)
+        amplitudes = peaks * env
+        max_amp = float(amplitudes.max())
 
         if max_amp <= 1e-6:
+            # Rien à afficher => simple ligne
             ctx.move_to(x0 + 0.5, center_y)
             ctx.line_to(x0 + region_width - 0.5, center_y)
-            ctx.stroke()
-
-            # Barres START / END (pour que ce soit cohérent visuellement même si plat)
-            x_start = int((start_idx / float(n_frames - 1)) * (region_width - 1))
-            x_end = int((end_idx / float(n_frames - 1)) * (region_width - 1))
-
-            ctx.set_line_width(1.5)
-            # START
-            ctx.move_to(x0 + x_start + 0.5, top)
-            ctx.line_to(x0 + x_start + 0.5, bottom)
-            # END
-            ctx.move_to(x0 + x_end + 0.5, top)
-            ctx.line_to(x0 + x_end + 0.5, bottom)
-            ctx.stroke()
-
-            ctx.restore()
-            return
-
-        # 2e passage : tracé des deux courbes (haut et bas) → onde symétrique
-        # Haut
-        first_amp_norm = amplitudes[0] / max_amp
-        y_top0 = center_y - first_amp_norm * half_h
-        ctx.move_to(x0 + 0.5, y_top0)
-        for x in range(1, region_width):
-            amp_norm = amplitudes[x] / max_amp
-            y_top = center_y - amp_norm * half_h
-            ctx.line_to(x0 + x + 0.5, y_top)
-        ctx.stroke()
-
-        # Bas
-        first_amp_norm = amplitudes[0] / max_amp
-        y_bot0 = center_y + first_amp_norm * half_h
-        ctx.move_to(x0 + 0.5, y_bot0)
-        for x in range(1, region_width):
-            amp_norm = amplitudes[x] / max_amp
-            y_bot = center_y + amp_norm * half_h
-            ctx.line_to(x0 + x + 0.5, y_bot)
-        ctx.stroke()
+        else:
+            # Deux courbes (haut et bas) → onde symétrique
+            xs = (x0 + numpy.arange(region_width) + 0.5).tolist()
+            amp_norm = amplitudes * (half_h / max_amp)
+            for ys in [(center_y - amp_norm).tolist(), (center_y + amp_norm).tolist()]:
+                ctx.move_to(xs[0], ys[0])
+                for x, y in zip(xs[1:], ys[1:]):
+                    ctx.line_to(x, y)
+        wave_path = ctx.copy_path()
 
         # Barres START / END
+        ctx.new_path()
         x_start = int((start_idx / float(n_frames - 1)) * (region_width - 1))
         x_end = int((end_idx / float(n_frames - 1)) * (region_width - 1))
-
-        ctx.set_line_width(1.5)
         # START
         ctx.move_to(x0 + x_start + 0.5, top)
         ctx.line_to(x0 + x_start + 0.5, bottom)
         # END
         ctx.move_to(x0 + x_end + 0.5, top)
         ctx.line_to(x0 + x_end + 0.5, bottom)
-        ctx.stroke()
-
-        ctx.restore()
+        bars_path = ctx.copy_path()
+        ctx.new_path()
 
+        return wave_path, bars_path
 
-    def update_display(self, ctx, w, h):
 
+    def should_draw_midi_cc_display(self):
+        # If settings mode is active, don't draw the upper parts of the screen because settings page will
+        # "cover them". Same if session mode is showing the clip view
         session = getattr(self.app, "session_mode", None)
-
-        if (
+        return (
             not self.app.is_mode_active(self.app.settings_mode)
             and not (
                 session is not None
                 and self.app.is_mode_active(session)
                 and getattr(session, "clip_view_active", False)
             )
-        ):
+        )
 
-            # If settings mode is active, don't draw the upper parts of the screen because settings page will
-            # "cover them"
+    def get_sampler_waveform_note(self):
+        # --- CAS SPECIAL : SAMPLER + section "Param" ---
+        # Renvoie la note du sample dont l'onde remplace les 4 premiers contrôles, ou None
+        if not self.active_midi_control_ccs:
+            return None
+        instrument = self.get_current_track_instrument_short_name_helper()
+        selected_section, _ = self.get_currently_selected_midi_cc_section_and_page()
+        if instrument != "SAMPLER" or selected_section != "Param":
+            return None
+
+        # On détermine la note à partir du premier contrôle de la page
+        first_control = self.active_midi_control_ccs[0]
+        label = first_control.name  # ex: "SMP36 ATTACK"
+        parts = label.split(" ")
+        if parts and parts[0].startswith("SMP"):
+            try:
+                return int(parts[0].replace("SMP", ""))
+            except ValueError:
+                return None
+        return None
+
+    def get_background_version(self):
+        if not self.should_draw_midi_cc_display():
+            return (self.background_version, False)
+        selected_section, _ = self.get_currently_selected_midi_cc_section_and_page()
+        return (self.background_version, True, tuple(self.get_current_track_midi_cc_sections()[0:8]), selected_section,
+                self.get_current_track_color_helper(), tuple([id(control) for control in self.active_midi_control_ccs[0:8]]),
+                self.get_sampler_waveform_note())
+
+    def update_display_background(self, ctx, w, h):
+
+        if self.should_draw_midi_cc_display():
 
             # Draw MIDI CCs section names
             section_names = self.get_current_track_midi_cc_sections()[0:8]
@@ -512,31 +527,26 @@ class MIDICCMode(PyshaMode):
                     show_text(ctx, i, 0, section_name, height=height,
                               font_color=font_color, background_color=background_color)
 
-            # Draw MIDI CC controls
-            if self.active_midi_control_ccs:
-                instrument = self.get_current_track_instrument_short_name_helper()
-                selected_section, _ = self.get_currently_selected_midi_cc_section_and_page()
+            # Draw static parts of MIDI CC controls (sauf les 4 premiers si waveform sampler affichée)
+            sampler_wave_note = self.get_sampler_waveform_note()
+            for i in range(0, min(len(self.active_midi_control_ccs), 8)):
+                if sampler_wave_note is not None and i < 4:
+                    continue
+                self.active_midi_control_ccs[i].draw_background(ctx, i)
 
+    def update_display(self, ctx, w, h):
+
+        if self.should_draw_midi_cc_display():
+
+            # Draw MIDI CC controls (section names and static parts of the controls are drawn in update_display_background)
+            if self.active_midi_control_ccs:
+                sampler_wave_note = self.get_sampler_waveform_note()
                 sampler_wave_drawn = False
 
-                # --- CAS SPECIAL : SAMPLER + section "Param" ---
-                if instrument == "SAMPLER" and selected_section == "Param":
+                if sampler_wave_note is not None:
                     try:
-                        # On détermine la note à partir du premier contrôle de la page
-                        first_control = self.active_midi_control_ccs[0]
-                        label = first_control.name  # ex: "SMP36 ATTACK"
-                        parts = label.split(" ")
-                        note = None
-                        if parts and parts[0].startswith("SMP"):
-                            try:
-                                note = int(parts[0].replace("SMP", ""))
-                            except ValueError:
-                                note = None
-
-                        if note is not None:
-                            self._draw_sampler_waveform(ctx, note)
-                            sampler_wave_drawn = True
-
+                        self._draw_sampler_waveform(ctx, sampler_wave_note)
+                        sampler_wave_drawn = True
                     except Exception:
                         # En cas d'erreur, on ignore silencieusement et on garde le drawing normal
                         sampler_wave_drawn = False
@@ -547,6 +557,9 @@ class MIDICCMode(PyshaMode):
                     if sampler_wave_drawn and i < 4:
                         continue
                     try:
+                        if sampler_wave_note is not None and i < 4:
+                            # L'onde n'a pas pu être dessinée : les parties statiques ne sont pas dans le fond
+                            self.active_midi_control_ccs[i].draw_background(ctx, i)
                         self.active_midi_control_ccs[i].draw(ctx, i)
                     except IndexError:
                         continue
@@ -589,7 +602,7 @@ class MIDICCMode(PyshaMode):
                 session.clip_view_note_min = max(
                     0, min(127 - 12, session.clip_view_note_min + increment)
                 )
-                self.app.display_render_needed = True
+                self.invalidate_display()
                 return True
 
             # Track2 → scroll horizontal
@@ -598,25 +611,25 @@ class MIDICCMode(PyshaMode):
                 session.clip_view_start_step = max(
                     0, session.clip_view_start_step + increment * steps
                 )
-                self.app.display_render_needed = True
+                self.invalidate_display()
                 return True
 
             # Track3 → sélection note
             if encoder_name == push2_python.constants.ENCODER_TRACK3_ENCODER:
                 session.clip_view_select_event(1 if increment > 0 else -1)
-                self.app.display_render_needed = True
+                self.invalidate_display()
                 return True
 
             # Track4 → déplacement temporel
             if encoder_name == push2_python.constants.ENCODER_TRACK4_ENCODER:
                 session.clip_view_move_selected_in_time(increment)
-                self.app.display_render_needed = True
+                self.invalidate_display()
                 return True
 
             # Track5 → déplacement pitch
             if encoder_name == push2_python.constants.ENCODER_TRACK5_ENCODER:
                 session.clip_view_move_selected_in_pitch(increment)
-                self.app.display_render_needed = True
+                self.invalidate_display()
                 return True
 
 
@@ -757,8 +770,8 @@ class MIDICCMode(PyshaMode):
         self.active_midi_control_ccs = self.get_midi_cc_controls_for_current_track_section_and_page()
 
         # ---- 6) Rafraîchissement Push ----
-        self.app.buttons_need_update = True
-        self.app.display_render_needed = True
+        self.invalidate_buttons()
+        self.invalidate_display()
 
     def draw_clip_grid(self, ctx, clip_length, clip_events, playhead_step):
         """
@@ -793,7 +806,7 @@ class MIDICCMode(PyshaMode):
 
         # présence de notes
         for ev in clip_events:
-            start = ev.get("start")
+            start = ev.start
             if start is None:
                 continue
 
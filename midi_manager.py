@@ -94,6 +94,11 @@ class Synths_Midi:
         self._clock_thread_running = False
         self._await_first_tick = False
 
+        # Retard max (en secondes) des ticks de clock sur la dernière seconde complète, voir _clock_thread_loop
+        self.clock_jitter = 0.0
+        self._clock_lateness_window_max = 0.0
+        self._clock_lateness_window_start = 0.0
+
         self.bpm = 120.0
         self.clock_factor = 1.0
 
@@ -157,7 +162,7 @@ class Synths_Midi:
                 try:
                     # Nouveau système : routeur côté app
                     if hasattr(self.app, "midi_in_router"):
-                        self.app.midi_in_router(msg, name)
+                        self.app.dispatch_midi_in(self.app.midi_in_router, msg, name)
                     # Old fallback si jamais tu réutilises incoming_midi_callback ailleurs
                     elif self.incoming_midi_callback:
                         self.incoming_midi_callback(msg)
@@ -340,7 +345,7 @@ class Synths_Midi:
 
         seq_instr = None
         try:
-            seq_instr = getattr(self.app.sequencer_window, "sequencer_output_instrument", None)
+            seq_instr = getattr(self.app.sequencer_state, "sequencer_output_instrument", None)
         except:
             pass
 
@@ -349,8 +354,8 @@ class Synths_Midi:
 
     def _send_clock_message_to_outputs(self, msg):
         seq_instr = (
-            getattr(self.app.sequencer_window, "sequencer_output_instrument", None)
-            if hasattr(self.app, "sequencer_window")
+            getattr(self.app.sequencer_state, "sequencer_output_instrument", None)
+            if hasattr(self.app, "sequencer_state")
             else None
         )
         seq_norm = self._normalize(seq_instr)
@@ -395,8 +400,8 @@ class Synths_Midi:
         try:
             if hasattr(self.app, "sequencer_controller"):
                 self.app.sequencer_controller.current_step = -1
-            if hasattr(self.app, "sequencer_window"):
-                self.app.sequencer_window.current_step = -1
+            if hasattr(self.app, "sequencer_state"):
+                self.app.sequencer_state.current_step = -1
             print("[CLOCK] Sequencer current_step reset to -1 before START")
         except:
             pass
@@ -404,8 +409,17 @@ class Synths_Midi:
         # request START at first tick
         self._await_first_tick = True
 
+        # Mesure du jitter repartie de zéro (ne pas compter le retard de la session précédente ni l'arrêt)
+        self.clock_jitter = 0.0
+        self._clock_lateness_window_max = 0.0
+        self._clock_lateness_window_start = time.perf_counter()
+
         # start thread
         if self._clock_thread is None or not self._clock_thread_running:
+            # L'ancien thread finit son dernier tick et l'arrêt du séquenceur avant qu'un nouveau thread ne démarre
+            old_thread = self._clock_thread
+            if old_thread is not None and old_thread.is_alive() and old_thread is not threading.current_thread():
+                old_thread.join(1.0)
             self._clock_thread_running = True
             self._clock_thread = threading.Thread(
                 target=self._clock_thread_loop,
@@ -414,6 +428,9 @@ class Synths_Midi:
             self._clock_thread.start()
 
 
+    def is_clock_running(self):
+        return self._clock_thread_running
+
     def _clock_thread_loop(self):
         print("[CLOCK] clock thread started")
         next_tick_time = time.perf_counter()
@@ -431,6 +448,13 @@ class Synths_Midi:
 
             now = time.perf_counter()
             if now >= next_tick_time:
+                # Mesure du retard du tick (jitter), utilisé pour limiter le frame rate de l'app si besoin
+                self._clock_lateness_window_max = max(self._clock_lateness_window_max, now - next_tick_time)
+                if now - self._clock_lateness_window_start >= 1.0:
+                    self.clock_jitter = self._clock_lateness_window_max
+                    self._clock_lateness_window_max = 0.0
+                    self._clock_lateness_window_start = now
+
                 next_tick_time += tick_interval
 
                 # FIRST TICK → send start
@@ -459,19 +483,27 @@ class Synths_Midi:
 
             time.sleep(0.0005)
 
+        # Arrêt du séquenceur dans le thread de clock, après le dernier tick (note offs des notes encore tenues)
+        if self.clock_tick_callback:
+            try:
+                self.clock_tick_callback("stop")
+            except:
+                pass
+
         print("[CLOCK] clock thread stopped")
 
 
     def stop_clock(self):
         print("[CLOCK] stop_clock() called")
         self._clock_thread_running = False
+        self.clock_jitter = 0.0
 
         # reset sequencer again
         try:
             if hasattr(self.app, "sequencer_controller"):
                 self.app.sequencer_controller.current_step = -1
-            if hasattr(self.app, "sequencer_window"):
-                self.app.sequencer_window.current_step = -1
+            if hasattr(self.app, "sequencer_state"):
+                self.app.sequencer_state.current_step = -1
             print("[CLOCK] Sequencer current_step reset to -1 after STOP")
         except:
             pass
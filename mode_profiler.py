@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+
+import definitions
+
+
+# Methods of the modes which are timed when profiling is enabled
+PROFILED_MODE_METHODS = [
+    'update_display',
+    'update_display_background',
+    'update_pads',
+    'update_buttons',
+    'check_for_delayed_actions',
+    'on_pad_pressed',
+    'on_pad_released',
+    'on_encoder_rotated',
+    'on_button_pressed',
+    'on_midi_in',
+]
+
+
+class ModeProfiler(object):
+    """
+    Mesure le temps passé dans les méthodes de rendu et les handlers d'événements de chaque mode.
+
+    Quand le profiling est désactivé, les modes ne sont pas touchés (aucun coût). Quand il est activé,
+    les méthodes listées dans PROFILED_MODE_METHODS sont remplacées sur chaque instance de mode par
+    une version chronométrée. Les temps sont accumulés par fenêtre de definitions.MODE_PROFILING_WINDOW
+    secondes ; 'get_top' renvoie les méthodes qui ont pris le plus de temps sur la dernière fenêtre complète.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.profiled_modes = []
+        self.lock = threading.Lock()
+        self.current_window = {}
+        self.current_window_start = time.time()
+        self.last_window = {}
+        self.last_window_duration = definitions.MODE_PROFILING_WINDOW
+        self.window_index = 0
+
+    def enable(self, modes):
+        if self.enabled:
+            return
+        for mode in modes:
+            for method_name in PROFILED_MODE_METHODS:
+                method = getattr(mode, method_name, None)
+                if method is not None:
+                    setattr(mode, method_name, self.make_timed_method(mode, method_name, method))
+            self.profiled_modes.append(mode)
+        with self.lock:
+            self.current_window = {}
+            self.current_window_start = time.time()
+            self.last_window = {}
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled:
+            return
+        for mode in self.profiled_modes:
+            for method_name in PROFILED_MODE_METHODS:
+                # Removing the instance attribute makes the class method visible again
+                mode.__dict__.pop(method_name, None)
+        self.profiled_modes = []
+        self.enabled = False
+
+    def make_timed_method(self, mode, method_name, method):
+        key = '{0}.{1}'.format(mode.__class__.__name__, method_name)
+        perf_counter = time.perf_counter
+        record = self.record
+
+        def timed_method(*args, **kwargs):
+            start_time = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(key, perf_counter() - start_time)
+
+        return timed_method
+
+    def record(self, key, duration):
+        with self.lock:
+            stats = self.current_window.get(key, None)
+            if stats is None:
+                self.current_window[key] = [duration, 1, duration]
+            else:
+                stats[0] += duration
+                stats[1] += 1
+                if duration > stats[2]:
+                    stats[2] = duration
+
+    def check_window(self):
+        """
+        Termine la fenêtre en cours si elle a duré plus de definitions.MODE_PROFILING_WINDOW secondes.
+        Renvoie True si une nouvelle fenêtre a commencé (les résultats de 'get_top' ont changé).
+        """
+        now = time.time()
+        if now - self.current_window_start < definitions.MODE_PROFILING_WINDOW:
+            return False
+        with self.lock:
+            self.last_window = self.current_window
+            self.last_window_duration = now - self.current_window_start
+            self.current_window = {}
+            self.current_window_start = now
+            self.window_index += 1
+        return True
+
+    def get_top(self, n=definitions.MODE_PROFILING_TOP_N):
+        """
+        Renvoie les 'n' méthodes qui ont pris le plus de temps sur la dernière fenêtre, sous forme de
+        liste de dicts (temps total en ms par seconde, nombre d'appels, temps moyen et max en ms).
+        """
+        with self.lock:
+            window = dict(self.last_window)
+            duration = max(self.last_window_duration, 1e-6)
+        top = []
+        for key, (total, count, max_duration) in sorted(window.items(), key=lambda item: item[1][0], reverse=True)[0:n]:
+            top.append({
+                'name': key,
+                'ms_per_second': 1000.0 * total / duration,
+                'calls': count,
+                'avg_ms': 1000.0 * total / count,
+                'max_ms': 1000.0 * max_duration,
+            })
+        return top
+
+    def get_json(self, n=definitions.MODE_PROFILING_TOP_N):
+        return json.dumps({'window_seconds': self.last_window_duration, 'top': self.get_top(n)}, indent=2)
@@ -29,8 +29,8 @@ class PresetSelectionMode(definitions.PyshaMode):
 
     def new_track_selected(self):
         self.current_page = 0
-        self.app.pads_need_update = True
-        self.app.buttons_need_update = True
+        self.invalidate_pads()
+        self.invalidate_buttons()
     
     def add_favourite_preset(self, preset_number, bank_number):
         instrument_short_name = self.app.track_selection_mode.get_current_track_instrument_short_name() 
@@ -83,8 +83,8 @@ class PresetSelectionMode(definitions.PyshaMode):
             self.current_page += 1
         else:
             self.current_page = self.get_num_pages() - 1
-        self.app.pads_need_update = True
-        self.app.buttons_need_update = True
+        self.invalidate_pads()
+        self.invalidate_buttons()
         self.notify_status_in_display()
 
     def prev_page(self):
@@ -92,8 +92,8 @@ class PresetSelectionMode(definitions.PyshaMode):
             self.current_page -= 1
         else:
             self.current_page = 0
-        self.app.pads_need_update = True
-        self.app.buttons_need_update = True
+        self.invalidate_pads()
+        self.invalidate_buttons()
         self.notify_status_in_display()
 
     def has_prev_next_pages(self):
@@ -210,7 +210,7 @@ class PresetSelectionMode(definitions.PyshaMode):
                 preset_num + 1  # Show 1-indexed value
             ))
             
-        self.app.pads_need_update = True
+        self.invalidate_pads()
         return True  # Prevent other modes to get this event
 
     def on_button_pressed(self, button_name):
@@ -14,12 +14,14 @@ from .pads import Push2Pads, get_individual_pad_action_name
 from .buttons import Push2Buttons, get_individual_button_action_name
 from .encoders import Push2Encoders, get_individual_encoder_action_name
 from .touchstrip import Push2TouchStrip
+from .scheduler import Push2MIDIOutScheduler
 from .push2_map import push2_map
 from .constants import is_push_midi_in_port_name, is_push_midi_out_port_name, PUSH2_MAP_FILE_PATH, ACTION_BUTTON_PRESSED, \
     ACTION_BUTTON_RELEASED, ACTION_TOUCHSTRIP_TOUCHED, ACTION_PAD_PRESSED, ACTION_PAD_RELEASED, ACTION_PAD_AFTERTOUCH, \
     ACTION_ENCODER_ROTATED, ACTION_ENCODER_TOUCHED, ACTION_ENCODER_RELEASED, PUSH2_RECONNECT_INTERVAL, ACTION_DISPLAY_CONNECTED, \
-    ACTION_DISPLAY_DISCONNECTED, ACTION_MIDI_CONNECTED, ACTION_MIDI_DISCONNECTED, PUSH2_MIDI_ACTIVE_SENSING_MAX_INTERVAL, ACTION_SUSTAIN_PEDAL, \
-    MIDO_CONTROLCHANGE, PUSH2_SYSEX_PREFACE_BYTES, PUSH2_SYSEX_END_BYTES, DEFAULT_COLOR_PALETTE, DEFAULT_RGB_COLOR, DEFAULT_BW_COLOR
+    ACTION_DISPLAY_DISCONNECTED, ACTION_MIDI_CONNECTED, ACTION_MIDI_DISCONNECTED, PUSH2_MIDI_ACTIVE_SENSING_MAX_INTERVAL, PUSH2_MIDI_ACTIVE_SENSING_CHECK_INTERVAL, ACTION_SUSTAIN_PEDAL, \
+    MIDO_CONTROLCHANGE, PUSH2_SYSEX_PREFACE_BYTES, PUSH2_SYSEX_END_BYTES, DEFAULT_COLOR_PALETTE, DEFAULT_RGB_COLOR, DEFAULT_BW_COLOR, \
+    MIDI_OUT_PRIORITY_FEEDBACK, MIDI_OUT_PRIORITY_BULK, MIDI_OUT_DEFAULT_MESSAGES_PER_MS, MIDI_OUT_DEFAULT_MAX_BURST
 
 from .simulator.simulator import start_simulator
 
@@ -44,6 +46,13 @@ class Push2(object):
     last_active_sensing_received = None
     function_call_interval_limit_overwrite = PUSH2_RECONNECT_INTERVAL
     color_palette = DEFAULT_COLOR_PALETTE.copy()
+    rgb_color_palette_index = None
+    bw_color_palette_index = None
+    indexed_color_palette = None
+    current_device_state = dict()
+    pending_device_state = dict()
+    midi_out_scheduler = None
+    midi_in_dispatcher = None
     simulator_controller = None
 
 
@@ -57,6 +66,8 @@ class Push2(object):
         """
 
         self.use_user_midi_port = use_user_midi_port
+        self.current_device_state = dict()
+        self.pending_device_state = dict()
 
         # Load Push2 map from JSON file provided in Push2's interface doc
         # https://github.com/Ableton/push-interface/blob/master/doc/Push2-map.json
@@ -79,29 +90,13 @@ class Push2(object):
         # Start thread that will continuously check whether the last "active sensing" MIDI message from
         # push was received. If active sensing messages stop, will set midi ports to None and trigger
         # a "midi disconnected" action
-        def check_active_sensing(f_stop):
-            if self.last_active_sensing_received is not None:
-                if time.time() - self.last_active_sensing_received > PUSH2_MIDI_ACTIVE_SENSING_MAX_INTERVAL:
-                    '''
-                    # Don't set midi port connections to None because if these were ever initialized, will remain
-                    # active once Push2 MIDI comes back (e.g. after Push2 reset) and we will start receiving again
-                    # active sensing messages (and will be able to re-trigger "push midi connected" message without
-                    # actively continuously checking for MIDI connection using some sort of polling strategy.
-                    if self.midi_is_configured():
-                        if self.midi_in_port is not None:
-                            self.midi_in_port.close()
-                            self.midi_in_port = None
-                        if self.midi_out_port is not None:
-                            self.midi_out_port.close()
-                            self.midi_out_port = None
-                    '''
-                    self.trigger_action(ACTION_MIDI_DISCONNECTED)
-                    self.last_active_sensing_received = None
+        def check_active_sensing_periodically(f_stop):
+            self.check_active_sensing()
             if not f_stop.is_set():
-                threading.Timer(0.3, check_active_sensing, [f_stop]).start()  # Run this check every 300 ms
+                threading.Timer(PUSH2_MIDI_ACTIVE_SENSING_CHECK_INTERVAL, check_active_sensing_periodically, [f_stop]).start()
 
         self.f_stop = threading.Event()
-        check_active_sensing(self.f_stop)
+        check_active_sensing_periodically(self.f_stop)
 
         # Initialize simulator (if requested)
         if run_simulator:
@@ -109,22 +104,50 @@ class Push2(object):
 
 
     def stop_active_sensing_thread(self):
+        """Stops the periodic active sensing check. Use this if 'check_active_sensing' is to be called periodically
+        from somewhere else (e.g. from an event loop).
+        """
         self.f_stop.set()
 
+    def check_active_sensing(self):
+        """Checks whether the last "active sensing" MIDI message from Push was received less than
+        PUSH2_MIDI_ACTIVE_SENSING_MAX_INTERVAL seconds ago. If not, triggers a "midi disconnected" action.
+        By default this is called every PUSH2_MIDI_ACTIVE_SENSING_CHECK_INTERVAL seconds from a timer thread.
+        """
+        if self.last_active_sensing_received is not None:
+            if time.time() - self.last_active_sensing_received > PUSH2_MIDI_ACTIVE_SENSING_MAX_INTERVAL:
+                '''
+                # Don't set midi port connections to None because if these were ever initialized, will remain
+                # active once Push2 MIDI comes back (e.g. after Push2 reset) and we will start receiving again
+                # active sensing messages (and will be able to re-trigger "push midi connected" message without
+                # actively continuously checking for MIDI connection using some sort of polling strategy.
+                if self.midi_is_configured():
+                    if self.midi_in_port is not None:
+                        self.midi_in_port.close()
+                        self.midi_in_port = None
+                    if self.midi_out_port is not None:
+                        self.midi_out_port.close()
+                        self.midi_out_port = None
+                '''
+                self.trigger_action(ACTION_MIDI_DISCONNECTED)
+                self.last_active_sensing_received = None
+
 
     def set_push2_reconnect_call_interval(self, new_interval):
         self.function_call_interval_limit_overwrite = new_interval
         self.display.function_call_interval_limit_overwrite = new_interval
 
 
-    def trigger_action(self, *args, **kwargs):
-        action_name = args[0]
-        new_args = [self]
-        if len(args) > 1:
-            new_args += list(args[1:])
-        for action, func in action_handler_registry.items():
-            if action == action_name:
-                func[0](*new_args, **kwargs)  # TODO: why is func a 1-element list?
+    def trigger_action(self, action_name, *args, **kwargs):
+        """Calls all the handlers registered for the given action (see 'action_handler') with the Push2 object instance
+        as first argument followed by the given 'args'. Handlers are looked up directly in 'action_handler_registry'
+        so the cost of triggering an action does not depend on the number of registered actions. Individual action
+        names for pads, buttons and encoders are precomputed in each section (see 'get_individual_*_action_name').
+        """
+        handlers = action_handler_registry.get(action_name, None)
+        if handlers:
+            for func in handlers:
+                func(self, *args, **kwargs)
 
 
     @function_call_interval_limit(PUSH2_RECONNECT_INTERVAL)
@@ -183,7 +206,7 @@ class Push2(object):
                 # Disable Active Sense message filtering so we can receive those messages comming from Push and
                 # detect if Push MIDI gets disconnected
                 self.midi_in_port._rt.ignore_types(False, False, False)
-                self.midi_in_port.callback = self.on_midi_message
+                self.midi_in_port.callback = self.receive_midi_message
             except OSError as e:
                 raise Push2MIDIeviceNotFound
 
@@ -211,16 +234,139 @@ class Push2(object):
         return self.midi_in_port is not None and self.midi_out_port is not None
 
 
-    def send_midi_to_push(self, msg):
+    def send_midi_to_push(self, msg, priority=MIDI_OUT_PRIORITY_FEEDBACK, coalesce_key=None):
+        """Sends a MIDI message to Push. If the MIDI out scheduler is enabled (see 'enable_midi_out_scheduler'), the message is
+        scheduled with the given 'priority' and 'coalesce_key' instead of being sent right away.
+        """
+        self.send_midi_messages_to_push([msg], priority=priority, coalesce_key=coalesce_key)
+
+    def send_midi_messages_to_push(self, msgs, priority=MIDI_OUT_PRIORITY_FEEDBACK, coalesce_key=None):
+        """Sends a batch of MIDI messages to Push. If the MIDI out scheduler is enabled (see 'enable_midi_out_scheduler'),
+        messages are scheduled with the given 'priority' (one of push2_python.constants.MIDI_OUT_PRIORITY_*) and 'coalesce_key'.
+        Otherwise they are sent right away.
+        """
+        if not msgs:
+            return
+        if self.midi_out_scheduler is not None:
+            self.midi_out_scheduler.schedule(msgs, priority=priority, coalesce_key=coalesce_key)
+        else:
+            self.write_midi_messages_to_push(msgs)
+
+    def send_midi_message_groups_to_push(self, groups, priority=MIDI_OUT_PRIORITY_FEEDBACK):
+        """Sends several groups of MIDI messages to Push. 'groups' must be a list of (coalesce_key, msgs) tuples, typically with one group
+        of messages per LED. If the MIDI out scheduler is enabled, each group is scheduled with its own 'coalesce_key'. Otherwise all
+        messages are sent right away in a single batch.
+        """
+        if not groups:
+            return
+        if self.midi_out_scheduler is not None:
+            for coalesce_key, msgs in groups:
+                self.midi_out_scheduler.schedule(msgs, priority=priority, coalesce_key=coalesce_key)
+        else:
+            self.write_midi_messages_to_push([msg for _, msgs in groups for msg in msgs])
 
+    def write_midi_messages_to_push(self, msgs):
+        """Writes a batch of MIDI messages to Push MIDI out port. MIDI configuration is checked only once for the whole batch
+        and messages are written back to back to the MIDI out port. Returns True if the messages were written.
+        """
         # If MIDI is not configured, configure it now
         if not self.midi_is_configured():
             self.configure_midi()
 
-        # If MIDI out was properly configured, send the MIDI message
-        if self.midi_out_port is not None:
-            self.midi_out_port.send(msg)
+        # If MIDI out was properly configured, send all MIDI messages
+        midi_out_port = self.midi_out_port
+        if midi_out_port is None:
+            return False
+        for msg in msgs:
+            midi_out_port.send(msg)
+        return True
+
+    def enable_midi_out_scheduler(self, messages_per_ms=MIDI_OUT_DEFAULT_MESSAGES_PER_MS, max_burst=MIDI_OUT_DEFAULT_MAX_BURST):
+        """Makes all MIDI messages sent to Push go through a scheduler which sends them from a dedicated thread in order of priority
+        (immediate feedback, then transport, then bulk/sysex), limited to 'messages_per_ms' messages per millisecond (with bursts
+        of up to 'max_burst' messages), and coalescing writes to the same LED which are still waiting to be sent.
+        See push2_python.scheduler.Push2MIDIOutScheduler.
+        """
+        if self.midi_out_scheduler is None:
+            self.midi_out_scheduler = Push2MIDIOutScheduler(self, messages_per_ms=messages_per_ms, max_burst=max_burst)
+        else:
+            self.midi_out_scheduler.messages_per_ms = messages_per_ms
+            self.midi_out_scheduler.max_burst = max_burst
+
+    def disable_midi_out_scheduler(self):
+        if self.midi_out_scheduler is not None:
+            self.midi_out_scheduler.stop()
+            self.midi_out_scheduler = None
+
+    def send_config_to_push(self, config_key, config_value, msgs):
+        """Sends the given batch of (typically sysex) configuration MIDI messages to Push unless the stored device state says that
+        the configuration identified by 'config_key' is already set to 'config_value'. This is used to avoid re-sending configuration
+        which is already in effect (e.g. aftertouch mode, velocity curve or touchstrip mode), so that calling configuration methods
+        repeatedly (e.g. when switching modes) does not generate MIDI traffic. Returns True if messages were sent (or scheduled).
+
+        The device state is only stored once the messages have actually been written to Push. With the MIDI out scheduler, this happens
+        in the scheduler thread: if the messages are coalesced by a newer configuration for the same key, or can't be written (e.g. Push
+        disconnected), the state is not stored and the configuration will be sent again next time.
+        """
+        if self.current_device_state.get(config_key, None) == config_value:
+            return False
+        if self.midi_out_scheduler is not None:
+            # Only the latest configuration scheduled for a given key (see 'invalidate_device_state') is stored when written
+            token = object()
+            self.pending_device_state[config_key] = token
+
+            def on_sent():
+                if self.pending_device_state.get(config_key, None) is token:
+                    del self.pending_device_state[config_key]
+                    self.current_device_state[config_key] = config_value
+
+            self.midi_out_scheduler.schedule(msgs, priority=MIDI_OUT_PRIORITY_BULK, coalesce_key=config_key, on_sent=on_sent)
+            return True
+        if not self.write_midi_messages_to_push(msgs):
+            # Messages could not be sent, don't store the configuration so it is sent again next time
+            return False
+        self.current_device_state[config_key] = config_value
+        return True
+
+    def invalidate_device_state(self, config_key):
+        """Forgets the stored device state for 'config_key' (including a configuration scheduled but not yet written) so that the
+        next call to 'send_config_to_push' for that key sends the configuration again.
+        """
+        self.pending_device_state.pop(config_key, None)
+        self.current_device_state.pop(config_key, None)
 
+    def reset_current_device_state(self):
+        """This function resets the stored Push device configuration state (see 'send_config_to_push') so that the next calls to
+        configuration methods will send the configuration to Push again. Configuration scheduled before the reset and written after
+        it is not stored.
+        """
+        self.pending_device_state = dict()
+        self.current_device_state = dict()
+
+    def reset_current_state(self):
+        """Resets all stored state (pads, buttons and device configuration) so that Push2 does not become out of sync with the
+        state stored in the Push2 python object. This is automatically called when MIDI connection with Push is established.
+        """
+        self.pads.reset_current_pads_state()
+        self.buttons.reset_current_buttons_state()
+        self.reset_current_device_state()
+
+    def set_midi_in_dispatcher(self, dispatcher):
+        """Sets a function used to hand over incoming MIDI messages from the thread of the MIDI in port to another
+        thread or event loop. The dispatcher is called as 'dispatcher(handler, message)' and must eventually call
+        'handler(message)'. Use None to handle messages directly in the thread of the MIDI in port (default).
+        """
+        self.midi_in_dispatcher = dispatcher
+
+    def receive_midi_message(self, message):
+        """Callback of the MIDI in port. Messages are handled right away or passed to the dispatcher
+        set with 'set_midi_in_dispatcher'.
+        """
+        dispatcher = self.midi_in_dispatcher
+        if dispatcher is not None:
+            dispatcher(self.on_midi_message, message)
+        else:
+            self.on_midi_message(message)
 
     def on_midi_message(self, message):
         """Handle incomming MIDI messages from Push.
@@ -232,7 +378,7 @@ class Push2(object):
             self.last_active_sensing_received = current_time
             if active_sensing_was_none:
                 # Means this is first active_sensing received message (possibly after Push2 restart) and therefore initial MIDI setup (if any) should be done
-                self.pads.reset_current_pads_state()  # Reset stored pads state (if any) to avoid messages not being sent because of state
+                self.reset_current_state()  # Reset stored pads, buttons and device state (if any) to avoid messages not being sent because of state
                 self.trigger_action(ACTION_MIDI_CONNECTED)
                 self.last_action_midi_connection_action_triggered = current_time
         else:
@@ -272,6 +418,7 @@ class Push2(object):
         palette.
 
         Note that changes in the Push color palete using this method won't become active until method 'reapply_color_palette' is called.
+        If the palette entry in Push already has the given color values, no MIDI message is sent (see 'send_config_to_push').
 
         Examples:
 
@@ -303,8 +450,9 @@ class Push2(object):
             color_names = color_name
 
         if not allow_overwrite:
-            assert color_names[0] not in [rgb_color_name for rgb_color_name, _ in self.color_palette.values()], 'A color with name "{0}" for RGB palette already exists'.format(color_names[0])
-            assert color_names[1] not in [bw_color_name for _, bw_color_name in self.color_palette.values()], 'A color with name "{0}" for BW palette already exists'.format(color_names[1])
+            self.check_color_palette_indexes()
+            assert color_names[0] not in self.rgb_color_palette_index, 'A color with name "{0}" for RGB palette already exists'.format(color_names[0])
+            assert color_names[1] not in self.bw_color_palette_index, 'A color with name "{0}" for BW palette already exists'.format(color_names[1])
 
         def check_color_range(c):
             # If color is float, map it to [0..255], also check range is inside [0..255]
@@ -339,10 +487,13 @@ class Push2(object):
         white_bytes = [w % 128, w // 128]
         message_bytes = PUSH2_SYSEX_PREFACE_BYTES + [0x03] + [color_idx] + red_bytes + green_bytes + blue_bytes + white_bytes + PUSH2_SYSEX_END_BYTES
         msg = mido.Message.from_bytes(message_bytes)
-        self.send_midi_to_push(msg)
+        if self.send_config_to_push(('color_palette_entry', color_idx), (r, g, b, w), [msg]):
+            # Palette entry changed in Push, it will need to be re-applied for the change to become visible
+            self.invalidate_device_state('color_palette_applied')
 
         # Update self.color_palette with given color names (first one for rgb, second one for bw)
         self.color_palette[color_idx] = color_names
+        self.update_color_palette_indexes()
 
         # Update color in simulator (if it is being run...)
         if self.simulator_controller is not None:
@@ -363,41 +514,76 @@ class Push2(object):
             # Apply the changes in Push
             reapply_color_palette()
         """
-        idx = None
-        for color_idx, (rgb_color_name, _) in self.color_palette.items():
-            if color_name == rgb_color_name:
-                idx = color_idx
+        self.check_color_palette_indexes()
+        idx = self.rgb_color_palette_index.get(color_name, None)
         assert idx is not None, 'No color with name {0} is in RGB color palette'.format(color_name)
         self.set_color_palette_entry(idx, color_name, rgb=rgb, allow_overwrite=True)
 
 
+    def clear_color_palette(self):
+        """Removes all entries from the color palette used by the Push2 python object. This is useful before configuring a fully
+        custom palette with 'set_color_palette_entry'. Note that this does not send anything to Push.
+        """
+        self.color_palette = {}
+        self.update_color_palette_indexes()
+
+
+    def update_color_palette_indexes(self):
+        """Rebuilds the name-to-index lookup tables for the RGB and BW palettes from the current contents of 'color_palette'.
+        If the same color name is used in several palette entries, the first entry (in palette order) is used.
+        This is called automatically by 'set_color_palette_entry' and 'clear_color_palette'. It only needs to be called manually
+        if 'color_palette' is modified in place.
+        """
+        rgb_index = {}
+        bw_index = {}
+        for color_idx, (rgb_color_name, bw_color_name) in self.color_palette.items():
+            rgb_index.setdefault(rgb_color_name, color_idx)
+            bw_index.setdefault(bw_color_name, color_idx)
+        self.rgb_color_palette_index = rgb_index
+        self.bw_color_palette_index = bw_index
+        self.indexed_color_palette = self.color_palette
+
+
+    def check_color_palette_indexes(self):
+        # Rebuild lookup tables if 'color_palette' was replaced by a new dictionary since they were last built
+        if self.indexed_color_palette is not self.color_palette:
+            self.update_color_palette_indexes()
+
+
     def get_rgb_color(self, color_name):
         """Get correpsonding color index of the color palette for a RGB color name.
         If color is not found, the default RGB index value will be returned.
+        If 'color_name' is already a color index (int), it is returned as is. This allows code in hot paths to resolve
+        color names once (using this same method) and then pass color indexes to methods like 'set_pad_color'
+        or 'set_button_color' to skip name lookups.
         """
-        for color_idx, (rgb_color_name, _) in self.color_palette.items():
-            if color_name == rgb_color_name:
-                return color_idx
-        return DEFAULT_RGB_COLOR
+        if type(color_name) == int:
+            return color_name
+        if self.indexed_color_palette is not self.color_palette:
+            self.update_color_palette_indexes()
+        return self.rgb_color_palette_index.get(color_name, DEFAULT_RGB_COLOR)
 
 
     def get_bw_color(self, color_name):
         """Get correpsonding color index of the color palette for a BW color name.
         If color is not found, the default BW index value will be returned.
+        If 'color_name' is already a color index (int), it is returned as is (see 'get_rgb_color').
         """
-        for color_idx, (_, bw_color_name) in self.color_palette.items():
-            if color_name == bw_color_name:
-                return color_idx
-        return DEFAULT_BW_COLOR
+        if type(color_name) == int:
+            return color_name
+        if self.indexed_color_palette is not self.color_palette:
+            self.update_color_palette_indexes()
+        return self.bw_color_palette_index.get(color_name, DEFAULT_BW_COLOR)
 
     def reapply_color_palette(self):
         """This method sends a sysex message to Push to make it update the colors of all pads and buttons according to the color palette entries
-        that have been updated using the 'set_color_palette_entry' method.
+        that have been updated using the 'set_color_palette_entry' method. Nothing is sent if no palette entry changed since the last time
+        the palette was applied.
         See https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#262-rgb-led-color-processing
         """
         message_bytes =  PUSH2_SYSEX_PREFACE_BYTES + [0x05] + PUSH2_SYSEX_END_BYTES
         msg = mido.Message.from_bytes(message_bytes)
-        self.send_midi_to_push(msg)
+        self.send_config_to_push('color_palette_applied', True, [msg])
 
     def display_is_configured(self):
         """Returns True if communication with Push2 display is properly configured, False otherwise
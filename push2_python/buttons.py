@@ -1,5 +1,6 @@
 import mido
-from .constants import ANIMATION_DEFAULT, MIDO_CONTROLCHANGE, ACTION_BUTTON_PRESSED, ACTION_BUTTON_RELEASED, ANIMATION_STATIC
+from .constants import ANIMATION_DEFAULT, MIDO_CONTROLCHANGE, ACTION_BUTTON_PRESSED, ACTION_BUTTON_RELEASED, ANIMATION_STATIC, \
+    MIDI_OUT_PRIORITY_FEEDBACK, MIDI_OUT_PRIORITY_BULK
 from .classes import AbstractPush2Section
 
 
@@ -15,12 +16,29 @@ class Push2Buttons(AbstractPush2Section):
     button_map = None
     button_names_index = None
     button_names_list = None
+    button_action_names = None
+    current_buttons_state = dict()
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.current_buttons_state = dict()
         self.button_map = {data['Number']: data for data in self.push.push2_map['Parts']['Buttons']}
         self.button_names_index = {data['Name']: data['Number'] for data in self.push.push2_map['Parts']['Buttons']}
         self.button_names_list = list(self.button_names_index.keys())
+        # Precompute (button name, individual pressed action name, individual released action name) for each button so
+        # incoming MIDI messages can be dispatched without string formatting
+        self.button_action_names = {data['Number']: (
+            data['Name'],
+            get_individual_button_action_name(ACTION_BUTTON_PRESSED, data['Name']),
+            get_individual_button_action_name(ACTION_BUTTON_RELEASED, data['Name'])
+        ) for data in self.push.push2_map['Parts']['Buttons']}
+
+    def reset_current_buttons_state(self):
+        """This function resets the stored buttons state to avoid Push2 buttons becoming out of sync with the push2-midi stored state.
+        This only applies if "optimize_num_messages" is used in "set_button_color" as it would stop sending a message if the
+        desired color is already the one listed in the internal state.
+        """
+        self.current_buttons_state = dict()
 
     @property
     def available_names(self):
@@ -33,35 +51,79 @@ class Push2Buttons(AbstractPush2Section):
         """
         return self.button_names_index.get(button_name, None)
 
-    def set_button_color(self, button_name, color='white', animation=ANIMATION_DEFAULT, animation_end_color='black'):
+    def set_button_color(self, button_name, color='white', animation=ANIMATION_DEFAULT, animation_end_color='black', optimize_num_messages=True):
         """Sets the color of the button with given name.
         'color' must be a valid RGB or BW color name present in the color palette. See push2_python.constants.DEFAULT_COLOR_PALETTE for default color names.
         If the button only acceps BW colors, the color name will be matched against the BW palette, otherwise it will be matched against RGB palette.
+        Colors can also be given as color palette indexes (see 'Push2.get_rgb_color') to skip color name lookups.
         'animation' must be a valid animation name from those defined in push2_python.contants.ANIMATION_*.  Note that to configure an animation, both 
         the 'start' and 'end' colors of the animation need to be defined. The 'start' color is defined by 'color' parameter. The 'end' color is defined 
         by the color specified in 'animation_end_color', which must be a valid RGB color name present in the color palette.
+
+        This funtion will keep track of the latest color/animation values set for each specific button. If 'optimize_num_messages' is 
+        set to True, set_button_color will only actually send the MIDI message to push if either the color or animation that should 
+        be set differ from those stored in the state.
         See https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#setting-led-colors
         """
-        button_n = self.button_name_to_button_n(button_name)
-        if button_n is not None:
-            button = self.button_map[button_n]
-            if button['Color']:
-                color_idx = self.push.get_rgb_color(color)
-                black_color_idx = self.push.get_rgb_color(animation_end_color)
+        msgs = self.make_button_color_messages(button_name, color, animation, animation_end_color, optimize_num_messages)
+        self.push.send_midi_messages_to_push(msgs, coalesce_key=('button', button_name))
+
+    def set_buttons_color(self, buttons_colors, optimize_num_messages=True, priority=MIDI_OUT_PRIORITY_FEEDBACK):
+        """Sets the color of several buttons at once and sends all the needed MIDI messages to Push in a single batch.
+        'buttons_colors' must be a dictionary with button names as keys and colors as values. Values can also be tuples
+        of the form (color, animation) or (color, animation, animation_end_color). See 'set_button_color' for details about
+        colors and animations. Buttons whose color and animation are already those stored in the state do not generate
+        any MIDI message (unless 'optimize_num_messages' is set to False). 'priority' is used if the MIDI out scheduler is enabled
+        (see 'Push2.enable_midi_out_scheduler').
+        See https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#setting-led-colors
+        """
+        groups = []
+        for button_name, element in buttons_colors.items():
+            animation = ANIMATION_DEFAULT
+            animation_end_color = 'black'
+            if type(element) == tuple:
+                if len(element) == 3:
+                    color, animation, animation_end_color = element
+                else:
+                    color, animation = element
             else:
-                color_idx = self.push.get_bw_color(color)
-                black_color_idx = self.push.get_bw_color(animation_end_color)
-            if animation != ANIMATION_STATIC:
-                # If animation is not static, we first set the button to black color with static animation so then, when setting
-                # the desired color with the corresponding animation it lights as expected.
-                # This behaviour should be furhter investigated as this could maybe be optimized.
-                msg = mido.Message(MIDO_CONTROLCHANGE, control=button_n, value=black_color_idx, channel=ANIMATION_STATIC)
-                self.push.send_midi_to_push(msg)
-            msg = mido.Message(MIDO_CONTROLCHANGE, control=button_n, value=color_idx, channel=animation)
-            self.push.send_midi_to_push(msg)
-
-            if self.push.simulator_controller is not None:
-                self.push.simulator_controller.set_element_color('cc' + str(button_n), color_idx, animation)
+                color = element
+            msgs = self.make_button_color_messages(button_name, color, animation, animation_end_color, optimize_num_messages)
+            if msgs:
+                groups.append((('button', button_name), msgs))
+        self.push.send_midi_message_groups_to_push(groups, priority=priority)
+
+    def make_button_color_messages(self, button_name, color, animation, animation_end_color, optimize_num_messages=True):
+        """Returns the list of MIDI messages needed to set the color of the button with given name and updates the stored
+        buttons state accordingly. If the button does not exist or 'optimize_num_messages' is set to True and the button
+        already has the requested color and animation, an empty list is returned.
+        """
+        button_n = self.button_name_to_button_n(button_name)
+        if button_n is None:
+            return []
+        button = self.button_map[button_n]
+        if button['Color']:
+            color_idx = self.push.get_rgb_color(color)
+            black_color_idx = self.push.get_rgb_color(animation_end_color) if animation != ANIMATION_STATIC else None
+        else:
+            color_idx = self.push.get_bw_color(color)
+            black_color_idx = self.push.get_bw_color(animation_end_color) if animation != ANIMATION_STATIC else None
+        state = (color_idx, animation, black_color_idx)
+        if optimize_num_messages and self.current_buttons_state.get(button_n, None) == state:
+            # If button's recorded state already has the specified color and animation, don't send any MIDI message
+            return []
+        msgs = []
+        if animation != ANIMATION_STATIC:
+            # If animation is not static, we first set the button to black color with static animation so then, when setting
+            # the desired color with the corresponding animation it lights as expected.
+            # This behaviour should be furhter investigated as this could maybe be optimized.
+            msgs.append(mido.Message(MIDO_CONTROLCHANGE, control=button_n, value=black_color_idx, channel=ANIMATION_STATIC))
+        msgs.append(mido.Message(MIDO_CONTROLCHANGE, control=button_n, value=color_idx, channel=animation))
+        self.current_buttons_state[button_n] = state
+
+        if self.push.simulator_controller is not None:
+            self.push.simulator_controller.set_element_color('cc' + str(button_n), color_idx, animation)
+        return msgs
 
     def set_all_buttons_color(self, color='white', animation=ANIMATION_DEFAULT, animation_end_color='black'):
         """Sets the color of all buttons in Push2 to the given color.
@@ -72,15 +134,20 @@ class Push2Buttons(AbstractPush2Section):
         by the color specified in 'animation_end_color', which must be a valid RGB color name present in the color palette.
         See https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#setting-led-colors
         """
-        for button_name in self.available_names:
-            self.set_button_color(button_name, color=color, animation=animation, animation_end_color=animation_end_color)
+        self.set_buttons_color({button_name: (color, animation, animation_end_color) for button_name in self.available_names},
+                               priority=MIDI_OUT_PRIORITY_BULK)
         
     def on_midi_message(self, message):
         if message.type == MIDO_CONTROLCHANGE:
-            if message.control in self.button_map:  # CC number corresponds to one of the buttons
-                button = self.button_map[message.control]
-                action = ACTION_BUTTON_PRESSED if message.value == 127 else ACTION_BUTTON_RELEASED
-                self.push.trigger_action(action, button['Name'])  # Trigger generic button action
-                self.push.trigger_action(get_individual_button_action_name(action, button['Name']))  # Trigger individual button action as well
+            action_names = self.button_action_names.get(message.control, None)
+            if action_names is not None:  # CC number corresponds to one of the buttons
+                button_name, pressed_action, released_action = action_names
+                push = self.push
+                if message.value == 127:
+                    push.trigger_action(ACTION_BUTTON_PRESSED, button_name)  # Trigger generic button action
+                    push.trigger_action(pressed_action)  # Trigger individual button action as well
+                else:
+                    push.trigger_action(ACTION_BUTTON_RELEASED, button_name)
+                    push.trigger_action(released_action)
                 return True
 
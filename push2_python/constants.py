@@ -59,6 +59,19 @@ def is_push_midi_out_port_name(port_name, use_user_port=False):
 
 PUSH2_RECONNECT_INTERVAL = 0.05  # 50 ms
 PUSH2_MIDI_ACTIVE_SENSING_MAX_INTERVAL = 0.5  # 0.5 seconds
+PUSH2_MIDI_ACTIVE_SENSING_CHECK_INTERVAL = 0.3  # Check for missing active sensing messages every 300 ms
+
+# MIDI out scheduler (see push2_python.scheduler)
+MIDI_OUT_PRIORITY_FEEDBACK = 0  # Immediate user feedback (e.g. LED of a pad that was just pressed)
+MIDI_OUT_PRIORITY_TRANSPORT = 1  # Transport/playhead updates
+MIDI_OUT_PRIORITY_BULK = 2  # Bulk refreshes and sysex configuration
+MIDI_OUT_DEFAULT_MESSAGES_PER_MS = 4.0
+MIDI_OUT_DEFAULT_MAX_BURST = 64
+
+# Display writer thread (see push2_python.display.Push2DisplayWriter)
+DISPLAY_WRITER_NUM_BUFFERS = 3  # Frame being written, frame waiting in the mailbox and frame being prepared
+DISPLAY_RECONNECT_MAX_BACKOFF = 5.0  # seconds
+DISPLAY_DEFAULT_KEEP_ALIVE_INTERVAL = 1.0  # seconds, identical frames are re-sent after this time (Push blanks the display if no frames are received)
 
 MIDO_NOTEON = 'note_on'
 MIDO_NOTEOFF = 'note_off'
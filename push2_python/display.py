@@ -1,14 +1,18 @@
 import usb.core
 import usb.util
 import numpy
+import array
 import logging
+import threading
 import time
+import zlib
 from .classes import AbstractPush2Section, function_call_interval_limit
 from .exceptions import Push2USBDeviceConfigurationError, Push2USBDeviceNotFound
 from .constants import ABLETON_VENDOR_ID, PUSH2_PRODUCT_ID, USB_TRANSFER_TIMEOUT, DISPLAY_FRAME_HEADER, \
     DISPLAY_BUFFER_SIZE, DISPLAY_FRAME_XOR_PATTERN, DISPLAY_N_LINES, DISPLAY_LINE_PIXELS, DISPLAY_LINE_FILLER_BYTES, \
     FRAME_FORMAT_BGR565, FRAME_FORMAT_RGB565, FRAME_FORMAT_RGB, PUSH2_RECONNECT_INTERVAL, ACTION_DISPLAY_CONNECTED, \
-    ACTION_DISPLAY_DISCONNECTED
+    ACTION_DISPLAY_DISCONNECTED, DISPLAY_WRITER_NUM_BUFFERS, DISPLAY_RECONNECT_MAX_BACKOFF, \
+    DISPLAY_DEFAULT_KEEP_ALIVE_INTERVAL
 
 NP_DISPLAY_FRAME_XOR_PATTERN = numpy.array(DISPLAY_FRAME_XOR_PATTERN, dtype=numpy.uint16)  # Numpy array version of the constant
 
@@ -41,14 +45,201 @@ def rgb_to_bgr565(rgb_frame):
     combined = frame_r_shifted + frame_g_shifted + frame_b_shifted  # Combine all channels
     return combined.transpose()
 
+PREPARED_FRAME_LINE_PIXELS = DISPLAY_LINE_PIXELS + DISPLAY_LINE_FILLER_BYTES // 2  # Line width (in pixels) including filler
+
+# Prepared frames are sent as little endian uint16 values, XOR pattern is therefore applied to native (little endian) values
+# byteswapped. This is equivalent to byteswapping the frame, applying the pattern and byteswapping it back as described in the
+# spec. The pattern is reshaped to match the lines of the prepared frame.
+NP_PREPARED_FRAME_XOR_PATTERN = NP_DISPLAY_FRAME_XOR_PATTERN.byteswap().reshape(DISPLAY_N_LINES, PREPARED_FRAME_LINE_PIXELS)
+NP_PREPARED_FRAME_XOR_PATTERN_PIXELS = NP_PREPARED_FRAME_XOR_PATTERN[:, 0:DISPLAY_LINE_PIXELS]
+
+
+def make_prepared_frame_buffer():
+    """Allocates a buffer for a prepared frame. Returns a tuple with an 'array.array' of bytes (which can be given to pyusb
+    without further copies) and a numpy uint16 array of shape (DISPLAY_N_LINES, PREPARED_FRAME_LINE_PIXELS) which shares its
+    memory. The buffer is initialized with a black frame (i.e. the XOR pattern, which also applies to filler bytes) so that filler
+    bytes never need to be written again.
+    """
+    prepared_frame_array = array.array('B', NP_PREPARED_FRAME_XOR_PATTERN.tobytes())
+    prepared_frame_buffer = numpy.frombuffer(prepared_frame_array, dtype=numpy.uint16).reshape(DISPLAY_N_LINES, PREPARED_FRAME_LINE_PIXELS)
+    return prepared_frame_array, prepared_frame_buffer
+
+
+def prepare_frame_lines(lines, input_format, prepared_frame_buffer, scratch_buffer=None):
+    """Writes the prepared version of 'lines' into 'prepared_frame_buffer' (as returned by 'make_prepared_frame_buffer') without
+    allocating memory. 'lines' must be a numpy uint16 array of shape (DISPLAY_N_LINES, DISPLAY_LINE_PIXELS) in bgr565 or rgb565
+    format (e.g. a view on the data of a cairo RGB16_565 surface). Filler bytes in 'prepared_frame_buffer' are not touched.
+    For bgr565, a single XOR pass writes directly to the prepared frame. For rgb565, each color component is moved to its bgr565
+    position in 'scratch_buffer' (a uint16 array with the same shape as 'lines', allocated if not given) and combined with
+    the XOR pattern directly in the prepared frame (as components don't overlap, XORing them is the same as ORing them).
+    """
+    pixels = prepared_frame_buffer[:, 0:DISPLAY_LINE_PIXELS]
+    if input_format == FRAME_FORMAT_RGB565:
+        if scratch_buffer is None:
+            scratch_buffer = numpy.empty((DISPLAY_N_LINES, DISPLAY_LINE_PIXELS), dtype=numpy.uint16)
+        numpy.right_shift(lines, 11, out=scratch_buffer)  # R component goes to the right
+        numpy.bitwise_xor(scratch_buffer, NP_PREPARED_FRAME_XOR_PATTERN_PIXELS, out=pixels)
+        numpy.bitwise_and(lines, 0b0000011111100000, out=scratch_buffer)  # G component stays in the same position
+        numpy.bitwise_xor(pixels, scratch_buffer, out=pixels)
+        numpy.left_shift(lines, 11, out=scratch_buffer)  # B component goes to the left
+        numpy.bitwise_xor(pixels, scratch_buffer, out=pixels)
+    else:
+        numpy.bitwise_xor(lines, NP_PREPARED_FRAME_XOR_PATTERN_PIXELS, out=pixels)
+
+
+class Push2DisplayWriter(AbstractPush2Section):
+    """Class that writes prepared frames to Push2 display from a dedicated thread so that blocking USB writes (and
+    reconnection attempts) never stall the thread that renders frames and handles pads/buttons.
+
+    Frames are passed to the writer through a single-slot mailbox: if a new frame is posted while the previous one has not
+    yet been written, the previous one is dropped and only the latest frame is written. Prepared frames live in a small pool
+    of buffers (see 'make_prepared_frame_buffer') so that frames can be prepared while another one is being written without
+    allocating memory: one buffer holds the last written frame, one can wait in the mailbox and one is being prepared.
+
+    If the display is not connected, reconnection is attempted from the writer thread with an exponential backoff which
+    starts at the display reconnect interval (see 'Push2.set_push2_reconnect_call_interval') and is capped at
+    DISPLAY_RECONNECT_MAX_BACKOFF seconds.
+    """
+
+    mailbox = None
+    current = None
+    free_buffers = None
+    resend_requested = False
+    num_reconnect_failures = 0
+    next_reconnect_time = 0.0
+    frames_sent = 0
+    frames_dropped = 0
+    last_write_time = 0.0
+    max_write_time = 0.0
+    total_write_time = 0.0
+
+    def __init__(self, main_push_object, num_buffers=DISPLAY_WRITER_NUM_BUFFERS):
+        super().__init__(main_push_object)
+        self.free_buffers = [make_prepared_frame_buffer() for _ in range(0, num_buffers)]
+        self.condition = threading.Condition()
+        self.f_stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def get_free_buffer(self):
+        """Returns a (prepared_frame_array, prepared_frame_buffer) tuple which is neither waiting to be written nor holds the
+        last written frame, so it can be safely filled by the caller and then given to 'post_frame'.
+        """
+        with self.condition:
+            if self.free_buffers:
+                return self.free_buffers.pop()
+        # Should not happen with a single thread posting frames, but allocate a new buffer rather than overwriting one in use
+        return make_prepared_frame_buffer()
+
+    def release_buffer(self, prepared_frame):
+        """Gives back a buffer obtained with 'get_free_buffer' which is not going to be posted."""
+        with self.condition:
+            self.free_buffers.append(prepared_frame)
+
+    def post_frame(self, prepared_frame):
+        """Puts 'prepared_frame' (as returned by 'get_free_buffer') in the mailbox. If the mailbox already had a frame which
+        was not yet written, that frame is dropped.
+        """
+        with self.condition:
+            if self.mailbox is not None:
+                self.free_buffers.append(self.mailbox)
+                self.frames_dropped += 1
+            self.mailbox = prepared_frame
+            self.condition.notify()
+
+    def post_last_frame(self):
+        """Asks the writer to write again the last written frame (if no newer frame is waiting to be written)."""
+        with self.condition:
+            if self.mailbox is None and self.current is not None:
+                self.resend_requested = True
+                self.condition.notify()
+
+    def get_metrics(self):
+        with self.condition:
+            return {
+                'frames_sent': self.frames_sent,
+                'frames_dropped': self.frames_dropped,
+                'last_write_time': self.last_write_time,
+                'max_write_time': self.max_write_time,
+                'avg_write_time': self.total_write_time / self.frames_sent if self.frames_sent else 0.0,
+                'reconnect_failures': self.num_reconnect_failures,
+            }
+
+    def run(self):
+        display = self.push.display
+        while not self.f_stop.is_set():
+            with self.condition:
+                while self.mailbox is None and not self.resend_requested and not self.f_stop.is_set():
+                    self.condition.wait(0.1)
+                if self.f_stop.is_set():
+                    break
+
+                # If display is disconnected, wait for the reconnect backoff to expire. Frames posted in the meantime
+                # replace the one in the mailbox so the latest one will be written once reconnected
+                wait_time = self.next_reconnect_time - time.time()
+                if display.usb_endpoint is None and wait_time > 0:
+                    self.condition.wait(wait_time)
+                    continue
+
+                if self.mailbox is not None:
+                    if self.current is not None:
+                        self.free_buffers.append(self.current)
+                    self.current = self.mailbox
+                    self.mailbox = None
+                self.resend_requested = False
+                prepared_frame_array = self.current[0]
+
+            start_time = time.perf_counter()
+            try:
+                display.send_to_display(prepared_frame_array)
+            except Exception as e:
+                # Don't let unexpected errors kill the writer thread
+                logging.error('Could not write frame to Push 2 Display: {0}'.format(e))
+                display.usb_endpoint = None
+            write_time = time.perf_counter() - start_time
+
+            with self.condition:
+                if display.usb_endpoint is None:
+                    self.frames_dropped += 1
+                    self.num_reconnect_failures += 1
+                    base_backoff = getattr(display, 'function_call_interval_limit_overwrite', PUSH2_RECONNECT_INTERVAL)
+                    self.next_reconnect_time = time.time() + min(DISPLAY_RECONNECT_MAX_BACKOFF, base_backoff * 2 ** (self.num_reconnect_failures - 1))
+                else:
+                    self.num_reconnect_failures = 0
+                    self.frames_sent += 1
+                    self.last_write_time = write_time
+                    self.max_write_time = max(self.max_write_time, write_time)
+                    self.total_write_time += write_time
+
+    def stop(self):
+        self.f_stop.set()
+        with self.condition:
+            self.condition.notify()
+
+
 class Push2Display(AbstractPush2Section):
     """Class to interface with Ableton's Push2 display.
     See https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#display-interface
     """
     usb_endpoint = None
     last_prepared_frame = None
+    prepared_frame_array = None
+    prepared_frame_buffer = None
+    scratch_buffer = None
+    writer = None
+    last_frame_checksum = None
+    last_frame_sent_time = 0.0
+    keep_alive_interval = DISPLAY_DEFAULT_KEEP_ALIVE_INTERVAL
+    frames_skipped = 0
     function_call_interval_limit_overwrite = PUSH2_RECONNECT_INTERVAL
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Persistent buffers used by 'display_frame' and 'display_frame_lines' so that no memory is allocated per frame
+        self.prepared_frame_array, self.prepared_frame_buffer = make_prepared_frame_buffer()
+        self.scratch_buffer = numpy.empty((DISPLAY_N_LINES, DISPLAY_LINE_PIXELS), dtype=numpy.uint16)
+        self.black_frame_bytes = NP_PREPARED_FRAME_XOR_PATTERN.tobytes()
+
 
     @function_call_interval_limit(PUSH2_RECONNECT_INTERVAL)
     def configure_usb_device(self):
@@ -88,11 +279,13 @@ class Push2Display(AbstractPush2Section):
         try:
             # Try sending a framr header as a test...
             out_endpoint.write(DISPLAY_FRAME_HEADER, USB_TRANSFER_TIMEOUT)
-            black_frame = self.prepare_frame(self.make_black_frame(), input_format=FRAME_FORMAT_BGR565)
-            out_endpoint.write(black_frame, USB_TRANSFER_TIMEOUT)
+            out_endpoint.write(self.black_frame_bytes, USB_TRANSFER_TIMEOUT)
         except usb.core.USBError:
             self.usb_endpoint = None
             return
+
+        # Display now shows a black frame, next frame must be sent even if it is identical to the last one
+        self.last_frame_checksum = None
         
         # ...if it works (no USBError exception) set self.usb_endpoint and trigger action
         self.usb_endpoint = out_endpoint
@@ -136,22 +329,11 @@ class Push2Display(AbstractPush2Section):
         assert frame.shape[1] == DISPLAY_N_LINES, 'Wrong number of lines in frame ({0})'.format(
             frame.shape[1])
 
-        width = DISPLAY_LINE_PIXELS + DISPLAY_LINE_FILLER_BYTES // 2
-        height = DISPLAY_N_LINES
-        prepared_frame = numpy.zeros(shape=(width, height), dtype=numpy.uint16)
-        prepared_frame[0:frame.shape[0], 0:frame.shape[1]] = frame
-        prepared_frame = prepared_frame.transpose().flatten()
-        if input_format == FRAME_FORMAT_RGB565:
-            prepared_frame = rgb565_to_bgr565(prepared_frame)
-        elif input_format == FRAME_FORMAT_BGR565:
-            pass  # Nothing to do as this is already the requested format
-        elif input_format == FRAME_FORMAT_RGB:
-            pass  # Nothing as conversion was done before
-        prepared_frame = prepared_frame.byteswap()  # Change to little endian
-        prepared_frame = numpy.bitwise_xor(prepared_frame, NP_DISPLAY_FRAME_XOR_PATTERN)
-
+        prepared_frame_array, prepared_frame_buffer = make_prepared_frame_buffer()
+        prepare_frame_lines(frame.transpose(), FRAME_FORMAT_BGR565 if input_format == FRAME_FORMAT_RGB else input_format, prepared_frame_buffer)
+        prepared_frame = prepared_frame_array.tobytes()
         self.last_prepared_frame = prepared_frame
-        return prepared_frame.byteswap().tobytes()
+        return prepared_frame
 
 
     def make_black_frame(self):
@@ -200,11 +382,81 @@ class Push2Display(AbstractPush2Section):
                 
 
     def display_frame(self, frame, input_format=FRAME_FORMAT_BGR565):
-        prepared_frame = self.prepare_frame(frame.copy(), input_format=input_format)
-        self.send_to_display(prepared_frame)
+        """Prepares and sends the given frame to Push2 display. See 'prepare_frame' for details about the 'frame' and
+        'input_format' arguments. Frame is prepared in a persistent buffer which is sent to the display without further copies.
+        """
+        if input_format == FRAME_FORMAT_RGB:
+            self.display_frame_lines(rgb_to_bgr565(frame.copy()).transpose(), input_format=FRAME_FORMAT_BGR565)
+        else:
+            self.display_frame_lines(frame.transpose(), input_format=input_format)
 
         if self.push.simulator_controller is not None:
             self.push.simulator_controller.prepare_and_display_in_simulator(frame.copy(), input_format=input_format)
 
+    def display_frame_lines(self, lines, input_format=FRAME_FORMAT_BGR565):
+        """Prepares and sends a frame given as a numpy uint16 array of shape (DISPLAY_N_LINES, DISPLAY_LINE_PIXELS), that is to say,
+        line by line as it is stored in memory by cairo RGB16_565 surfaces (see 'prepare_frame_lines'). Only FRAME_FORMAT_BGR565
+        and FRAME_FORMAT_RGB565 formats are supported. This is the fastest way of sending frames to the display as no transposing
+        is needed and no memory is allocated.
+        """
+        assert input_format in [FRAME_FORMAT_BGR565, FRAME_FORMAT_RGB565], 'Invalid frame format'
+        if self.writer is not None:
+            prepared_frame = self.writer.get_free_buffer()
+        else:
+            prepared_frame = (self.prepared_frame_array, self.prepared_frame_buffer)
+        prepare_frame_lines(lines, input_format, prepared_frame[1], scratch_buffer=self.scratch_buffer)
+
+        # Don't send the frame if it is identical to the last one sent, unless 'keep_alive_interval' has passed since then
+        checksum = zlib.crc32(prepared_frame[0])
+        now = time.time()
+        if checksum == self.last_frame_checksum and now - self.last_frame_sent_time < self.keep_alive_interval:
+            self.frames_skipped += 1
+            if self.writer is not None:
+                self.writer.release_buffer(prepared_frame)
+            return
+        self.last_frame_checksum = checksum
+        self.last_frame_sent_time = now
+
+        if self.writer is not None:
+            self.writer.post_frame(prepared_frame)
+        else:
+            self.last_prepared_frame = self.prepared_frame_array
+            self.send_to_display(self.prepared_frame_array)
+
     def display_last_frame(self):
-        self.send_to_display(self.last_prepared_frame)
+        self.last_frame_sent_time = time.time()
+        if self.writer is not None:
+            self.writer.post_last_frame()
+        elif self.last_prepared_frame is not None:
+            self.send_to_display(self.last_prepared_frame)
+
+    def set_keep_alive_interval(self, interval):
+        """Sets the maximum time (in seconds) during which frames identical to the last one sent are not sent again to the
+        display. Push blanks the display if it receives no frames for a while, so this should not be set above a few seconds.
+        """
+        self.keep_alive_interval = interval
+
+    def enable_writer_thread(self, num_buffers=DISPLAY_WRITER_NUM_BUFFERS):
+        """Makes 'display_frame' and 'display_frame_lines' return as soon as the frame is prepared and write frames to the
+        display from a dedicated thread. Only the latest frame is written if frames are displayed faster than they can be
+        written. See push2_python.display.Push2DisplayWriter.
+        """
+        if self.writer is None:
+            self.writer = Push2DisplayWriter(self.push, num_buffers=num_buffers)
+
+    def disable_writer_thread(self):
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer.thread.join()
+            self.writer = None
+            self.last_prepared_frame = None
+
+    def get_metrics(self):
+        """Returns a dictionary with the number of frames which were not sent because they were identical to the last one sent
+        ('frames_skipped'). If the writer thread is enabled, it also includes the number of frames sent and dropped by the writer
+        thread and the time spent writing them (see 'Push2DisplayWriter.get_metrics').
+        """
+        metrics = {'frames_skipped': self.frames_skipped}
+        if self.writer is not None:
+            metrics.update(self.writer.get_metrics())
+        return metrics
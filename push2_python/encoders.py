@@ -17,6 +17,7 @@ class Push2Encoders(AbstractPush2Section):
     encoder_touch_map = None
     encoder_names_index = None
     encoder_names_list = None
+    encoder_action_names = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -27,6 +28,11 @@ class Push2Encoders(AbstractPush2Section):
         self.encoder_names_index = {data['Name']: data['Number']
                                     for data in self.push.push2_map['Parts']['RotaryEncoders']}
         self.encoder_names_list = list(self.encoder_names_index.keys())
+        # Precompute individual action names of each encoder so incoming MIDI messages can be dispatched without string formatting
+        self.encoder_action_names = {data['Name']: {
+            action_name: get_individual_encoder_action_name(action_name, data['Name'])
+            for action_name in [ACTION_ENCODER_ROTATED, ACTION_ENCODER_TOUCHED, ACTION_ENCODER_RELEASED]
+        } for data in self.push.push2_map['Parts']['RotaryEncoders']}
 
     @property
     def available_names(self):
@@ -41,23 +47,23 @@ class Push2Encoders(AbstractPush2Section):
 
     def on_midi_message(self, message):
         if message.type == MIDO_CONTROLCHANGE:  # Encoder rotated
-            if message.control in self.encoder_map:  # CC number corresponds to one of the encoders
-                if message.type == MIDO_CONTROLCHANGE:
-                    encoder = self.encoder_map[message.control]
-                    action = ACTION_ENCODER_ROTATED
-                    value = message.value
-                    if message.value > 63:
-                        # Counter-clockwise movement, see https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#Encoders
-                        value = -1 * (128 - message.value)
-                    self.push.trigger_action(action, encoder['Name'], value)  # Trigger generic rotate encoder action
-                    self.push.trigger_action(get_individual_encoder_action_name(
-                        action, encoder['Name']), value)  # Trigger individual rotate encoder action as well
-                    return True
+            encoder = self.encoder_map.get(message.control, None)
+            if encoder is not None:  # CC number corresponds to one of the encoders
+                encoder_name = encoder['Name']
+                value = message.value
+                if value > 63:
+                    # Counter-clockwise movement, see https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#Encoders
+                    value = -1 * (128 - value)
+                push = self.push
+                push.trigger_action(ACTION_ENCODER_ROTATED, encoder_name, value)  # Trigger generic rotate encoder action
+                push.trigger_action(self.encoder_action_names[encoder_name][ACTION_ENCODER_ROTATED], value)  # Trigger individual rotate encoder action as well
+                return True
         elif message.type in [MIDO_NOTEON, MIDO_NOTEOFF]:  # Encoder touched or released
-            if message.note in self.encoder_touch_map:  # Note number corresponds to one of the encoders in touch mode
-                encoder = self.encoder_touch_map[message.note]
+            encoder = self.encoder_touch_map.get(message.note, None)
+            if encoder is not None:  # Note number corresponds to one of the encoders in touch mode
+                encoder_name = encoder['Name']
                 action = ACTION_ENCODER_TOUCHED if message.velocity == 127 else ACTION_ENCODER_RELEASED
-                self.push.trigger_action(action, encoder['Name'])  # Trigger generic touch/release encoder action
-                self.push.trigger_action(get_individual_encoder_action_name(
-                    action, encoder['Name']))  # Trigger individual touch/release encoder action as well
+                push = self.push
+                push.trigger_action(action, encoder_name)  # Trigger generic touch/release encoder action
+                push.trigger_action(self.encoder_action_names[encoder_name][action])  # Trigger individual touch/release encoder action as well
                 return True
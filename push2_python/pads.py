@@ -1,7 +1,8 @@
 import mido
+import threading
 from .constants import ANIMATION_DEFAULT, MIDO_NOTEON, MIDO_NOTEOFF, \
     MIDO_POLYAT, MIDO_AFTERTOUCH, ACTION_PAD_PRESSED, ACTION_PAD_RELEASED, ACTION_PAD_AFTERTOUCH, PUSH2_SYSEX_PREFACE_BYTES, \
-    PUSH2_SYSEX_END_BYTES, ANIMATION_STATIC
+    PUSH2_SYSEX_END_BYTES, ANIMATION_STATIC, MIDI_OUT_PRIORITY_FEEDBACK
 from .classes import AbstractPush2Section
 
 
@@ -38,28 +39,49 @@ class Push2Pads(AbstractPush2Section):
     """
 
     current_pads_state = dict()
+    pads_framebuffer = dict()
+    framebuffer_dirty = False
+    framebuffer_lock = None
+    use_framebuffer = False
+    pad_n_to_pad_ij_map = None
+    individual_pad_action_names = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.current_pads_state = dict()
+        self.pads_framebuffer = dict()
+        self.framebuffer_lock = threading.Lock()
+        # Precompute pad coordinates and individual action names so incoming MIDI messages can be dispatched
+        # without any computation or string formatting
+        self.pad_n_to_pad_ij_map = {pad_n: pad_n_to_pad_ij(pad_n) for pad_n in range(36, 100)}
+        self.individual_pad_action_names = {
+            action_name: {pad_n: get_individual_pad_action_name(action_name, pad_n=pad_n) for pad_n in range(36, 100)}
+            for action_name in [ACTION_PAD_PRESSED, ACTION_PAD_RELEASED, ACTION_PAD_AFTERTOUCH]
+        }
 
     def reset_current_pads_state(self):
         """This function resets the stored pads state to avoid Push2 pads becoming out of sync with the push2-midi stored state.
         This only applies if "optimize_num_messages" is used in "set_pad_color" as it would stop sending a message if the
         desired color is already the one listed in the internal state.
+        When the pads framebuffer is in use, resetting the stored state also marks the framebuffer as dirty so that
+        the next call to "flush_framebuffer" sends the full framebuffer contents to Push.
         """
         self.current_pads_state = dict()
-
+        self.framebuffer_dirty = True
 
     def set_polyphonic_aftertouch(self):
         """Set pad aftertouch mode to polyphonic aftertouch
         See https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#285-aftertouch
         """
         msg = mido.Message.from_bytes(PUSH2_SYSEX_PREFACE_BYTES + [0x1E, 0x01] + PUSH2_SYSEX_END_BYTES)
-        self.push.send_midi_to_push(msg)
+        self.push.send_config_to_push('aftertouch_mode', 'polyphonic', [msg])
 
     def set_channel_aftertouch(self):
         """Set pad aftertouch mode to channel aftertouch
         See https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#285-aftertouch
         """
         msg = mido.Message.from_bytes(PUSH2_SYSEX_PREFACE_BYTES + [0x1E, 0x00] + PUSH2_SYSEX_END_BYTES)
-        self.push.send_midi_to_push(msg)
+        self.push.send_config_to_push('aftertouch_mode', 'channel', [msg])
 
 
     def set_channel_aftertouch_range(self, range_start=401, range_end=2048):
@@ -75,7 +97,7 @@ class Push2Pads(AbstractPush2Section):
         lower_range_bytes = [range_start % 2**7, range_start // 2**7]
         upper_range_bytes = [range_end % 2**7, range_end // 2**7]
         msg = mido.Message.from_bytes(PUSH2_SYSEX_PREFACE_BYTES + [0x1B, 0x00, 0x00, 0x00, 0x00] + lower_range_bytes + upper_range_bytes + PUSH2_SYSEX_END_BYTES)
-        self.push.send_midi_to_push(msg)
+        self.push.send_config_to_push('channel_aftertouch_range', (range_start, range_end), [msg])
 
 
     def set_velocity_curve(self, velocities):
@@ -86,9 +108,10 @@ class Push2Pads(AbstractPush2Section):
         See hhttps://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#281-velocity-curve
         """
         assert type(velocities) == list and len(velocities) == 128 and type(velocities[0] == int), "velocities must be a list with 128 int values"
+        msgs = []
         for start_index in range(0, 128, 16):
-            msg = mido.Message.from_bytes(PUSH2_SYSEX_PREFACE_BYTES + [0x20] + [start_index] + velocities[start_index:start_index + 16] + PUSH2_SYSEX_END_BYTES)
-            self.push.send_midi_to_push(msg)
+            msgs.append(mido.Message.from_bytes(PUSH2_SYSEX_PREFACE_BYTES + [0x20] + [start_index] + velocities[start_index:start_index + 16] + PUSH2_SYSEX_END_BYTES))
+        self.push.send_config_to_push('velocity_curve', tuple(velocities), msgs)
 
     def pad_ij_to_pad_n(self, i, j):
         return pad_ij_to_pad_n(i, j)
@@ -102,33 +125,85 @@ class Push2Pads(AbstractPush2Section):
         'animation' must be a valid animation name from those defined in push2_python.contants.ANIMATION_*. Note that to configure an animation, both 
         the 'start' and 'end' colors of the animation need to be defined. The 'start' color is defined by 'color' parameter. The 'end' color is defined 
         by the color specified in 'animation_end_color', which must be a valid RGB color name present in the color palette.
+        Colors can also be given as color palette indexes (see 'Push2.get_rgb_color') to skip color name lookups.
         
         This funtion will keep track of the latest color/animation values set for each specific pad. If 'optimize_num_messages' is 
         set to True, set_pad_color will only actually send the MIDI message to push if either the color or animation that should 
         be set differ from those stored in the state.
+
+        If 'use_framebuffer' is set to True, the color is only written to the pads framebuffer and no MIDI message is sent.
+        The framebuffer is then compared to the stored state and sent to Push by calling 'flush_framebuffer' (typically once per frame).
         See https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#261-setting-led-colors
         """
         pad = self.pad_ij_to_pad_n(pad_ij[0], pad_ij[1])
         color = self.push.get_rgb_color(color)
-        if optimize_num_messages and pad in self.current_pads_state and self.current_pads_state[pad]['color'] == color and self.current_pads_state[pad]['animation'] == animation:
+        if animation != ANIMATION_STATIC:
+            end_color = self.push.get_rgb_color(animation_end_color)
+        else:
+            end_color = None
+        if self.use_framebuffer:
+            with self.framebuffer_lock:
+                self.pads_framebuffer[pad] = (color, animation, end_color)
+                self.framebuffer_dirty = True
+            return
+        if optimize_num_messages and self.pad_state_matches(pad, color, animation, end_color):
             # If pad's recorded state already has the specified color and animation, return method before sending the MIDI message
             return
+        self.push.send_midi_messages_to_push(self.make_pad_color_messages(pad, color, animation, end_color), coalesce_key=('pad', pad))
+        self.update_pad_state(pad, color, animation, end_color)
+
+    def pad_state_matches(self, pad, color, animation, end_color):
+        """Returns True if the stored state for the given pad number already corresponds to the given color
+        index, animation and animation end color index.
+        """
+        state = self.current_pads_state.get(pad, None)
+        if state is None or state['color'] != color or state['animation'] != animation:
+            return False
+        return animation == ANIMATION_STATIC or state.get('animation_end_color', None) == end_color
+
+    def make_pad_color_messages(self, pad, color, animation, end_color):
+        """Returns the list of MIDI messages needed to set the given pad number to the given color index and animation.
+        """
+        msgs = []
         if animation != ANIMATION_STATIC:
             # If animation is not static, we first set the pad to black color with static animation so then, when setting
             # the desired color with the corresponding animation it lights as expected.
-            msg = mido.Message(MIDO_NOTEON, note=pad, velocity=self.push.get_rgb_color(animation_end_color), channel=ANIMATION_STATIC)
-            self.push.send_midi_to_push(msg)
-        msg = mido.Message(MIDO_NOTEON, note=pad, velocity=color, channel=animation)
-        self.push.send_midi_to_push(msg)
-        self.current_pads_state[pad] = {'color': color, 'animation': animation}
+            msgs.append(mido.Message(MIDO_NOTEON, note=pad, velocity=end_color, channel=ANIMATION_STATIC))
+        msgs.append(mido.Message(MIDO_NOTEON, note=pad, velocity=color, channel=animation))
+        return msgs
 
+    def update_pad_state(self, pad, color, animation, end_color):
+        self.current_pads_state[pad] = {'color': color, 'animation': animation, 'animation_end_color': end_color}
         if self.push.simulator_controller is not None:
             self.push.simulator_controller.set_element_color('nn' + str(pad), color, animation)
 
+    def flush_framebuffer(self, priority=MIDI_OUT_PRIORITY_FEEDBACK):
+        """Compares the contents of the pads framebuffer with the stored pads state and sends to Push, in a single
+        batch, the MIDI messages for the pads whose color or animation changed. This is meant to be called once per frame
+        when 'use_framebuffer' is set to True. Returns the number of pads that were updated.
+        'priority' is used if the MIDI out scheduler is enabled (see 'Push2.enable_midi_out_scheduler').
+        """
+        if not self.framebuffer_dirty:
+            return 0
+        with self.framebuffer_lock:
+            self.framebuffer_dirty = False
+            groups = []
+            changed = []
+            for pad, (color, animation, end_color) in self.pads_framebuffer.items():
+                if not self.pad_state_matches(pad, color, animation, end_color):
+                    groups.append((('pad', pad), self.make_pad_color_messages(pad, color, animation, end_color)))
+                    changed.append((pad, color, animation, end_color))
+            if groups:
+                self.push.send_midi_message_groups_to_push(groups, priority=priority)
+                for pad, color, animation, end_color in changed:
+                    self.update_pad_state(pad, color, animation, end_color)
+        return len(changed)
+
     def set_pads_color(self, color_matrix, animation_matrix=None):
         """Sets the color and animations of all pads according to the given matrices.
         Individual elements in the color_matrix must be valid RGB color palette names. See push2_python.constants.DEFAULT_COLOR_PALETTE for default color names.
         Matrices must be 8x8, with 8 lines of 8 values corresponding to the pad grid from top-left to bottom-down.
+        If 'use_framebuffer' is set to True, the matrices are written to the pads framebuffer (see 'flush_framebuffer').
         See https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#261-setting-led-colors
         """
         assert len(color_matrix) == 8, 'Wrong number of lines in color matrix ({0})'.format(len(color_matrix))
@@ -176,30 +251,28 @@ class Push2Pads(AbstractPush2Section):
         self.set_all_pads_to_color('blue', animation=animation, animation_end_color=animation_end_color)
 
     def on_midi_message(self, message):
-        if message.type in [MIDO_NOTEON, MIDO_NOTEOFF, MIDO_POLYAT, MIDO_AFTERTOUCH]:
-            if message.type != MIDO_AFTERTOUCH:
-                if 36 <= message.note <= 99:  # Min and max pad MIDI values according to Push Spec
-                    pad_n = message.note
-                    pad_ij = self.pad_n_to_pad_ij(pad_n)
-                    if message.type == MIDO_POLYAT:
-                        velocity = message.value
-                    else:
-                        velocity = message.velocity
-                    if message.type == MIDO_NOTEON:
-                        self.push.trigger_action(ACTION_PAD_PRESSED, pad_n, pad_ij, velocity)  # Trigger generic pad action
-                        self.push.trigger_action(get_individual_pad_action_name(
-                            ACTION_PAD_PRESSED, pad_n=pad_n), velocity)  # Trigger individual pad action as well
-                        return True
-                    elif message.type == MIDO_NOTEOFF:
-                        self.push.trigger_action(ACTION_PAD_RELEASED, pad_n, pad_ij, velocity)
-                        self.push.trigger_action(get_individual_pad_action_name(
-                            ACTION_PAD_RELEASED, pad_n=pad_n), velocity)  # Trigger individual pad action as well
-                        return True
-                    elif message.type == MIDO_POLYAT:
-                        self.push.trigger_action(ACTION_PAD_AFTERTOUCH, pad_n, pad_ij, velocity)
-                        self.push.trigger_action(get_individual_pad_action_name(
-                            ACTION_PAD_AFTERTOUCH, pad_n=pad_n), velocity)  # Trigger individual pad action as well
-                        return True
-            elif message.type == MIDO_AFTERTOUCH:
-                self.push.trigger_action(ACTION_PAD_AFTERTOUCH, None, None, message.value)
-                return True
+        message_type = message.type
+        if message_type == MIDO_NOTEON:
+            action_name = ACTION_PAD_PRESSED
+            velocity = message.velocity
+        elif message_type == MIDO_NOTEOFF:
+            action_name = ACTION_PAD_RELEASED
+            velocity = message.velocity
+        elif message_type == MIDO_POLYAT:
+            action_name = ACTION_PAD_AFTERTOUCH
+            velocity = message.value
+        elif message_type == MIDO_AFTERTOUCH:
+            self.push.trigger_action(ACTION_PAD_AFTERTOUCH, None, None, message.value)
+            return True
+        else:
+            return False
+
+        pad_n = message.note
+        pad_ij = self.pad_n_to_pad_ij_map.get(pad_n, None)
+        if pad_ij is None:
+            # Not in the range of pad MIDI values according to Push Spec (36-99)
+            return False
+        push = self.push
+        push.trigger_action(action_name, pad_n, pad_ij, velocity)  # Trigger generic pad action
+        push.trigger_action(self.individual_pad_action_names[action_name][pad_n], velocity)  # Trigger individual pad action as well
+        return True
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+import itertools
+from .constants import MIDI_OUT_PRIORITY_FEEDBACK, MIDI_OUT_PRIORITY_TRANSPORT, MIDI_OUT_PRIORITY_BULK, \
+    MIDI_OUT_DEFAULT_MESSAGES_PER_MS, MIDI_OUT_DEFAULT_MAX_BURST
+
+
+class Push2MIDIOutScheduler(object):
+    """Class that schedules MIDI messages sent to Push so that they are written to the MIDI out port from a single
+    thread, in order of priority and limited to a maximum number of messages per millisecond.
+
+    Messages are scheduled in one of three priority lanes (see push2_python.constants.MIDI_OUT_PRIORITY_*): immediate user
+    feedback, then transport/playhead updates, and finally bulk refreshes and sysex configuration. A lane is only served when
+    all lanes with higher priority are empty. Within a lane, messages are sent in the order they were scheduled.
+
+    Messages can be scheduled with a 'coalesce_key' (e.g. one key per pad or button LED). If messages with the same key are
+    still waiting to be sent, they are replaced by the new ones (even if they were waiting in a different lane) so that only
+    the latest write to a LED reaches Push. A callback ('on_sent') can be given with the messages: it is called from the scheduler
+    thread once the messages have been written to the MIDI out port, and discarded if the messages are coalesced or could not be
+    written.
+
+    The scheduler is not a section of Push (it has no state of its own about the device): it only holds a reference to the Push2
+    object in order to write messages to its MIDI out port.
+    """
+
+    lanes = None
+    lane_for_key = None
+    messages_per_ms = MIDI_OUT_DEFAULT_MESSAGES_PER_MS
+    max_burst = MIDI_OUT_DEFAULT_MAX_BURST
+    num_sent = 0
+    num_coalesced = 0
+
+    def __init__(self, push, messages_per_ms=MIDI_OUT_DEFAULT_MESSAGES_PER_MS, max_burst=MIDI_OUT_DEFAULT_MAX_BURST):
+        self.push = push
+        self.messages_per_ms = messages_per_ms
+        self.max_burst = max_burst
+        self.lanes = {priority: dict() for priority in [MIDI_OUT_PRIORITY_FEEDBACK, MIDI_OUT_PRIORITY_TRANSPORT, MIDI_OUT_PRIORITY_BULK]}
+        self.lane_for_key = dict()
+        self.key_counter = itertools.count()
+        self.condition = threading.Condition()
+        self.f_stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def schedule(self, msgs, priority=MIDI_OUT_PRIORITY_FEEDBACK, coalesce_key=None, on_sent=None):
+        """Adds the list of MIDI messages 'msgs' to the lane corresponding to 'priority'. Messages scheduled together are always
+        sent together and in the given order. If 'coalesce_key' is given, messages scheduled before with the same key and not yet
+        sent are discarded. If 'on_sent' is given, it is called without arguments after the messages have been written to Push.
+        """
+        if priority not in self.lanes:
+            priority = MIDI_OUT_PRIORITY_BULK
+        with self.condition:
+            if coalesce_key is None:
+                coalesce_key = ('_', next(self.key_counter))
+            else:
+                previous_priority = self.lane_for_key.get(coalesce_key, None)
+                if previous_priority is not None:
+                    self.num_coalesced += len(self.lanes[previous_priority].pop(coalesce_key)[0])
+            self.lanes[priority][coalesce_key] = (list(msgs), on_sent)
+            self.lane_for_key[coalesce_key] = priority
+            self.condition.notify()
+
+    def num_pending(self):
+        with self.condition:
+            return sum([len(msgs) for lane in self.lanes.values() for msgs, _ in lane.values()])
+
+    def pop_next(self):
+        # Must be called with self.condition acquired
+        for priority in sorted(self.lanes.keys()):
+            lane = self.lanes[priority]
+            if lane:
+                key = next(iter(lane))
+                del self.lane_for_key[key]
+                return lane.pop(key)
+        return None
+
+    def run(self):
+        tokens = float(self.max_burst)
+        last_time = time.perf_counter()
+        while not self.f_stop.is_set():
+            with self.condition:
+                group = self.pop_next()
+                while group is None and not self.f_stop.is_set():
+                    self.condition.wait(0.1)
+                    group = self.pop_next()
+            if group is None:
+                break
+            msgs, on_sent = group
+
+            # Refill token bucket according to the messages per millisecond budget, and wait if not enough
+            # tokens are available for the messages to be sent
+            while True:
+                now = time.perf_counter()
+                tokens = min(float(self.max_burst), tokens + (now - last_time) * 1000.0 * self.messages_per_ms)
+                last_time = now
+                if tokens >= min(len(msgs), self.max_burst):
+                    break
+                time.sleep((min(len(msgs), self.max_burst) - tokens) / (1000.0 * self.messages_per_ms))
+            tokens -= len(msgs)
+
+            try:
+                if self.push.write_midi_messages_to_push(msgs):
+                    self.num_sent += len(msgs)
+                    if on_sent is not None:
+                        on_sent()
+            except Exception as e:
+                # Push object might have been deleted or MIDI port closed, don't let this kill the scheduler thread
+                logging.error('Could not send scheduled MIDI messages to Push: {0}'.format(e))
+
+    def stop(self):
+        self.f_stop.set()
+        with self.condition:
+            self.condition.notify()
@@ -14,14 +14,14 @@ class Push2TouchStrip(AbstractPush2Section):
         See https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#2101-touch-strip-configuration
         """
         msg = mido.Message.from_bytes(PUSH2_SYSEX_PREFACE_BYTES + [0x17, 0x0C] + PUSH2_SYSEX_END_BYTES)
-        self.push.send_midi_to_push(msg)
+        self.push.send_config_to_push('touchstrip_mode', 'modulation_wheel', [msg])
 
     def set_pitch_bend_mode(self):
         """Configure touchstrip to act as a pitch bend wheel (this is the default)
         See https://github.com/Ableton/push-interface/blob/master/doc/AbletonPush2MIDIDisplayInterface.asc#2101-touch-strip-configuration
         """
         msg = mido.Message.from_bytes(PUSH2_SYSEX_PREFACE_BYTES + [0x17, 0x68] + PUSH2_SYSEX_END_BYTES)
-        self.push.send_midi_to_push(msg)
+        self.push.send_config_to_push('touchstrip_mode', 'pitch_bend', [msg])
 
     def on_midi_message(self, message):
         if message.type == MIDO_PITCWHEEL:
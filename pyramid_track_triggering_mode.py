@@ -82,8 +82,8 @@ class PyramidTrackTriggeringMode(definitions.PyshaMode):
     def new_track_selected(self):
         self.pad_pressing_states = {}
         self.track_selection_modifier_button_being_pressed = False
-        self.app.pads_need_update = True
-        self.app.buttons_need_update = True
+        self.invalidate_pads()
+        self.invalidate_buttons()
 
     def deactivate(self):
         for button_name in self.scene_trigger_buttons:
@@ -97,7 +97,6 @@ class PyramidTrackTriggeringMode(definitions.PyshaMode):
         if not self.track_selection_modifier_button_being_pressed:
             self.push.buttons.set_button_color(self.track_selection_modifier_button, definitions.OFF_BTN_COLOR)
         else:
-            self.push.buttons.set_button_color(self.track_selection_modifier_button, definitions.BLACK)
             self.push.buttons.set_button_color(self.track_selection_modifier_button, definitions.WHITE, animation=definitions.DEFAULT_ANIMATION)
 
     def update_pads(self):
@@ -132,7 +131,7 @@ class PyramidTrackTriggeringMode(definitions.PyshaMode):
                     else:
                         if self.track_has_content(track_num):
                             self.set_track_is_playing(track_num, False)
-            self.app.pads_need_update = True
+            self.invalidate_pads()
 
             return True  # Prevent other modes to get this event
 
@@ -192,5 +191,5 @@ class PyramidTrackTriggeringMode(definitions.PyshaMode):
                 else:
                     self.set_track_is_playing(track_num, True)
         
-        self.app.pads_need_update = True
+        self.invalidate_pads()
         return True  # Prevent other modes to get this event
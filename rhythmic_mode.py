@@ -43,11 +43,14 @@ class RhythmicMode(MelodicMode):
         # Ici on ne fait rien car SequencerController gère le feedback
         pass
 
+    def update_pads_region(self, pads_ij):
+        pass
+
     def deactivate(self):
         super().deactivate()
         # Forcer update des pads à la sortie du mode
-        self.app.pads_need_update = True
-        self.app.buttons_need_update = True
+        self.app.invalidate_pads()
+        self.app.invalidate_buttons()
 
     # -----------------------------------------------------------
     # ### BLOCK-ROUTING ###
@@ -106,5 +109,24 @@ class RhythmicMode(MelodicMode):
 
         return super().on_pad_pressed(pad_n, pad_ij, velocity)
 
+    def on_pad_released(self, pad_n, pad_ij, velocity):
+        # Fin de l'édition des réglages du pad de séquenceur tenu
+        if hasattr(self.app, "sequencer_controller"):
+            self.app.sequencer_controller.handle_rhythmic_input(self.pad_ij_to_midi_note(pad_ij), is_note_on=False)
+        return super().on_pad_released(pad_n, pad_ij, velocity)
 
+    def on_button_pressed(self, button_name):
+        # Pad de séquenceur tenu + bouton de résolution : diviseur d'horloge du pad
+        if hasattr(self.app, "sequencer_controller"):
+            if self.app.sequencer_controller.handle_pad_rate_button(button_name):
+                return True
+        return super().on_button_pressed(button_name)
 
+    def on_encoder_rotated(self, encoder_name, increment):
+        # Pad de séquenceur tenu + encodeurs : longueur et sens de lecture du pad
+        # Step tenu + encodeurs : vélocité, probabilité, ratchets, gate et micro-timing du step
+        if hasattr(self.app, "sequencer_controller"):
+            controller = self.app.sequencer_controller
+            return (controller.handle_pad_settings_encoder(encoder_name, increment)
+                    or controller.handle_step_parameter_encoder(encoder_name, increment))
+        return False
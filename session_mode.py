@@ -1,4 +1,5 @@
 import definitions
+import events
 import push2_python.constants
 from melodic_mode import MelodicMode
 
@@ -13,7 +14,7 @@ class Clip:
 
     def __init__(self):
         self.state = Clip.STATE_EMPTY
-        self.data = []              # liste d'évènements: {note, velocity, start, end}
+        self.data = []              # liste d'évènements: events.ClipNote (note, velocity, start, end)
         self.length = 0             # longueur du clip en "steps clip"
         self.last_step_notes = []   # optionnel (non utilisé pour l'instant)
 
@@ -149,13 +150,18 @@ class SessionMode(MelodicMode):
         push.buttons.set_button_color("Clip", definitions.BLACK)
 
         super().deactivate()
-        self.app.pads_need_update = True
-        self.app.buttons_need_update = True
+        self.app.invalidate_pads()
+        self.app.invalidate_buttons()
 
     # -----------------------------------------------------------
     # UPDATE PADS
     # -----------------------------------------------------------
     def update_pads(self):
+        if not self.app.is_mode_active(self):
+            return
+        self.update_pads_region([(r, c) for r in range(8) for c in range(8)])
+
+    def update_pads_region(self, pads_ij):
         if not self.app.is_mode_active(self):
             return
 
@@ -164,47 +170,49 @@ class SessionMode(MelodicMode):
         tracks = getattr(tsm, "tracks_info", None)
 
         if not tracks or len(tracks) < 8:
-            track_color = definitions.GRAY_DARK
             tracks = [{} for _ in range(8)]
 
-        for r in range(8):
-            for c in range(8):
-                clip = self.clips.get_clip(r, c)
+        for r, c in pads_ij:
+            color, anim = self.get_clip_pad_color(r, c, tracks)
+            push.pads.set_pad_color((r, c), color, anim)
 
-                if 0 <= c < len(tracks):
-                    track_color = tracks[c].get("color", definitions.GRAY_DARK)
-                else:
-                    track_color = definitions.GRAY_DARK
+    def get_clip_pad_color(self, r, c, tracks):
+        clip = self.clips.get_clip(r, c)
 
-                if clip.state == Clip.STATE_EMPTY and len(clip.data) > 0:
-                    color = track_color
-                    anim = None
-                elif clip.state == Clip.STATE_EMPTY:
-                    color = definitions.GRAY_DARK
-                    anim = None
-                elif clip.state == Clip.STATE_QUEUED:
-                    color = definitions.YELLOW
-                    anim = push2_python.constants.ANIMATION_BLINKING_HALF
-                elif clip.state == Clip.STATE_QUEUED_RECORD:
-                    color = definitions.ORANGE
-                    anim = push2_python.constants.ANIMATION_BLINKING_HALF
-                elif clip.state == Clip.STATE_RECORDING:
-                    color = definitions.RED
-                    anim = push2_python.constants.ANIMATION_PULSING_QUARTER
-                elif clip.state == Clip.STATE_WAIT_END_RECORD:
-                    color = definitions.RED
-                    anim = push2_python.constants.ANIMATION_BLINKING_HALF
-                elif clip.state == Clip.STATE_PLAYING:
-                    color = track_color
-                    anim = push2_python.constants.ANIMATION_PULSING_HALF
-                else:
-                    color = definitions.GRAY_DARK
-                    anim = None
-
-                if anim is None:
-                    anim = push2_python.constants.ANIMATION_STATIC
+        if 0 <= c < len(tracks):
+            track_color = tracks[c].get("color", definitions.GRAY_DARK)
+        else:
+            track_color = definitions.GRAY_DARK
 
-                push.pads.set_pad_color((r, c), color, anim)
+        if clip.state == Clip.STATE_EMPTY and len(clip.data) > 0:
+            color = track_color
+            anim = None
+        elif clip.state == Clip.STATE_EMPTY:
+            color = definitions.GRAY_DARK
+            anim = None
+        elif clip.state == Clip.STATE_QUEUED:
+            color = definitions.YELLOW
+            anim = push2_python.constants.ANIMATION_BLINKING_HALF
+        elif clip.state == Clip.STATE_QUEUED_RECORD:
+            color = definitions.ORANGE
+            anim = push2_python.constants.ANIMATION_BLINKING_HALF
+        elif clip.state == Clip.STATE_RECORDING:
+            color = definitions.RED
+            anim = push2_python.constants.ANIMATION_PULSING_QUARTER
+        elif clip.state == Clip.STATE_WAIT_END_RECORD:
+            color = definitions.RED
+            anim = push2_python.constants.ANIMATION_BLINKING_HALF
+        elif clip.state == Clip.STATE_PLAYING:
+            color = track_color
+            anim = push2_python.constants.ANIMATION_PULSING_HALF
+        else:
+            color = definitions.GRAY_DARK
+            anim = None
+
+        if anim is None:
+            anim = push2_python.constants.ANIMATION_STATIC
+
+        return color, anim
 
     def update_buttons(self):
         push = self.push
@@ -217,6 +225,10 @@ class SessionMode(MelodicMode):
         push.buttons.set_button_color("Select", definitions.WHITE)
         push.buttons.set_button_color("Clip", definitions.WHITE)
 
+    def update_buttons_subset(self, button_names):
+        # Les boutons du mode Session sont toujours allumés, pas besoin de détailler
+        self.update_buttons()
+
     # -----------------------------------------------------------
     #  STEP CALLBACK (PLAYBACK / RECORD)
     # -----------------------------------------------------------
@@ -262,7 +274,7 @@ class SessionMode(MelodicMode):
                             f"[SESSION] START RECORDING ({r},{c}) "
                             f"at global_step={self.global_step}"
                         )
-                        self.app.pads_need_update = True
+                        self.invalidate_pads([(r, c)])
 
                     # -------------------------
                     # STOP RECORD (mesure cible)
@@ -289,13 +301,13 @@ class SessionMode(MelodicMode):
                         )
 
                         self._send_all_notes_off_for_track(c)
-                        self.app.pads_need_update = True
+                        self.invalidate_pads([(r, c)])
 
 
 
 
         if changed_states:
-            app.pads_need_update = True
+            self.invalidate_pads()
 
         # -----------------------------
         # 2) PLAYBACK : NOTE OFF / NOTE ON + gestion de la fin de clip
@@ -315,11 +327,11 @@ class SessionMode(MelodicMode):
 
                 # NOTE OFF au step courant
                 for ev in clip.data:
-                    if ev.get("end") == step_in_clip:
+                    if ev.end == step_in_clip:
                         try:
                             if c < len(tracks):
                                 instr = tracks[c]["instrument_short_name"]
-                                note = ev["note"]
+                                note = ev.note
                                 print(f"[SESSION-PLAY] NOTE_OFF instr={instr} note={note} clip_step={step_in_clip}")
                                 app.synths_midi.send_note_off(instr, note)
                         except Exception as e:
@@ -327,12 +339,12 @@ class SessionMode(MelodicMode):
 
                 # NOTE ON au step courant
                 for ev in clip.data:
-                    if ev.get("start") == step_in_clip:
+                    if ev.start == step_in_clip:
                         try:
                             if c < len(tracks):
                                 instr = tracks[c]["instrument_short_name"]
-                                note = ev["note"]
-                                vel = ev.get("velocity", 100)
+                                note = ev.note
+                                vel = ev.velocity
                                 print(f"[SESSION-PLAY] NOTE_ON instr={instr} note={note} vel={vel} clip_step={step_in_clip}")
                                 app.synths_midi.send_note_on(instr, note, vel)
                         except Exception as e:
@@ -351,7 +363,7 @@ class SessionMode(MelodicMode):
                         clip.state = Clip.STATE_EMPTY
                         clip.playhead_step = 0
                         clip.stop_after_end = False
-                        app.pads_need_update = True
+                        self.invalidate_pads([(r, c)])
                     else:
                         # Loop par défaut
                         clip.playhead_step = 0
@@ -360,7 +372,7 @@ class SessionMode(MelodicMode):
         # 3) QUEUED → PLAYING AU DÉBUT DE MESURE
         # -----------------------------
         if is_measure_start:
-            changed = False
+            changed_pads = []
             for r in range(8):
                 for c in range(8):
                     clip = self.clips.get_clip(r, c)
@@ -369,9 +381,9 @@ class SessionMode(MelodicMode):
                         clip.playhead_step = 0
                         clip.stop_after_end = False
                         print(f"[SESSION] Clip ({r},{c}) → PLAYING at measure start (global_step={self.global_step})")
-                        changed = True
-            if changed:
-                app.pads_need_update = True
+                        changed_pads.append((r, c))
+            if changed_pads:
+                self.invalidate_pads(changed_pads)
 
     # -----------------------------------------------------------
     # QUANTISATION
@@ -393,19 +405,19 @@ class SessionMode(MelodicMode):
 
         max_end = 0
         for ev in clip.data:
-            start = ev.get("start")
-            end = ev.get("end")
+            start = ev.start
+            end = ev.end
 
             if start is not None:
-                ev["start"] = q(start)
+                ev.start = q(start)
 
             if end is not None:
-                ev["end"] = q(end)
+                ev.end = q(end)
                 # Sécurité : éviter end < start
-                if ev["end"] < ev["start"]:
-                    ev["end"] = ev["start"] + 1
-                if ev["end"] > max_end:
-                    max_end = ev["end"]
+                if ev.end < ev.start:
+                    ev.end = ev.start + 1
+                if ev.end > max_end:
+                    max_end = ev.end
 
         if max_end > 0:
             # On s'assure que la longueur est au moins jusqu'à la dernière note
@@ -435,7 +447,7 @@ class SessionMode(MelodicMode):
             if len(clip.data) > 0 or clip.length > 0 or clip.state != Clip.STATE_EMPTY:
                 clip.clear()
                 print(f"[SESSION] Clip ({row},{col}) deleted via Delete+Pad")
-                self.app.pads_need_update = True
+                self.invalidate_pads([(row, col)])
                 return True
             else:
                 # Rien à supprimer
@@ -472,7 +484,7 @@ class SessionMode(MelodicMode):
 
                 # Copie des données
                 clip.clear()
-                clip.data = [dict(ev) for ev in src_clip.data]
+                clip.data = [ev.copy() for ev in src_clip.data]
                 clip.length = src_clip.length
                 clip.state = Clip.STATE_EMPTY
                 clip.playhead_step = 0
@@ -480,7 +492,7 @@ class SessionMode(MelodicMode):
                 clip.record_start_step = None
 
                 print(f"[SESSION] Clip ({src_r},{src_c}) duplicated to ({row},{col})")
-                self.app.pads_need_update = True
+                self.invalidate_pads([(row, col)])
                 return True
 
         # ---------------------------------------------------
@@ -513,7 +525,7 @@ class SessionMode(MelodicMode):
                 clip.stop_after_end = False
                 print(f"[SESSION] Pad ({row},{col}) → QUEUED (play at next measure)")
 
-            self.app.pads_need_update = True
+            self.invalidate_pads([(row, col)])
             return True
 
         # --- Clip vide : programmation enregistrement à prochaine mesure ---
@@ -523,7 +535,7 @@ class SessionMode(MelodicMode):
             clip.playhead_step = 0
             clip.stop_after_end = False
             print(f"[SESSION] Pad ({row},{col}) → QUEUED_RECORD (rec at next measure)")
-            self.app.pads_need_update = True
+            self.invalidate_pads([(row, col)])
             return True
 
         # --- Pendant RECORDING : demander arrêt à prochaine mesure ---
@@ -534,7 +546,7 @@ class SessionMode(MelodicMode):
             print(
                 f"[SESSION] STOP REC requested → will stop at measure {clip.record_stop_measure}"
             )
-            self.app.pads_need_update = True
+            self.invalidate_pads([(row, col)])
 
 
         return False
@@ -578,12 +590,7 @@ class SessionMode(MelodicMode):
 
         # NOTE ON (velocity > 0)
         if msg.type == "note_on" and msg.velocity > 0:
-            ev = {
-                "note": msg.note,
-                "velocity": msg.velocity,
-                "start": clip_step,
-                "end": None,
-            }
+            ev = events.ClipNote(msg.note, msg.velocity, clip_step, None)
             clip.data.append(ev)
             print(f"[SESSION-REC] NOTE_ON note={msg.note} vel={msg.velocity} clip_step={clip_step}")
             return True
@@ -591,8 +598,8 @@ class SessionMode(MelodicMode):
         # NOTE OFF (note_off ou note_on vel=0)
         if msg.type == "note_off" or (msg.type == "note_on" and msg.velocity == 0):
             for ev in reversed(clip.data):
-                if ev.get("note") == msg.note and ev.get("end") is None:
-                    ev["end"] = clip_step
+                if ev.note == msg.note and ev.end is None:
+                    ev.end = clip_step
                     print(f"[SESSION-REC] NOTE_OFF note={msg.note} clip_step={clip_step}")
                     break
             return True
@@ -610,7 +617,7 @@ class SessionMode(MelodicMode):
         self.app.selected_clip = self.selected_clip
 
         # Forcer le refresh visuel des pads
-        self.app.pads_need_update = True
+        self.invalidate_pads([(scene, track)])
 
 
     # -----------------------------------------------------------
@@ -705,6 +712,11 @@ class SessionMode(MelodicMode):
     # -----------------------------------------------------------
     # AFFICHAGE PUSH 2 : barre d’avancement de mesure
     # -----------------------------------------------------------
+    def get_display_version(self):
+        # La barre d'avancement et le piano-roll dépendent du step courant du séquenceur
+        seq = getattr(self.app, "sequencer_controller", None)
+        return (self.display_version, getattr(seq, "current_step", 0))
+
     def update_display(self, ctx, w, h):
         """
         Étend l'affichage du SessionMode (hérité de MelodicMode)
@@ -814,17 +826,17 @@ class SessionMode(MelodicMode):
 
             ref = self.clip_view_selected_event
             if ref is not None:
-                ref_start = ref.get("start")
+                ref_start = ref.start
                 if ref_start is not None:
                     selected_group = [
-                        ev for ev in clip.data if ev.get("start") == ref_start
+                        ev for ev in clip.data if ev.start == ref_start
                     ]
             """
             # --- dessin des notes ---
             for ev in clip.data:
-                start = ev.get("start")
-                end = ev.get("end")
-                note = ev.get("note")
+                start = ev.start
+                end = ev.end
+                note = ev.note
 
                 if start is None or end is None or note is None:
                     continue
@@ -939,26 +951,26 @@ class SessionMode(MelodicMode):
         track.append(mido.MetaMessage("set_tempo", tempo=tempo, time=0))
 
         # --- collect events ---
-        events = []
+        timed_events = []
 
         for ev in clip.data:
-            note = ev["note"]
-            vel = ev.get("velocity", 100)
-            start = ev.get("start", 0)
-            end = ev.get("end", start + 1)
+            note = ev.note
+            vel = ev.velocity
+            start = ev.start
+            end = ev.end if ev.end is not None else start + 1
 
             start_tick = int(start * ticks_per_step)
             end_tick = int(end * ticks_per_step)
 
-            events.append((start_tick, "on", note, vel))
-            events.append((end_tick, "off", note, 0))
+            timed_events.append((start_tick, "on", note, vel))
+            timed_events.append((end_tick, "off", note, 0))
 
         # --- trier par temps ---
-        events.sort(key=lambda e: e[0])
+        timed_events.sort(key=lambda e: e[0])
 
         # --- écrire avec delta-times ---
         last_tick = 0
-        for tick, etype, note, vel in events:
+        for tick, etype, note, vel in timed_events:
             delta = tick - last_tick
             last_tick = tick
 
@@ -1007,14 +1019,14 @@ class SessionMode(MelodicMode):
         if ev is None:
             return
 
-        ev["start"] = max(0, ev["start"] + delta_steps)
-        if ev.get("end") is not None:
-            ev["end"] = max(ev["start"] + 1, ev["end"] + delta_steps)
+        ev.start = max(0, ev.start + delta_steps)
+        if ev.end is not None:
+            ev.end = max(ev.start + 1, ev.end + delta_steps)
 
         # IMPORTANT : tri autorisé
         scene, track = self.selected_clip
         clip = self.clips.get_clip(scene, track)
-        clip.data.sort(key=lambda e: e.get("start", 0))
+        clip.data.sort(key=lambda e: e.start)
 
 
     def clip_view_move_selected_in_pitch(self, delta_notes):
@@ -1022,7 +1034,7 @@ class SessionMode(MelodicMode):
         if ev is None:
             return
 
-        ev["note"] = max(0, min(127, ev["note"] + delta_notes))
+        ev.note = max(0, min(127, ev.note + delta_notes))
 
 
     def clip_view_select_event(self, direction):
@@ -1036,7 +1048,7 @@ class SessionMode(MelodicMode):
             return
 
         # Toujours travailler sur une vue triée
-        sorted_events = sorted(clip.data, key=lambda ev: ev.get("start", 0))
+        sorted_events = sorted(clip.data, key=lambda ev: ev.start)
 
         # Si aucune sélection → première note
         if self.clip_view_selected_event not in sorted_events:
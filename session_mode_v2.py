@@ -9,6 +9,8 @@ NE REMPLACE PAS encore session_mode.py
 import mido
 from enum import Enum
 
+import events
+
 
 # ---------------------------------------------------------------------
 # CLIP STATE
@@ -41,8 +43,8 @@ class Clip:
         self.pending_stop_bar = None
 
         # données musicales
-        self.raw_events = []
-        self.grid = {}
+        self.raw_events = []    # events.NoteOn / events.NoteOff ('tick' = global tick)
+        self.grid = {}          # step -> liste de events.ClipNote
         self.steps_per_clip = None
 
     def clear(self):
@@ -160,14 +162,14 @@ class SessionModeV2:
                 continue
 
             local_step = (global_step - clip.start_global_step) % clip.steps_per_clip
-            events = clip.grid.get(local_step)
-            if not events:
+            step_events = clip.grid.get(local_step)
+            if not step_events:
                 continue
 
-            for ev in events:
-                note = ev["note"]
-                vel = ev["velocity"]
-                dur = ev["duration_steps"]
+            for ev in step_events:
+                note = ev.note
+                vel = ev.velocity
+                dur = ev.end - ev.start
 
                 self._send_note_on(note, vel)
                 self._schedule_note_off(global_step + dur, note)
@@ -181,17 +183,8 @@ class SessionModeV2:
         if msg.type not in ("note_on", "note_off"):
             return
 
-        tick = self.sequencer.global_tick
-        etype = msg.type
-        if etype == "note_on" and msg.velocity == 0:
-            etype = "note_off"
-
-        self.recording_clip.raw_events.append({
-            "type": etype,
-            "note": msg.note,
-            "velocity": msg.velocity,
-            "tick": tick
-        })
+        # note_on de vélocité 0 → NoteOff
+        self.recording_clip.raw_events.append(events.from_mido(msg, tick=self.sequencer.global_tick))
 
     # -----------------------------------------------------------------
     # RAW → GRID
@@ -209,28 +202,19 @@ class SessionModeV2:
         active = {}
 
         for ev in clip.raw_events:
-            local_tick = ev["tick"] - clip.start_global_tick
+            local_tick = ev.tick - clip.start_global_tick
             step = round(local_tick / ticks_per_step)
             step = max(0, min(step, clip.steps_per_clip - 1))
 
-            if ev["type"] == "note_on":
-                active[ev["note"]] = (step, ev["velocity"])
-            elif ev["type"] == "note_off" and ev["note"] in active:
-                start, vel = active.pop(ev["note"])
+            if ev.type == "note_on":
+                active[ev.note] = (step, ev.velocity)
+            elif ev.type == "note_off" and ev.note in active:
+                start, vel = active.pop(ev.note)
                 dur = max(1, step - start)
-                clip.grid[start].append({
-                    "note": ev["note"],
-                    "velocity": vel,
-                    "duration_steps": dur
-                })
+                clip.grid[start].append(events.ClipNote(ev.note, vel, start, start + dur))
 
         for note, (start, vel) in active.items():
-            dur = clip.steps_per_clip - start
-            clip.grid[start].append({
-                "note": note,
-                "velocity": vel,
-                "duration_steps": dur
-            })
+            clip.grid[start].append(events.ClipNote(note, vel, start, clip.steps_per_clip))
 
     # -----------------------------------------------------------------
     # MIDI OUT (minimal)
@@ -280,34 +264,34 @@ class SessionModeV2:
 
         ticks_per_step = ppqn // 4  # 1/16
 
-        events = []
+        timed_messages = []
 
         for step, notes in clip.grid.items():
             for ev in notes:
                 start_tick = step * ticks_per_step
-                end_tick = start_tick + ev["duration_steps"] * ticks_per_step
+                end_tick = start_tick + (ev.end - ev.start) * ticks_per_step
 
-                events.append((start_tick, mido.Message(
+                timed_messages.append((start_tick, mido.Message(
                     "note_on",
-                    note=ev["note"],
-                    velocity=ev["velocity"],
+                    note=ev.note,
+                    velocity=ev.velocity,
                     channel=0,
                     time=0
                 )))
-                events.append((end_tick, mido.Message(
+                timed_messages.append((end_tick, mido.Message(
                     "note_off",
-                    note=ev["note"],
+                    note=ev.note,
                     velocity=0,
                     channel=0,
                     time=0
                 )))
 
         # Trier par temps
-        events.sort(key=lambda e: e[0])
+        timed_messages.sort(key=lambda e: e[0])
 
         # Convertir en delta-time
         last_tick = 0
-        for tick, msg in events:
+        for tick, msg in timed_messages:
             msg.time = tick - last_tick
             track.append(msg)
             last_tick = tick
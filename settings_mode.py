@@ -1,4 +1,5 @@
 import definitions
+import events
 import push2_python.constants
 import time
 import os
@@ -9,6 +10,31 @@ import subprocess
 
 from display_utils import show_title, show_value, draw_text_at
 
+# Labels of the settings shown in each part of the display, per settings page
+SETTINGS_PAGES_TITLES = {
+    0: {  # Performance settings
+        0: 'ROOT NOTE',
+        1: 'AFTERTOUCH',
+        2: 'cAT START',
+        3: 'cAT END',
+        5: 'pAT CURVE',
+    },
+    1: {  # MIDI settings
+        0: 'IN DEVICE',
+        1: 'IN CH',
+        2: 'OUT DEVICE',
+        3: 'OUT CH',
+        6: 'RESET MIDI',  # Re-send MIDI connection established (to push, not MIDI in/out device)
+    },
+    2: {  # About
+        0: 'SAVE',
+        1: 'VERSION',
+        2: 'SW UPDATE',
+        3: 'FPS',
+        4: 'PROFILING',
+    },
+}
+
 
 class SettingsMode(definitions.PyshaMode):
 
@@ -34,11 +60,12 @@ class SettingsMode(definitions.PyshaMode):
 
     current_page = 0
     n_pages = 3
+    has_display_background = True
     encoders_state = {}
     is_running_sw_update = False
 
     def move_to_next_page(self):
-        self.app.buttons_need_update = True
+        self.invalidate_buttons()
         self.current_page += 1
         if self.current_page >= self.n_pages:
             self.current_page = 0
@@ -48,9 +75,7 @@ class SettingsMode(definitions.PyshaMode):
     def initialize(self, settings=None):
         current_time = time.time()
         for encoder_name in self.push.encoders.available_names:
-            self.encoders_state[encoder_name] = {
-                'last_message_received': current_time,
-            }
+            self.encoders_state[encoder_name] = events.EncoderTurn(encoder_name, 0, current_time)
 
     def activate(self):
         self.current_page = 0
@@ -76,12 +101,12 @@ class SettingsMode(definitions.PyshaMode):
         # MIDI IN / OUT globaux (inchangé)
         # ---------------------------------------------------------
         if self.app.midi_in_tmp_device_idx is not None:
-            if current_time - self.encoders_state[push2_python.constants.ENCODER_TRACK1_ENCODER]['last_message_received'] > definitions.DELAYED_ACTIONS_APPLY_TIME:
+            if current_time - self.encoders_state[push2_python.constants.ENCODER_TRACK1_ENCODER].time > definitions.DELAYED_ACTIONS_APPLY_TIME:
                 self.app.set_midi_in_device_by_index(self.app.midi_in_tmp_device_idx)
                 self.app.midi_in_tmp_device_idx = None
 
         if self.app.midi_out_tmp_device_idx is not None:
-            if current_time - self.encoders_state[push2_python.constants.ENCODER_TRACK3_ENCODER]['last_message_received'] > definitions.DELAYED_ACTIONS_APPLY_TIME:
+            if current_time - self.encoders_state[push2_python.constants.ENCODER_TRACK3_ENCODER].time > definitions.DELAYED_ACTIONS_APPLY_TIME:
                 self.app.set_midi_out_device_by_index(self.app.midi_out_tmp_device_idx)
                 self.app.midi_out_tmp_device_idx = None
 
@@ -125,11 +150,9 @@ class SettingsMode(definitions.PyshaMode):
             # Appliquer IN
             self.app.synths_midi.assign_instrument_ports(instr, in_name, out_name)
 
-            # Mise à jour UI
-            self.app.synth_window.update_port_from_external_change(
-                instr,
-                in_name=in_name
-            )
+            # Mise à jour UI (fenêtre optionnelle, thread Qt)
+            if self.app.synth_window is not None:
+                self.app.run_in_qt_thread(self.app.synth_window.update_port_from_external_change, instr, in_name=in_name)
 
             # RESET
             self.instrument_in_tmp_idx = None
@@ -165,11 +188,9 @@ class SettingsMode(definitions.PyshaMode):
             # Appliquer OUT
             self.app.synths_midi.assign_instrument_ports(instr, in_name, out_name)
 
-            # UI
-            self.app.synth_window.update_port_from_external_change(
-                instr,
-                out_name=out_name
-            )
+            # UI (fenêtre optionnelle, thread Qt)
+            if self.app.synth_window is not None:
+                self.app.run_in_qt_thread(self.app.synth_window.update_port_from_external_change, instr, out_name=out_name)
 
             # RESET
             self.instrument_out_tmp_idx = None
@@ -207,28 +228,33 @@ class SettingsMode(definitions.PyshaMode):
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_4, definitions.WHITE)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_5, definitions.WHITE)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_6, definitions.WHITE)
-            self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_7, definitions.BLACK)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_7, definitions.GREEN, animation=definitions.DEFAULT_ANIMATION)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_8, definitions.OFF_BTN_COLOR)
             
         elif self.current_page == 2:  # About
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_1, definitions.GREEN)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_2, definitions.OFF_BTN_COLOR)
-            self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_3, definitions.BLACK)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_3, definitions.RED, animation=definitions.DEFAULT_ANIMATION)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_4, definitions.OFF_BTN_COLOR)
-            self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_5, definitions.OFF_BTN_COLOR)
+            self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_5, definitions.WHITE)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_6, definitions.OFF_BTN_COLOR)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_7, definitions.OFF_BTN_COLOR)
             self.push.buttons.set_button_color(push2_python.constants.BUTTON_UPPER_ROW_8, definitions.OFF_BTN_COLOR)
         
-    def update_display(self, ctx, w, h):
+    def get_display_version(self):
+        # Settings pages show values which change without Push events (delayed actions being applied, FPS, latest
+        # velocity/AT values...), so re-render the settings page a few times per second
+        return (self.display_version, self.current_page, int(time.time() * 4))
+
+    def get_background_version(self):
+        return (self.background_version, self.current_page)
+
+    def update_display_background(self, ctx, w, h):
 
         # Divide display in 8 parts to show different settings
         part_w = w // 8
-        part_h = h
 
-        # Draw labels and values
+        # Draw black background and labels
         for i in range(0, 8):
             part_x = i * part_w
             part_y = 0
@@ -237,37 +263,51 @@ class SettingsMode(definitions.PyshaMode):
             ctx.rectangle(part_x - 3, part_y, w, h)  # do x -3 to add some margin between parts
             ctx.fill()
 
+            title = SETTINGS_PAGES_TITLES.get(self.current_page, {}).get(i, None)
+            if title is not None:
+                show_title(ctx, part_x, h, title)
+
+    def update_display(self, ctx, w, h):
+
+        # Divide display in 8 parts to show different settings
+        part_w = w // 8
+        part_h = h
+
+        # Draw values (black background and labels are drawn in update_display_background)
+        for i in range(0, 8):
+            part_x = i * part_w
+
+            # Clip to the part so long values don't overlap the next part (including some margin between parts)
+            ctx.save()
+            ctx.rectangle(part_x - 3, 0, part_w if i < 7 else w - part_x + 3, h)
+            ctx.clip()
+
             color = [1.0, 1.0, 1.0]
 
             if self.current_page == 0:  # Performance settings
                 if i == 0:  # Root note
                     if not self.app.is_mode_active(self.app.melodic_mode):
                         color = definitions.get_color_rgb_float(definitions.FONT_COLOR_DISABLED)
-                    show_title(ctx, part_x, h, 'ROOT NOTE')
                     show_value(ctx, part_x, h, "{0} ({1})".format(self.app.melodic_mode.note_number_to_name(
                         self.app.melodic_mode.root_midi_note), self.app.melodic_mode.root_midi_note), color)
 
                 elif i == 1:  # Poly AT/channel AT
-                    show_title(ctx, part_x, h, 'AFTERTOUCH')
                     show_value(ctx, part_x, h, 'polyAT' if self.app.melodic_mode.use_poly_at else 'channel', color)
 
                 elif i == 2:  # Channel AT range start
                     if self.app.melodic_mode.last_time_at_params_edited is not None:
                         color = definitions.get_color_rgb_float(definitions.FONT_COLOR_DELAYED_ACTIONS)
-                    show_title(ctx, part_x, h, 'cAT START')
                     show_value(ctx, part_x, h, self.app.melodic_mode.channel_at_range_start, color)
 
                 elif i == 3:  # Channel AT range end
                     if self.app.melodic_mode.last_time_at_params_edited is not None:
                         color = definitions.get_color_rgb_float(definitions.FONT_COLOR_DELAYED_ACTIONS)
-                    show_title(ctx, part_x, h, 'cAT END')
                     show_value(ctx, part_x, h, self.app.melodic_mode.channel_at_range_end, color)
 
 
                 elif i == 5:  # Poly AT curve
                     if self.app.melodic_mode.last_time_at_params_edited is not None:
                         color = definitions.get_color_rgb_float(definitions.FONT_COLOR_DELAYED_ACTIONS)
-                    show_title(ctx, part_x, h, 'pAT CURVE')
                     show_value(ctx, part_x, h, self.app.melodic_mode.poly_at_curve_bending, color)
 
             elif self.current_page == 1:  # MIDI settings
@@ -308,13 +348,11 @@ class SettingsMode(definitions.PyshaMode):
                                 name = "None"
 
 
-                    show_title(ctx, part_x, h, 'IN DEVICE')
                     show_value(ctx, part_x, h, name, color)
 
                 elif i == 1:  # MIDI in channel
                     if self.app.midi_in is None:
                         color = definitions.get_color_rgb_float(definitions.FONT_COLOR_DISABLED)
-                    show_title(ctx, part_x, h, 'IN CH')
                     show_value(ctx, part_x, h, self.app.midi_in_channel + 1 if self.app.midi_in_channel > -1 else "All", color)
 
                 elif i == 2:  # MIDI OUT (par instrument)
@@ -354,38 +392,30 @@ class SettingsMode(definitions.PyshaMode):
                                 name = "None"
 
 
-                    show_title(ctx, part_x, h, 'OUT DEVICE')
                     show_value(ctx, part_x, h, name, color)
 
 
                 elif i == 3:  # MIDI out channel
                     if self.app.midi_out is None:
                         color = definitions.get_color_rgb_float(definitions.FONT_COLOR_DISABLED)
-                    show_title(ctx, part_x, h, 'OUT CH')
                     show_value(ctx, part_x, h, self.app.midi_out_channel + 1 if self.app.midi_out_channel >= 0 else 'TR', color)
 
-                
-
-
-                elif i == 6:  # Re-send MIDI connection established (to push, not MIDI in/out device)
-                    show_title(ctx, part_x, h, 'RESET MIDI')
 
             elif self.current_page == 2:  # About
-                if i == 0:  # Save button
-                    show_title(ctx, part_x, h, 'SAVE')
-
-                elif i ==1: # definitions.VERSION info
-                    show_title(ctx, part_x, h, 'VERSION')
+                if i ==1: # definitions.VERSION info
                     show_value(ctx, part_x, h, 'Pysha ' + definitions.VERSION, color)
 
                 elif i == 2:  # Software update
-                    show_title(ctx, part_x, h, 'SW UPDATE')
                     if self.is_running_sw_update:
                         show_value(ctx, part_x, h, 'Running... ', color)
                 
                 elif i == 3:  # FPS indicator
-                    show_title(ctx, part_x, h, 'FPS')
-                    show_value(ctx, part_x, h, self.app.actual_frame_rate, color)
+                    show_value(ctx, part_x, h, "{0} ({1})".format(self.app.actual_frame_rate, self.app.frame_rate_governor.current_reason), color)
+
+                elif i == 4:  # Mode profiling
+                    show_value(ctx, part_x, h, 'On' if self.app.mode_profiler.enabled else 'Off', color)
+
+            ctx.restore()
 
         # After drawing all labels and values, draw other stuff if required
         if self.current_page == 0:  # Performance settings
@@ -414,19 +444,19 @@ class SettingsMode(definitions.PyshaMode):
             if current_time - self.app.melodic_mode.latest_poly_at_value[0] < 3 and self.app.melodic_mode.use_poly_at:
                 # Lastest channel AT value received less than 3 seconds ago
                 draw_text_at(ctx, 3, part_h - 3, f'Latest pAT: {self.app.melodic_mode.latest_poly_at_value[1]}', font_size=20)
-            if current_time - self.app.melodic_mode.latest_velocity_value[0] < 3:
+            if current_time - self.app.melodic_mode.latest_pad_press.time < 3:
                 # Lastest note on velocity value received less than 3 seconds ago
-                draw_text_at(ctx, 3, part_h - 26, f'Latest velocity: {self.app.melodic_mode.latest_velocity_value[1]}', font_size=20)
+                draw_text_at(ctx, 3, part_h - 26, f'Latest velocity: {self.app.melodic_mode.latest_pad_press.velocity}', font_size=20)
 
 
     def on_encoder_rotated(self, encoder_name, increment):
 
-        self.encoders_state[encoder_name]['last_message_received'] = time.time()
+        self.encoders_state[encoder_name].set(encoder_name, increment, time.time())
 
         if self.current_page == 0:  # Performance settings
             if encoder_name == push2_python.constants.ENCODER_TRACK1_ENCODER:
                 self.app.melodic_mode.set_root_midi_note(self.app.melodic_mode.root_midi_note + increment)
-                self.app.pads_need_update = True  # Using async update method because we don't really need immediate response here
+                self.app.melodic_mode.invalidate_pads()  # Using async update method because we don't really need immediate response here
 
             elif encoder_name == push2_python.constants.ENCODER_TRACK2_ENCODER:
                 if increment >= 3:  # Only respond to "big" increments
@@ -458,7 +488,7 @@ class SettingsMode(definitions.PyshaMode):
 
         elif self.current_page == 1:  # MIDI settings
             if encoder_name == push2_python.constants.ENCODER_TRACK1_ENCODER:
-                self.encoders_state[push2_python.constants.ENCODER_TRACK1_ENCODER]['last_message_received'] = time.time()
+                self.encoders_state[push2_python.constants.ENCODER_TRACK1_ENCODER].time = time.time()
 
                 # Instrument sélectionné
                 instr = self.app.track_selection_mode.get_current_track_info()['instrument_short_name']
@@ -500,7 +530,7 @@ class SettingsMode(definitions.PyshaMode):
                 self.app.set_midi_in_channel(self.app.midi_in_channel + increment, wrap=False)
 
             elif encoder_name == push2_python.constants.ENCODER_TRACK3_ENCODER:
-                self.encoders_state[push2_python.constants.ENCODER_TRACK3_ENCODER]['last_message_received'] = time.time()
+                self.encoders_state[push2_python.constants.ENCODER_TRACK3_ENCODER].time = time.time()
 
                 # Instrument sélectionné
                 instr = self.app.track_selection_mode.get_current_track_info()['instrument_short_name']
@@ -567,7 +597,7 @@ class SettingsMode(definitions.PyshaMode):
         if self.current_page == 0:  # Performance settings
             if button_name == push2_python.constants.BUTTON_UPPER_ROW_1:
                 self.app.melodic_mode.set_root_midi_note(self.app.melodic_mode.root_midi_note + 1)
-                self.app.pads_need_update = True
+                self.app.melodic_mode.invalidate_pads()
                 return True
 
             elif button_name == push2_python.constants.BUTTON_UPPER_ROW_2:
@@ -670,6 +700,11 @@ class SettingsMode(definitions.PyshaMode):
                 run_sw_update()
                 return True
 
+            elif button_name == push2_python.constants.BUTTON_UPPER_ROW_5:
+                # Toggle mode profiling
+                self.app.set_mode_profiling(not self.app.mode_profiler.enabled)
+                return True
+
 
 def restart_program():
     """Restarts the current program, with file objects and descriptors cleanup
@@ -30,26 +30,34 @@ class SliceNotesMode(MelodicMode):
         # laisser MelodicMode gérer ses propres boutons, donc rien à faire ici
 
 
+    def get_pad_color(self, pad_ij):
+        corresponding_midi_note = self.pad_ij_to_midi_note(pad_ij)
+        midi_16_note_groups_idx = corresponding_midi_note // 16
+        #cell_color = self.color_groups[midi_16_note_groups_idx]
+        if midi_16_note_groups_idx % 2 == 0:
+            cell_color = self.app.track_selection_mode.get_current_track_color()
+        else:
+            cell_color = definitions.WHITE
+        if self.is_midi_note_being_played(corresponding_midi_note):
+            cell_color = definitions.NOTE_ON_COLOR
+        return cell_color
+
+    def get_pads_ij_for_midi_note(self, midi_note):
+        # Each note is in a single pad in this layout
+        relative_note = midi_note - self.start_note
+        if 0 <= relative_note < 64:
+            return [(7 - relative_note // 8, relative_note % 8)]
+        return []
+
     def update_pads(self):
         if not self.app.is_mode_active(self):
             return
-        color_matrix = []
-        for i in range(0, 8):
-            row_colors = []
-            for j in range(0, 8):
-                corresponding_midi_note = self.pad_ij_to_midi_note([i, j])
-                midi_16_note_groups_idx = corresponding_midi_note // 16
-                #cell_color = self.color_groups[midi_16_note_groups_idx]
-                if midi_16_note_groups_idx % 2 == 0:
-                    cell_color = self.app.track_selection_mode.get_current_track_color()
-                else:
-                    cell_color = definitions.WHITE
-                if self.is_midi_note_being_played(corresponding_midi_note):
-                    cell_color = definitions.NOTE_ON_COLOR
-                row_colors.append(cell_color)
-            color_matrix.append(row_colors)
-
-        self.push.pads.set_pads_color(color_matrix)
+        super().update_pads()
+
+    def update_pads_region(self, pads_ij):
+        if not self.app.is_mode_active(self):
+            return
+        super().update_pads_region(pads_ij)
 
     def on_button_pressed(self, button_name):
 
@@ -57,7 +65,7 @@ class SliceNotesMode(MelodicMode):
             self.start_note += 16
             if self.start_note > 128 - 16 * 4:
                 self.start_note = 128 - 16 * 4
-            self.app.pads_need_update = True
+            self.invalidate_pads()
             self.app.add_display_notification("MIDI notes range: {0} to {1}".format(
                 self.pad_ij_to_midi_note((7, 0)),
                 self.pad_ij_to_midi_note((0, 7)),
@@ -68,7 +76,7 @@ class SliceNotesMode(MelodicMode):
             self.start_note -= 16
             if self.start_note < 0:
                 self.start_note = 0
-            self.app.pads_need_update = True
+            self.invalidate_pads()
             self.app.add_display_notification("MIDI notes range: {0} to {1}".format(
                 self.pad_ij_to_midi_note((7, 0)),
                 self.pad_ij_to_midi_note((0, 7)),
@@ -0,0 +1,87 @@
+# tests/test_sequencer_scheduler.py
+import threading
+import unittest
+
+from controller.sequencer_pattern import SequencerPattern, StepTrigger
+from controller.sequencer_scheduler import SequencerScheduler
+
+TICKS_PER_STEP = 6
+
+
+class BlockingTarget(object):
+    # Cible qui bloque le premier note on (tick en cours dans le thread de clock) jusqu'à 'release'
+    def __init__(self):
+        self.sent = []
+        self.in_flight = threading.Event()
+        self.release = threading.Event()
+
+    def note_on(self, trigger):
+        self.sent.append(('on', trigger.note))
+        self.in_flight.set()
+        self.release.wait(5.0)
+
+    def note_off(self, trigger):
+        self.sent.append(('off', trigger.note))
+
+
+def clock_tick(scheduler, tick, target):
+    # Comme SequencerController.tick_from_clock_thread
+    for trigger in scheduler.handle_stop_request():
+        target.note_off(trigger)
+    for is_note_on, trigger in scheduler.process_tick(tick, TICKS_PER_STEP) or []:
+        if is_note_on:
+            target.note_on(trigger)
+        else:
+            target.note_off(trigger)
+
+
+class StopWhileTickInFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = SequencerScheduler(SequencerPattern())
+        self.target = BlockingTarget()
+        self.scheduler.start(0)
+        # Note tenue bien après l'arrêt (gate de 48 ticks)
+        trigger = StepTrigger(0, 60, 100, 48, 100, 1, 0)
+        self.scheduler.schedule_trigger(trigger, 1, TICKS_PER_STEP)
+
+    def stop_during_tick(self, clock_thread):
+        clock_thread.start()
+        self.assertTrue(self.target.in_flight.wait(5.0))
+        self.scheduler.request_stop()
+        # L'arrêt ne touche pas au tick en cours
+        self.assertTrue(self.scheduler.is_running())
+        self.target.release.set()
+        clock_thread.join(5.0)
+        self.assertFalse(clock_thread.is_alive())
+
+    def test_stop_handled_at_next_tick(self):
+        # Transport redémarré avant la fin du thread de clock : l'arrêt est fait au tick suivant
+        def run_clock():
+            for tick in range(10):
+                clock_tick(self.scheduler, tick, self.target)
+
+        self.stop_during_tick(threading.Thread(target=run_clock))
+        self.assertEqual(self.target.sent, [('on', 60), ('off', 60)])
+        self.assertFalse(self.scheduler.is_running())
+        self.assertEqual(self.scheduler.active_notes, {})
+
+    def test_stop_handled_when_clock_thread_ends(self):
+        # Thread de clock terminé juste après le tick en cours : son dernier appel fait l'arrêt
+        def run_clock():
+            for tick in range(2):
+                clock_tick(self.scheduler, tick, self.target)
+            for trigger in self.scheduler.stop():
+                self.target.note_off(trigger)
+
+        self.stop_during_tick(threading.Thread(target=run_clock))
+        self.assertEqual(self.target.sent, [('on', 60), ('off', 60)])
+        self.assertFalse(self.scheduler.stop_requested)
+
+    def test_no_stop_requested(self):
+        self.assertEqual(self.scheduler.handle_stop_request(), [])
+        self.assertTrue(self.scheduler.is_running())
+
+
+if __name__ == '__main__':
+    unittest.main()
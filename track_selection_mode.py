@@ -182,7 +182,6 @@ class TrackSelectionMode(definitions.PyshaMode):
                 color = self.tracks_info[self.track_button_names_a.index(self.track_selection_button_a)]['color']
                 equivalent_track_num = self.track_button_names_a.index(self.track_selection_button_a) + count * 8
                 if self.selected_track == equivalent_track_num:
-                    self.push.buttons.set_button_color(name, definitions.WHITE)
                     self.push.buttons.set_button_color(name, color, animation=definitions.DEFAULT_ANIMATION)
                 else:
                     self.push.buttons.set_button_color(name, color)
@@ -190,7 +189,6 @@ class TrackSelectionMode(definitions.PyshaMode):
                 color = self.get_current_track_color()
                 equivalent_track_num = (self.selected_track % 8) + count * 8
                 if self.selected_track == equivalent_track_num:
-                    self.push.buttons.set_button_color(name, definitions.WHITE)
                     self.push.buttons.set_button_color(name, color, animation=definitions.DEFAULT_ANIMATION)
                 else:
                     self.push.buttons.set_button_color(name, color)
@@ -215,7 +213,7 @@ class TrackSelectionMode(definitions.PyshaMode):
         if button_name in self.track_button_names_a:
             self.track_selection_button_a = button_name
             self.track_selection_button_a_pressing_time = time.time()
-            self.app.buttons_need_update = True
+            self.invalidate_buttons()
             return True
 
         elif button_name in self.track_button_names_b:
@@ -223,16 +221,16 @@ class TrackSelectionMode(definitions.PyshaMode):
                 # While pressing one of the track selection a buttons
                 self.select_track(self.track_button_names_a.index(
                     self.track_selection_button_a) + self.track_button_names_b.index(button_name) * 8)
-                self.app.buttons_need_update = True
-                self.app.pads_need_update = True
+                self.app.invalidate_buttons()
+                self.app.invalidate_pads()
                 self.track_selection_button_a = False
                 self.track_selection_button_a_pressing_time = 0
                 return True
             else:
                 # No track selection a button being pressed...
                 self.select_track(self.selected_track % 8 + 8 * self.track_button_names_b.index(button_name))
-                self.app.buttons_need_update = True
-                self.app.pads_need_update = True
+                self.app.invalidate_buttons()
+                self.app.invalidate_pads()
                 return True
 
     def on_button_released(self, button_name):
@@ -243,6 +241,6 @@ class TrackSelectionMode(definitions.PyshaMode):
                     self.select_track(self.track_button_names_a.index(button_name))
                 self.track_selection_button_a = False
                 self.track_selection_button_a_pressing_time = 0
-                self.app.buttons_need_update = True
-                self.app.pads_need_update = True
+                self.app.invalidate_buttons()
+                self.app.invalidate_pads()
                 return True
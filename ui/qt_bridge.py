@@ -0,0 +1,27 @@
+# ui/qt_bridge.py
+
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+
+class QtBridge(QObject):
+    """
+    Permet aux threads hors Qt (runtime Push/MIDI/écran, callbacks MIDI) d'exécuter du code
+    dans le thread Qt : les appels postés passent par un signal, délivré en QueuedConnection
+    au thread qui a créé le bridge (le thread Qt).
+    """
+    call_requested = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.call_requested.connect(self._run_call)
+
+    def post(self, func, *args, **kwargs):
+        self.call_requested.emit((func, args, kwargs))
+
+    @pyqtSlot(object)
+    def _run_call(self, call):
+        func, args, kwargs = call
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            print(f"[QT BRIDGE] Error running {func}: {e}")
@@ -5,35 +5,79 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt, pyqtSlot
 
+from controller.sequencer_state import SequencerState
+
 
 class SequencerWindow(QWidget):
-    def __init__(self):
+    """
+    Vue Qt (optionnelle) du séquenceur : l'état (steps, pad sélectionné, transport, tempo, résolution)
+    vit dans un SequencerState, indépendant de Qt et partagé avec le SequencerController.
+    """
+
+    def __init__(self, sequencer_state=None):
         super().__init__()
 
         self.setWindowTitle("Séquenceur 16 Pads – 64 Steps (Vue minimale)")
         self.setMinimumSize(900, 500)
 
-        # Séquence
-        self.selected_pad = 0
-        self.steps = [[False] * 32 for _ in range(16)]
-        self.current_step = 0
+        # Séquence, transport, tempo et résolution (voir SequencerState)
+        self.state = sequencer_state if sequencer_state is not None else SequencerState()
+
+        # Références externes (raccordées depuis app.py)
+        # self.app sera typiquement assigné depuis PyshaApp : window.app = self
+
+        self.build_ui()
 
-        # Instrument fixe du séquenceur (indépendant de SynthWindow)
-        self.sequencer_output_instrument = "DDRM"
+    # -------------------------------------------------------------
+    # Accès à l'état (compatibilité avec l'ancien code qui lisait la fenêtre)
+    # -------------------------------------------------------------
+    @property
+    def selected_pad(self):
+        return self.state.selected_pad
 
+    @selected_pad.setter
+    def selected_pad(self, pad_index):
+        self.state.selected_pad = pad_index
 
-        # Tempo par défaut
-        self.tempo_bpm = 120
+    @property
+    def current_step(self):
+        return self.state.current_step
 
-        # Résolution (steps par beat)
-        # 1/16 par défaut = 4 steps par beat
-        self.steps_per_beat = 4
+    @current_step.setter
+    def current_step(self, step):
+        self.state.current_step = step
 
-        # Références externes (raccordées depuis app.py)
-        self.sequencer_target = None  # sera assigné depuis l'extérieur
-        # self.app sera typiquement assigné depuis PyshaApp : window.app = self
+    @property
+    def sequencer_output_instrument(self):
+        return self.state.sequencer_output_instrument
 
-        self.build_ui()
+    @sequencer_output_instrument.setter
+    def sequencer_output_instrument(self, instr_name):
+        self.state.sequencer_output_instrument = instr_name
+
+    @property
+    def tempo_bpm(self):
+        return self.state.tempo_bpm
+
+    @tempo_bpm.setter
+    def tempo_bpm(self, bpm):
+        self.state.tempo_bpm = bpm
+
+    @property
+    def steps_per_beat(self):
+        return self.state.steps_per_beat
+
+    @steps_per_beat.setter
+    def steps_per_beat(self, steps_per_beat):
+        self.state.steps_per_beat = steps_per_beat
+
+    @property
+    def sequencer_target(self):
+        return self.state.sequencer_target
+
+    @sequencer_target.setter
+    def sequencer_target(self, target):
+        self.state.sequencer_target = target
 
     # -------------------------------------------------------------
     # UI
@@ -164,30 +208,33 @@ class SequencerWindow(QWidget):
     # -------------------------------------------------------------
     # Lecture du séquenceur
     # -------------------------------------------------------------
-    @pyqtSlot()
-    def toggle_play_slot(self):
-        print("[SEQ UI] toggle_play_slot called (thread-safe)")
-
-        # Inversion propre de l'état du bouton
-        current = self.play_button.isChecked()
-        self.play_button.setChecked(not current)
-
-        # maintenant toggle_play agit correctement
-        self.toggle_play()
-
-
-
     def toggle_play(self):
-        if self.play_button.isChecked():
+        """
+        Appelée par le bouton Play de la fenêtre : le transport (SequencerState.is_playing + clock)
+        est géré par le SequencerController (dans le thread runtime), la fenêtre ne fait que l'afficher.
+        """
+        playing = self.play_button.isChecked()
+        if hasattr(self, "app") and hasattr(self.app, "sequencer_controller"):
+            self.app.run_in_runtime_thread(self.app.sequencer_controller.set_playing, playing)
+        else:
+            self.state.is_playing = playing
+            self.update_transport_display()
+
+    def update_transport_display(self):
+        playing = self.state.is_playing
+        self.play_button.setChecked(playing)
+        if playing:
             self.play_button.setText("Stop")
-            # Clock globale (Synths_Midi)
-            if hasattr(self, "app"):
-                self.app.synths_midi.start_clock()
         else:
             self.play_button.setText("Play")
             self.reset_step_highlight()
-            if hasattr(self, "app"):
-                self.app.synths_midi.stop_clock()
+
+    def update_tempo_display(self):
+        # Sans ré-émettre valueChanged (le tempo est déjà appliqué par le controller)
+        self.tempo_dial.blockSignals(True)
+        self.tempo_dial.setValue(int(self.tempo_bpm))
+        self.tempo_dial.blockSignals(False)
+        self.tempo_label.setText(f"{self.tempo_bpm} BPM")
 
     def set_tempo(self, bpm):
         """
@@ -195,14 +242,12 @@ class SequencerWindow(QWidget):
         UI + notification vers le SequencerController,
         qui lui-même met à jour Synths_Midi.bpm.
         """
-        self.tempo_bpm = bpm
         self.tempo_label.setText(f"{bpm} BPM")
 
         if hasattr(self, "app") and hasattr(self.app, "sequencer_controller"):
-            try:
-                self.app.sequencer_controller.set_tempo(bpm)
-            except Exception:
-                pass
+            self.app.run_in_runtime_thread(self.app.sequencer_controller.set_tempo, bpm)
+        else:
+            self.tempo_bpm = bpm
 
     @pyqtSlot(int)
     def set_resolution_slot(self, steps_per_beat):
@@ -232,10 +277,7 @@ class SequencerWindow(QWidget):
 
         # 2. Envoi de la résolution au contrôleur (logique de timing)
         if hasattr(self, "app") and hasattr(self.app, "sequencer_controller"):
-            try:
-                self.app.sequencer_controller._set_resolution(steps_per_beat)
-            except Exception:
-                pass
+            self.app.run_in_runtime_thread(self.app.sequencer_controller._set_resolution, steps_per_beat)
 
 
     # -------------------------------------------------------------
@@ -248,10 +290,7 @@ class SequencerWindow(QWidget):
         on route vers SequencerController.advance_step().
         """
         if hasattr(self, "app") and hasattr(self.app, "sequencer_controller"):
-            try:
-                self.app.sequencer_controller.advance_step()
-            except Exception:
-                pass
+            self.app.run_in_runtime_thread(self.app.sequencer_controller.advance_step)
 
     def toggle_step(self, step_index):
         """
@@ -259,10 +298,7 @@ class SequencerWindow(QWidget):
         La logique de steps (model, sequencer_target, Push) est dans le controller.
         """
         if hasattr(self, "app") and hasattr(self.app, "sequencer_controller"):
-            try:
-                self.app.sequencer_controller._toggle_step(step_index)
-            except Exception:
-                pass
+            self.app.run_in_runtime_thread(self.app.sequencer_controller._toggle_step, step_index)
 
     # -------------------------------------------------------------
     # UI highlight
@@ -293,8 +329,9 @@ class SequencerWindow(QWidget):
 
     def update_steps_display(self):
         pad = self.selected_pad
+        pattern = self.state.pattern
         for i, b in enumerate(self.step_buttons):
-            b.setChecked(self.steps[pad][i])
+            b.setChecked(pattern.is_on(pad, i))
 
     # ui/sequencer_window.py (ajouter à SequencerWindow)
     def highlight_pad(self, pad_name):